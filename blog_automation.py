@@ -6,13 +6,25 @@ Automatically creates, commits and deploys blog posts weekly
 
 import os
 import json
+import logging
 import random
 import re
 import subprocess
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, List
 
-from crewai import Agent, Task, Crew
+from crewai import Agent, Task, Crew, LLM
+from crewai.events import crewai_event_bus
+from crewai.events.types.llm_events import (
+    LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, LLMStreamChunkEvent
+)
+from crewai.events.types.memory_events import MemoryRetrievalCompletedEvent
+from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent
+from crewai.hooks import HookAborted, register_before_llm_call_hook, register_after_llm_call_hook
+from crewai.tasks.task_output import TaskOutput
 from crewai.tools import BaseTool
 import json
 import requests
@@ -20,8 +32,246 @@ from typing import Type
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from blog_post import BlogPost, Post, save_post, stage_post, take_staged_post
+from context_compaction import ContextCompactor, compaction_report
+from cover_images import COVER_CACHE_DIR, COVER_DIR, cover_image_dir, prerender_covers, publish_cover_safely
+from memory_retention import (
+    MemoryLatencyTracker, MemoryRetentionPolicy, create_bounded_memory, enforce_memory_retention, memory_path
+)
+from draft_scoring import DEFAULT_DRAFTS, rank_drafts, score_draft
+from model_routing import AgentLatencyTracker, AgentModelConfig, ModelRouter
+from deadlines import (
+    CHECKPOINT_FILE, RunCancelled, RunCheckpoint, RunDeadlines, find_run_for_task, run_cancelled, run_with_deadline
+)
+from page_fetcher import get_page_fetcher
+from post_collection import COLLECTION_FILE, deploy_post, group_commit_enabled
+from post_query import QUERY_INDEX_FILE, update_query_index_safely
+from rate_limiter import get_rate_limiter, rate_limiter_metrics, parse_retry_after
+from resilient_http import (
+    RETRYABLE_STATUS, UNPROCESSED_STATUS, DEFAULT_READ_TIMEOUT, RetryableError, get_resilient_client,
+    resilience_metrics
+)
+from related_posts import RELATED_FILE, link_related_posts_safely
+from speculative_research import DEFAULT_ANGLES, DEFAULT_MAX_ITER, ResearchCache, score_research
+from search_index import SEARCH_INDEX_FILE, load_or_build_index, search_posts, update_index_with_post
+from site_config import DEFAULT_BRAND, DEFAULT_GIT_REMOTE, DEFAULT_POST_URL, SiteConfig, get_site
+from static_export import EXPORT_DIR, export_site_safely, static_export_dir, static_export_enabled
+from stream_validation import DEFAULT_MAX_REPROMPTS, StreamAborted, stream_validation_enabled, stream_validators
+from structured_logging import LazyJoin, configure_logging, crew_verbose, current_run_id, get_logger, logged_run
+from token_budget import BudgetExceeded, current_usage, metered_run, usage_for_task
+
 # Load environment variables
 load_dotenv()
+configure_logging()
+
+log = get_logger("automation")
+
+_slack_clients = {}
+
+def get_slack_client(token: str):
+    """WebClient de Slack reutilizado por token, con timeout configurable (HTTP_READ_TIMEOUT)"""
+    from slack_sdk import WebClient
+    
+    if token not in _slack_clients:
+        _slack_clients[token] = WebClient(token=token, timeout=int(float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT))))
+    return _slack_clients[token]
+
+def call_slack_api(client_method, idempotent: bool = True, **kwargs):
+    """
+    Llama a un método de slack_sdk con rate limiting compartido, reintentos con backoff,
+    circuit breaker y hedging. Las llamadas no idempotentes (chat_postMessage) solo se reintentan si
+    Slack no llegó a procesarlas (429/503 o fallo al conectar): un timeout de lectura se relanza
+    """
+    from urllib.error import URLError
+    from slack_sdk.errors import SlackApiError
+    
+    limiter = get_rate_limiter("slack")
+    
+    def send():
+        try:
+            response = client_method(**kwargs)
+        except URLError as e:
+            # urllib envuelve en URLError los fallos al conectar/enviar; el timeout de la respuesta llega sin envolver
+            raise RetryableError(f"Slack connection error: {e}", processed=False) from e
+        except SlackApiError as e:
+            limiter.on_response(e.response.status_code, e.response.headers)
+            if e.response.status_code in RETRYABLE_STATUS:
+                raise RetryableError(str(e), parse_retry_after(e.response.headers.get("Retry-After")),
+                                     processed=e.response.status_code not in UNPROCESSED_STATUS) from e
+            raise
+        limiter.on_response(response.status_code, response.headers)
+        return response
+    
+    return get_resilient_client("slack").call(send, idempotent=idempotent)
+
+_llm_rate_limiting_installed = False
+
+def install_llm_rate_limiting():
+    """Registra (una vez por proceso) los hooks globales que pasan cada llamada LLM por el limiter 'llm'"""
+    global _llm_rate_limiting_installed
+    if _llm_rate_limiting_installed:
+        return
+    _llm_rate_limiting_installed = True
+    limiter = get_rate_limiter("llm")
+    
+    def throttle_llm_call(context):
+        limiter.acquire()
+        return None
+    
+    def record_llm_success(context):
+        limiter.on_response(200)
+        return None
+    
+    def record_llm_failure(source, event):
+        error = str(event.error).lower()
+        if "429" in error or "rate limit" in error or "ratelimit" in error:
+            limiter.on_rate_limited()
+    
+    register_before_llm_call_hook(throttle_llm_call)
+    register_after_llm_call_hook(record_llm_success)
+    crewai_event_bus.on(LLMCallFailedEvent)(record_llm_failure)
+
+_deadline_hooks_installed = False
+
+def install_deadline_hooks():
+    """
+    Registra (una vez por proceso) el hook que marca el inicio de cada etapa y aborta
+    cooperativamente la siguiente llamada LLM cuando su deadline (o su presupuesto) ha expirado
+    """
+    global _deadline_hooks_installed
+    if _deadline_hooks_installed:
+        return
+    _deadline_hooks_installed = True
+    
+    def enforce_deadline(context):
+        run, stage = find_run_for_task(context.task)
+        if run is None:
+            return None
+        if run.current_stage != stage:
+            run.start_stage(stage)
+        try:
+            run.check()
+        except RunCancelled as e:
+            raise HookAborted(str(e), source="budget" if isinstance(e, BudgetExceeded) else "deadline")
+        return None
+    
+    register_before_llm_call_hook(enforce_deadline)
+
+# Serializa los deploys de ejecuciones concurrentes dentro del proceso (fan-out, workers de la cola), uno
+# por colección: sitios distintos despliegan a la vez. Con DEPLOY_GROUP_COMMIT los deploys corren a la vez
+# y sus escrituras de blog_posts.json se fusionan
+_publish_locks: Dict[str, threading.Lock] = {}
+# git no admite operaciones concurrentes sobre el mismo repositorio (index.lock): un lock por repositorio
+_git_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def path_lock(locks: Dict[str, threading.Lock], path: str) -> threading.Lock:
+    with _locks_guard:
+        return locks.setdefault(os.path.abspath(path), threading.Lock())
+
+# Tiempo que la recuperación de memoria añade a cada tarea, por ejecución (run_id del contexto del evento)
+memory_latency = MemoryLatencyTracker()
+_memory_tracking_installed = False
+
+def install_memory_latency_tracking():
+    """Registra (una vez por proceso) el listener que mide la recuperación de memoria por tarea"""
+    global _memory_tracking_installed
+    if _memory_tracking_installed:
+        return
+    _memory_tracking_installed = True
+    
+    def record_retrieval(source, event):
+        memory_latency.record(event.task_name, event.retrieval_time_ms, current_run_id())
+    
+    crewai_event_bus.on(MemoryRetrievalCompletedEvent)(record_retrieval)
+
+# Salud de cada modelo (para el enrutado, compartida) y latencia LLM por agente (por ejecución, ver run_id)
+model_router = ModelRouter()
+agent_latency = AgentLatencyTracker()
+_model_tracking_installed = False
+
+def install_model_latency_tracking():
+    """
+    Registra (una vez por proceso) los listeners que miden cada llamada LLM: alimentan el enrutado
+    de modelos y la latencia por agente. Los handlers corren en un pool: se usa la hora de cada evento
+    """
+    global _model_tracking_installed
+    if _model_tracking_installed:
+        return
+    _model_tracking_installed = True
+    started = {}
+    
+    def record_start(source, event):
+        started[event.call_id] = event.timestamp
+    
+    def record_end(source, event):
+        start = started.pop(event.call_id, None)
+        if start is None:
+            return
+        ok = not isinstance(event, LLMCallFailedEvent)
+        latency_ms = (event.timestamp - start).total_seconds() * 1000
+        model_router.record(event.model, latency_ms, ok)
+        agent_latency.record(event.agent_role, event.model, latency_ms, ok, current_run_id())
+    
+    crewai_event_bus.on(LLMCallStartedEvent)(record_start)
+    crewai_event_bus.on(LLMCallCompletedEvent)(record_end)
+    crewai_event_bus.on(LLMCallFailedEvent)(record_end)
+
+def agent_latency_report() -> Dict[str, Dict[str, Any]]:
+    """Latencia LLM por agente de la ejecución en curso (espera a que se procesen los eventos pendientes)"""
+    crewai_event_bus.flush(timeout=5)
+    return agent_latency.snapshot(current_run_id())
+
+_usage_accounting_installed = False
+
+def install_usage_accounting():
+    """
+    Registra (una vez por proceso) los listeners que suman el usage de cada llamada LLM a su ejecución
+    (ver token_budget.RunUsage) y marcan qué herramienta consume la siguiente llamada de la tarea
+    """
+    global _usage_accounting_installed
+    if _usage_accounting_installed:
+        return
+    _usage_accounting_installed = True
+    
+    def record_usage(source, event):
+        usage = usage_for_task(event.task_id)
+        if usage is not None and event.usage:
+            usage.record(event.task_id, event.task_name, event.agent_role, event.model, event.usage)
+    
+    def record_tool(source, event):
+        usage = usage_for_task(event.task_id)
+        if usage is not None:
+            usage.tool_used(event.task_id, event.tool_name)
+    
+    crewai_event_bus.on(LLMCallCompletedEvent)(record_usage)
+    crewai_event_bus.on(ToolUsageFinishedEvent)(record_tool)
+    crewai_event_bus.on(ToolUsageErrorEvent)(record_tool)
+
+_stream_validation_installed = False
+
+def install_stream_validation():
+    """
+    Registra (una vez por proceso) el handler que pasa cada chunk del writer por su validador incremental.
+    Los chunks se emiten de forma síncrona dentro del bucle de streaming: StreamAborted corta la generación
+    """
+    global _stream_validation_installed
+    if _stream_validation_installed:
+        return
+    _stream_validation_installed = True
+    
+    def validate_chunk(source, event):
+        if event.tool_call is None:
+            stream_validators.feed(event.task_id, event.chunk, event.response_id)
+    
+    crewai_event_bus.on(LLMStreamChunkEvent)(validate_chunk)
+
+# Extracto del texto de cada página de resultados que se añade al snippet de Serper
+PAGE_EXCERPT_CHARS = 1500
+
+# Tiempos de lectura entre los que se elige cuando la ejecución no los fija
+# (ángulos y autores son de cada sitio: ver site_config)
+READ_TIMES = ("4 MIN", "5 MIN", "6 MIN")
 
 class WebSearchInput(BaseModel):
     """Input for web search tool"""
@@ -42,8 +292,7 @@ class WebSearchTool(BaseTool):
             if not search_query:
                 return "Error: No search query provided (neither query nor description field)"
             
-            print(f"Debug - WebSearch called with query: '{query}', description: '{description}'")
-            print(f"Debug - Using search query: '{search_query}'")
+            log.debug("WebSearch query=%r description=%r -> %r", query, description, search_query)
             
             serper_key = os.getenv("SERPER_API_KEY")
             if not serper_key:
@@ -59,24 +308,37 @@ class WebSearchTool(BaseTool):
                 "num": 5
             }
             
-            response = requests.post(url, headers=headers, json=payload)
+            # Timeouts, reintentos con backoff+jitter, circuit breaker y rate limiting compartido
+            response = get_resilient_client("serper").request("POST", url, headers=headers, json=payload, idempotent=True)
             if response.status_code == 200:
                 data = response.json()
                 results = []
                 
-                # Debug: Print response structure
-                print(f"Debug - API Response keys: {list(data.keys())}")
+                log.debug("Serper response keys: %s", data.keys())
                 
                 # Try different possible response structures
                 organic_results = data.get("organic", []) or data.get("results", []) or data.get("organic_results", [])
+                top_results = organic_results[:3]
                 
-                for result in organic_results[:3]:
+                # Descargar y extraer las páginas en paralelo (el snippet solo trae ~200 caracteres)
+                pages = {}
+                if os.getenv("FETCH_PAGES", "true").lower() != "false":
+                    links = [result.get("link", "") for result in top_results]
+                    pages = {page["url"]: page for page in get_page_fetcher().fetch_many(links)}
+                
+                for result in top_results:
                     title = result.get("title", "No title")
                     snippet = result.get("snippet", "") or result.get("description", "No description available")
                     link = result.get("link", "")
                     
                     if title and snippet:
-                        results.append(f"Title: {title}\nSummary: {snippet}\nSource: {link}\n")
+                        entry = f"Title: {title}\nSummary: {snippet}\nSource: {link}\n"
+                        page = pages.get(link, {})
+                        if page.get("text"):
+                            entry += f"Extract: {page['text'][:PAGE_EXCERPT_CHARS]}\n"
+                        elif page.get("error"):
+                            log.debug("Could not fetch %s: %s", link, page["error"])
+                        results.append(entry)
                 
                 if results:
                     return "\n".join(results)
@@ -99,174 +361,13 @@ class FileWriterTool(BaseTool):
     args_schema: Type[BaseModel] = FileWriterInput
     
     def _run(self, filename: str, content: str) -> str:
-        """Write content to a file with ADVANCED JSON sanitization"""
+        """Write content to a file (los posts ya no pasan por aquí: ver BlogPost y save_post)"""
         try:
-            # Si es un archivo JSON, sanitizar y arreglar formato
-            if filename.endswith('.json'):
-                import json
-                import re
-                import string
-                
-                print(f"🔧 FileWriter debug - Processing JSON file: {filename}")
-                print(f"🔧 Content preview: {content[:200]}...")
-                
-                # First attempt: try to parse as-is
-                try:
-                    json.loads(content)
-                    print(f"✅ FileWriter debug - JSON is already valid!")
-                except json.JSONDecodeError as e:
-                    print(f"🚨 FileWriter debug - JSON needs repair: {e}")
-                    
-                    # MÚLTIPLES ESTRATEGIAS DE REPARACIÓN SECUENCIAL
-                    strategies = [
-                        ("Control Characters", self._remove_control_chars),
-                        ("Content Field Escaping", self._escape_content_field),  
-                        ("Quote Fixing", self._fix_quotes),
-                        ("Structure Repair", self._fix_structure),
-                        ("Emergency Rebuild", self._emergency_rebuild)
-                    ]
-                    
-                    for strategy_name, repair_func in strategies:
-                        try:
-                            print(f"🔧 Intentando: {strategy_name}...")
-                            repaired = repair_func(content)
-                            json.loads(repaired)  # Test validity
-                            print(f"✅ {strategy_name} exitosa!")
-                            content = repaired
-                            break
-                        except Exception as repair_err:
-                            print(f"❌ {strategy_name} falló: {repair_err}")
-                            continue
-                    else:
-                        print(f"🚨 Todas las reparaciones fallaron, guardando como está para debug")
-            
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(content)
             return f"Successfully wrote content to {filename}"
         except Exception as e:
             return f"Error writing to file: {str(e)}"
-    
-    def _remove_control_chars(self, content: str) -> str:
-        """Remove all control characters except allowed ones"""
-        import string
-        # Keep only printable characters + specific whitespace
-        allowed = set(string.printable)
-        cleaned = ''.join(char for char in content if char in allowed)
-        return cleaned
-    
-    def _escape_content_field(self, content: str) -> str:
-        """Escape the content field specifically"""
-        import re
-        
-        # More flexible pattern for content field
-        pattern = r'("content":\s*")(.*?)("(?:\s*[,}])?)'
-        
-        def escape_func(match):
-            prefix = match.group(1)
-            text = match.group(2)
-            suffix = match.group(3)
-            
-            # Aggressive escaping
-            escaped = (text.replace('\\', '\\\\')    # Escape backslashes
-                          .replace('"', '\\"')       # Escape quotes
-                          .replace('\n', '\\n')      # Escape newlines
-                          .replace('\r', '\\r')      # Escape carriage returns  
-                          .replace('\t', '\\t')      # Escape tabs
-                          .replace('\b', '\\b')      # Escape backspace
-                          .replace('\f', '\\f'))     # Escape form feed
-            
-            return prefix + escaped + suffix
-        
-        return re.sub(pattern, escape_func, content, flags=re.DOTALL)
-    
-    def _fix_quotes(self, content: str) -> str:
-        """Fix unescaped quotes and missing commas"""
-        lines = content.split('\n')
-        fixed = []
-        
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            
-            # Add missing commas
-            if (stripped and 
-                not stripped.endswith(',') and 
-                not stripped.endswith('{') and 
-                not stripped.endswith('}') and
-                i < len(lines) - 1):
-                next_stripped = lines[i + 1].strip()
-                if next_stripped and not next_stripped.startswith('}'):
-                    line = line.rstrip() + ','
-            
-            fixed.append(line)
-        
-        return '\n'.join(fixed)
-    
-    def _fix_structure(self, content: str) -> str:
-        """Fix basic JSON structure"""
-        content = content.strip()
-        
-        # Ensure proper brackets
-        if not content.startswith('{'):
-            content = '{' + content
-        if not content.endswith('}'):
-            content = content.rstrip(',') + '}'
-        
-        return content
-    
-    def _emergency_rebuild(self, content: str) -> str:
-        """Last resort: rebuild JSON from extracted values"""
-        import re
-        import json
-        from datetime import datetime
-        
-        try:
-            # Extract key fields
-            title = self._extract_field(content, 'title') or "Artículo generado por IA"
-            date = self._extract_field(content, 'date') or datetime.now().strftime("%d/%m/%Y")  
-            author = self._extract_field(content, 'author') or "AI Blog Bot"
-            summary = self._extract_field(content, 'summary') or "Resumen no disponible"
-            content_text = self._extract_field(content, 'content') or "Contenido no disponible"
-            
-            # Clean and escape content
-            content_text = (content_text.replace('\n', ' ')
-                                       .replace('\r', ' ')
-                                       .replace('\t', ' ')
-                                       .replace('"', "'")[:2000])  # Limit length
-            
-            # Generate slug
-            slug = (title.lower()
-                        .replace(' ', '-')
-                        .replace('í', 'i')
-                        .replace('ó', 'o')
-                        .replace('á', 'a')
-                        .replace('é', 'e')
-                        .replace('ú', 'u')[:50])
-            
-            # Build emergency JSON
-            emergency = {
-                "label": "AI para PyMEs",
-                "title": title,
-                "date": date,
-                "author": author,
-                "readTime": "5 MIN",
-                "summary": summary,
-                "coverImage": f"/images/blog/{slug}.jpeg",
-                "slug": slug,
-                "content": content_text
-            }
-            
-            return json.dumps(emergency, ensure_ascii=False, indent=2)
-            
-        except Exception as e:
-            print(f"Emergency rebuild failed: {e}")
-            return content
-    
-    def _extract_field(self, content: str, field: str) -> str:
-        """Extract a field value from potentially broken JSON"""
-        import re
-        pattern = rf'"{field}":\s*"([^"]*)"'
-        match = re.search(pattern, content)
-        return match.group(1) if match else None
 
 class GitCommitInput(BaseModel):
     """Input for git commit tool"""
@@ -278,50 +379,70 @@ class GitCommitTool(BaseTool):
     name: str = "git_commit"
     description: str = "Add blog_posts.json, commit with [blog-bot] prefix and push to Git repository"
     args_schema: Type[BaseModel] = GitCommitInput
+    # Repositorio y remoto del sitio (ver site_config)
+    repo_dir: str = "."
+    remote: str = DEFAULT_GIT_REMOTE
+    # Rutas que se añaden siempre junto a files si existen (las portadas generadas en el deploy)
+    include_paths: List[str] = []
     
     def _run(self, message: str, files: str = "blog_posts.json") -> str:
         """Execute git operations"""
         try:
-            # Usar directorio actual
-            current_dir = os.getcwd()
+            # Usar el directorio del sitio (el actual para el sitio por defecto)
+            current_dir = os.path.abspath(self.repo_dir)
             
             # Agregar prefijo [blog-bot] al mensaje
             if not message.startswith("[blog-bot]"):
                 message = f"[blog-bot] {message}"
             
-            print(f"🔍 Git debug - Working directory: {current_dir}")
-            print(f"🔍 Git debug - Files to add: {files}")
-            print(f"🔍 Git debug - Commit message: {message}")
-            
-            # Add files
-            result = subprocess.run(["git", "add", files], capture_output=True, text=True, cwd=".")
-            if result.returncode != 0:
-                return f"Error adding files: {result.stderr}"
-            
-            # Verificar que hay cambios para commit
-            result = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True, cwd=".")
-            if not result.stdout.strip():
-                return "✅ No changes to commit - files already up to date"
-            
-            print(f"🔍 Git debug - Changes found: {result.stdout.strip()}")
-            
-            # Commit
-            result = subprocess.run(["git", "commit", "-m", message], capture_output=True, text=True, cwd=".")
-            if result.returncode != 0:
-                error_details = result.stderr.strip() or result.stdout.strip() or "Sin detalles de error"
-                print(f"🔍 Git commit debug - stdout: {result.stdout}")
-                print(f"🔍 Git commit debug - stderr: {result.stderr}")
-                print(f"🔍 Git commit debug - returncode: {result.returncode}")
-                return f"Error committing: {error_details}"
-            
-            # Push
-            result = subprocess.run(["git", "push", "blog-poster"], capture_output=True, text=True, cwd=".")
-            if result.returncode != 0:
-                return f"Error pushing: {result.stderr}"
-            
-            return f"✅ Successfully committed and pushed: {message}"
+            log.debug("Git commit in %s: files=%s message=%r", current_dir, files, message)
+            
+            with path_lock(_git_locks, self.repo_dir):
+                return self._commit_and_push(message, files)
         except Exception as e:
             return f"Error in git operations: {str(e)}"
+    
+    def _commit_and_push(self, message: str, files: str) -> str:
+        # Add files (y las portadas del deploy)
+        paths = [files] + [path for path in self.include_paths if os.path.exists(os.path.join(self.repo_dir, path))]
+        result = subprocess.run(["git", "add", *paths], capture_output=True, text=True, cwd=self.repo_dir)
+        if result.returncode != 0:
+            return f"Error adding files: {result.stderr}"
+        
+        # Verificar que hay cambios para commit (con group commit otro deploy puede haberlos incluido ya)
+        result = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True, cwd=self.repo_dir)
+        if not result.stdout.strip():
+            return "✅ No changes to commit - files already up to date"
+        
+        log.debug("Git changes found: %s", result.stdout)
+        
+        # Commit
+        result = subprocess.run(["git", "commit", "-m", message], capture_output=True, text=True, cwd=self.repo_dir)
+        if result.returncode != 0:
+            error_details = result.stderr.strip() or result.stdout.strip() or "Sin detalles de error"
+            log.warning("Git commit failed (returncode %s): %s", result.returncode, error_details,
+                        extra={"fields": {"returncode": result.returncode}})
+            return f"Error committing: {error_details}"
+        
+        # Push (pasa por el rate limiter compartido del remoto git)
+        limiter = get_rate_limiter("git")
+        limiter.acquire()
+        result = subprocess.run(["git", "push", self.remote], capture_output=True, text=True, cwd=self.repo_dir)
+        if result.returncode != 0:
+            if "429" in result.stderr or "rate limit" in result.stderr.lower():
+                limiter.on_rate_limited()
+            return f"Error pushing: {result.stderr}"
+        
+        return f"✅ Successfully committed and pushed: {message}"
+
+def slack_channel_target(channel: str) -> str:
+    """Canal al que publica el bot: ID directo para #blog-posts, '#' delante de los nombres"""
+    # Use the channel ID that we know works from our debug logs
+    if channel in ["blog-posts", "#blog-posts"]:
+        return "C096JQVRXPG"  # Direct channel ID from logs
+    if not channel.startswith('#') and not channel.startswith('C'):
+        return f"#{channel}"
+    return channel
 
 class SlackNotificationInput(BaseModel):
     """Input for Slack notification tool"""
@@ -333,27 +454,23 @@ class SlackNotificationTool(BaseTool):
     name: str = "slack_notification"
     description: str = "Send notification to Slack channel"
     args_schema: Type[BaseModel] = SlackNotificationInput
+    # Canal del sitio cuando el agente no indica ninguno
+    default_channel: str = ""
     
     def _run(self, message: str, channel: str = "") -> str:
         """Send Slack notification"""
         try:
-            from slack_sdk import WebClient
-            
             slack_token = os.getenv("SLACK_BOT_TOKEN")
             if not slack_token:
                 return "❌ SLACK_BOT_TOKEN not configured"
             
-            slack_channel = channel or os.getenv("SLACK_CHANNEL", "blog-posts")
+            slack_channel = slack_channel_target(channel or self.default_channel or os.getenv("SLACK_CHANNEL", "blog-posts"))
             
-            # Use the channel ID that we know works from our debug logs
-            if slack_channel in ["blog-posts", "#blog-posts"]:
-                slack_channel = "C096JQVRXPG"  # Direct channel ID from logs
-            elif not slack_channel.startswith('#') and not slack_channel.startswith('C'):
-                slack_channel = f"#{slack_channel}"
+            client = get_slack_client(slack_token)
             
-            client = WebClient(token=slack_token)
-            
-            response = client.chat_postMessage(
+            response = call_slack_api(
+                client.chat_postMessage,
+                idempotent=False,
                 channel=slack_channel,
                 text=message,
                 username="Blog Automation"
@@ -375,78 +492,165 @@ class BlogDeploymentTool(BaseTool):
     name: str = "blog_deployment"
     description: str = "Deploy blog post to blog_posts.json collection and remove individual file"
     args_schema: Type[BaseModel] = BlogDeploymentInput
+    # Colección e índices del sitio (los de siempre en el directorio actual para el sitio por defecto)
+    collection_file: str = COLLECTION_FILE
+    search_index_file: str = SEARCH_INDEX_FILE
+    query_index_file: str = QUERY_INDEX_FILE
+    related_file: str = RELATED_FILE
+    # Portadas del sitio: destino, caché de renderizado y marca que lleva la plantilla
+    cover_dir: str = COVER_DIR
+    cover_cache_dir: str = COVER_CACHE_DIR
+    brand: str = DEFAULT_BRAND
+    # Exportación estática del sitio (STATIC_EXPORT): directorio y URL de los posts
+    export_dir: str = EXPORT_DIR
+    post_url: str = DEFAULT_POST_URL
     
     def _run(self, blog_file: str) -> str:
-        """Deploy blog post to current directory"""
+        """Deploy blog post to the site's collection"""
         try:
-            # Read blog post
-            with open(blog_file, 'r', encoding='utf-8') as f:
-                blog_data = json.load(f)
-            
-            # Create a simple blog posts collection in current directory
-            blog_collection_file = "blog_posts.json"
+            # Si la ejecución expiró, el post es del llamador (lo guarda en disco para un redeploy a mano): no tocarlo
+            if run_cancelled():
+                return f"Error deploying blog post: run cancelled before deploy, {blog_file} kept for a manual redeploy"
+            # El post validado llega en memoria (stage_post); leer el archivo solo si se invoca a mano
+            post = take_staged_post(blog_file, self.collection_file)
+            if post is None:
+                if run_cancelled():  # el llamador lo recuperó entre las dos comprobaciones
+                    return f"Error deploying blog post: run cancelled before deploy, {blog_file} kept for a manual redeploy"
+                with open(blog_file, 'r', encoding='utf-8') as f:
+                    post = Post.from_json(f.read())
+            blog_data = post.to_dict()
+            
+            blog_collection_file = self.collection_file
             current_dir = os.getcwd()
             
-            print(f"🔍 Deploy debug - Working directory: {current_dir}")
-            print(f"🔍 Deploy debug - Collection file: {blog_collection_file}")
-            
-            # Load existing posts or create new collection
-            if os.path.exists(blog_collection_file):
-                with open(blog_collection_file, 'r', encoding='utf-8') as f:
-                    try:
-                        existing_posts = json.load(f)
-                        if not isinstance(existing_posts, list):
-                            existing_posts = []
-                    except:
-                        existing_posts = []
-            else:
-                existing_posts = []
-            
-            # Add new post to collection
-            existing_posts.append(blog_data)
+            log.debug("Deploy in %s -> %s", current_dir, blog_collection_file)
             
-            # Write updated collection
-            with open(blog_collection_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_posts, f, indent=2, ensure_ascii=False)
+            # Añadir el post bajo lock con escritura atómica (una colección corrupta aborta el deploy, no se vacía);
+            # bajo el mismo lock se calculan sus posts relacionados y se actualizan los de sus vecinos, y los índices
+            # de consulta (fecha, autor, label, slug) se rehacen con los tramos de la escritura sin releer el archivo
+            total_posts = deploy_post(blog_data, blog_collection_file,
+                                      before_write=partial(link_related_posts_safely, path=self.related_file),
+                                      after_write=partial(update_query_index_safely, index_path=self.query_index_file,
+                                                          collection_path=blog_collection_file))
             
-            print(f"🔍 Deploy debug - Posts in collection: {len(existing_posts)}")
+            log.info("📦 Post deployed: %s posts in collection", total_posts,
+                     extra={"fields": {"slug": blog_data.get("slug"), "total_posts": total_posts}})
             
-            # Remove individual blog file after adding to collection
+            # Actualizar el índice de búsqueda de forma incremental (no bloquea el deploy si falla)
             try:
-                os.remove(blog_file)
-                print(f"🔍 Deploy debug - Removed individual file: {blog_file}")
+                index = update_index_with_post(blog_data, self.search_index_file, blog_collection_file)
+                log.debug("Search index updated: %s posts", len(index))
             except Exception as e:
-                print(f"⚠️ Warning: Could not remove individual file {blog_file}: {e}")
+                log.warning("⚠️ Could not update search index: %s", e)
+            
+            # Portada /images/blog/<slug>.jpeg con sus variantes (de la caché si el título no cambió)
+            publish_cover_safely(blog_data, self.brand, self.cover_dir, self.cover_cache_dir)
+            
+            # HTML, índices, RSS y sitemap: solo se re-renderiza lo que cambió (el post nuevo y sus vecinos)
+            if static_export_enabled():
+                export_site_safely(blog_collection_file, self.export_dir, self.post_url, self.brand)
+            
+            # Remove individual blog file after adding to collection (si existe: el flujo normal no lo escribe)
+            if os.path.exists(blog_file):
+                try:
+                    os.remove(blog_file)
+                    log.debug("Removed individual file: %s", blog_file)
+                except Exception as e:
+                    log.warning("⚠️ Could not remove individual file %s: %s", blog_file, e)
             
             return f"✅ Blog post deployed to {blog_collection_file}, individual file cleaned up"
         except Exception as e:
             return f"Error deploying blog post: {str(e)}"
 
+class PostSearchInput(BaseModel):
+    """Input for post search tool"""
+    query: str = Field(description="Topic or keywords to look for in already published posts")
+    limit: int = Field(default=5, description="Maximum number of posts to return")
+
+class PostSearchTool(BaseTool):
+    """Tool to check prior coverage in the published blog collection"""
+    name: str = "post_search"
+    description: str = "Search already published blog posts to check whether a topic has been covered before. Use it before choosing a topic to avoid repeating content."
+    args_schema: Type[BaseModel] = PostSearchInput
+    # Índice y colección del sitio
+    index_file: str = SEARCH_INDEX_FILE
+    collection_file: str = COLLECTION_FILE
+    
+    def _run(self, query: str, limit: int = 5) -> str:
+        """Query the local full-text search index"""
+        try:
+            hits = search_posts(query, limit, self.index_file, self.collection_file)
+            if not hits:
+                return f"No published posts found about '{query}'"
+            
+            lines = [f"Published posts related to '{query}':"]
+            for hit in hits:
+                lines.append(f"- {hit['title']} ({hit['date']}, slug: {hit['slug']}, score: {hit['score']})")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error searching published posts: {str(e)}"
+
 class BlogAutomationCrew:
     """
     CrewAI-based blog automation system for weekly AI content creation
+    
+    site: el blog en el que publica (ver site_config); por defecto SITE o el primero de sites.json
     """
     
-    def __init__(self):
-        # Initialize tools that agents will use
+    def __init__(self, context_token_budget: int = None, site: SiteConfig = None):
+        self.site = site or get_site()
+        
+        # Initialize tools that agents will use (apuntando a la colección, repo y canal del sitio)
         self.web_search_tool = WebSearchTool()
-        self.file_writer_tool = FileWriterTool()
-        self.git_commit_tool = GitCommitTool()
-        self.slack_notification_tool = SlackNotificationTool()
-        self.blog_deployment_tool = BlogDeploymentTool()
+        self.git_commit_tool = GitCommitTool(repo_dir=self.site.directory, remote=self.site.git_remote,
+                                             include_paths=[cover_image_dir()]
+                                             + ([static_export_dir()] if static_export_enabled() else []))
+        self.slack_notification_tool = SlackNotificationTool(default_channel=self.site.slack_channel)
+        self.blog_deployment_tool = BlogDeploymentTool(
+            collection_file=self.site.collection,
+            search_index_file=self.site.search_index,
+            query_index_file=self.site.query_index,
+            related_file=self.site.related_matrix,
+            cover_dir=self.site.cover_dir,
+            cover_cache_dir=self.site.cover_cache,
+            brand=self.site.brand,
+            export_dir=self.site.export_dir,
+            post_url=self.site.post_url
+        )
+        self.post_search_tool = PostSearchTool(index_file=self.site.search_index, collection_file=self.site.collection)
+        
+        # Compacta la salida del research antes de pasarla como contexto al writer
+        # (presupuesto configurable vía argumento o CONTEXT_TOKEN_BUDGET; un compactador por tarea de research)
+        self.context_token_budget = context_token_budget
+        
+        # Todas las llamadas LLM del proceso comparten el rate limiter 'llm'
+        install_llm_rate_limiting()
+        install_deadline_hooks()
+        install_memory_latency_tracking()
+        install_model_latency_tracking()
+        install_usage_accounting()
+        install_stream_validation()
+        
+        # Reintentos del writer cuando el validador incremental aborta un borrador (STREAM_MAX_REPROMPTS)
+        self.stream_max_reprompts = int(os.getenv("STREAM_MAX_REPROMPTS", DEFAULT_MAX_REPROMPTS))
+        
+        # Política de retención de la memoria del crew (MEMORY_MAX_ENTRIES, MEMORY_MAX_BYTES, ...)
+        self.memory_policy = MemoryRetentionPolicy()
         
         # Blog post template for consistency
-        self.blog_template = {
-            "label": "IA para tu PyME",
-            "title": "",
-            "date": "",
-            "author": "Jon Ortega", 
-            "readTime": "5 MIN",
-            "summary": "",
-            "coverImage": "/images/blog/", 
-            "slug": "",
-            "content": ""
-        }
+        self.blog_template = self.site.template()
+    
+    def create_agent_llm(self, agent: str) -> LLM:
+        """
+        LLM de un agente con su modelo, temperatura y max_tokens (<AGENTE>_MODEL, ...). Con MODEL_ROUTING
+        se usa el modelo de respaldo mientras el principal esté lento o fallando (ver ModelRouter)
+        """
+        config = AgentModelConfig.from_env(agent)
+        model, reason = model_router.choose(config)
+        if reason:
+            log.warning("🔀 %s: %s degradado (%s) -> %s", agent, config.model, reason, model,
+                        extra={"fields": {"agent": agent, "primary": config.model, "fallback": model}})
+        return LLM(**config.llm_params(model))
     
     def create_research_agent(self) -> Agent:
         """
@@ -466,10 +670,10 @@ class BlogAutomationCrew:
                         research breakthroughs, industry developments, and technological implications. You can 
                         identify which AI developments are significant versus just hype, and understand the 
                         broader implications of AI advances across different sectors.""",
-            tools=[self.web_search_tool],  # ← ACCESO A INTERNET para investigación actualizada
-            verbose=True,
+            tools=[self.web_search_tool, self.post_search_tool],  # ← ACCESO A INTERNET + archivo de posts publicados
+            verbose=crew_verbose(),
             allow_delegation=False,  # Este agente no delega, se enfoca en su especialidad
-            temperature=0.7  # ← CREATIVIDAD MODERADA: suficiente variedad sin inventar
+            llm=self.create_agent_llm("research")  # ← CREATIVIDAD MODERADA (0.7): suficiente variedad sin inventar
         )
     
     def create_writer_agent(self) -> Agent:
@@ -478,25 +682,29 @@ class BlogAutomationCrew:
         
         ¿Por qué este agente?
         - Especializado en escritura para audiencia PyME
-        - Conoce perfectamente el formato JSON requerido
-        - Puede acceder a internet para verificar datos y tendencias
+        - Conoce perfectamente el formato requerido
+        - Devuelve el post como salida estructurada (BlogPost); sin herramientas para que
+          el modelo use el esquema nativo en vez de texto JSON libre
         """
-        return Agent(
+        agent = Agent(
             role="Technical Blog Writer for SMBs",
             goal="""Take general AI trends and developments and adapt them specifically for small and medium 
                     businesses (PyMEs). Write engaging blog posts in Spanish that translate complex AI concepts 
-                    into practical, actionable insights for PyME audiences, following the exact JSON format provided.""",
+                    into practical, actionable insights for PyME audiences, following the exact post format provided.""",
             backstory="""You are an expert technical writer specialized in translating cutting-edge AI developments 
                         into practical business applications for PyMEs (small and medium businesses). You excel at 
                         taking complex AI concepts and explaining their real-world business value. You understand 
                         PyME concerns about cost, complexity, and implementation. You frequently write about AI topics 
                         like contexto, RAG, agentes, wrappers, IA, LLMs, AGI, ASI, and always focus on how these 
                         technologies can specifically benefit small and medium businesses.""",
-            tools=[self.web_search_tool, self.file_writer_tool],  # ← ACCESO A INTERNET + escritura
-            verbose=True,
+            tools=[],  # ← Los datos vienen del research; sin tools la salida se restringe al esquema BlogPost
+            verbose=crew_verbose(),
             allow_delegation=False,
-            temperature=0.7  # ← CREATIVIDAD MODERADA para escritura engaging pero basada en hechos
+            llm=self.create_agent_llm("writer")  # ← CREATIVIDAD MODERADA (0.7) para escritura engaging pero basada en hechos
         )
+        # En streaming el validador incremental puede abortar un borrador condenado (STREAM_VALIDATION)
+        agent.llm.stream = stream_validation_enabled()
+        return agent
     
     def create_qa_agent(self) -> Agent:
         """
@@ -515,9 +723,9 @@ class BlogAutomationCrew:
                         validation and JSON format verification. You ensure that all content meets 
                         strict standards for accuracy, format compliance, and audience appropriateness.""",
             tools=[],  # QA agent doesn't need external tools, focuses on validation
-            verbose=True,
+            verbose=crew_verbose(),
             allow_delegation=False,
-            temperature=0.2  # ← PRECISIÓN ALTA: enfoque en validación exacta, no creatividad
+            llm=self.create_agent_llm("qa")  # ← PRECISIÓN ALTA (0.2): enfoque en validación exacta, no creatividad
         )
     
     def create_technical_agent(self) -> Agent:
@@ -537,36 +745,28 @@ class BlogAutomationCrew:
                         Git operations, and integration with communication tools like Slack. You ensure 
                         that the technical aspects of content publishing work flawlessly.
                         
-                        CRITICAL: Always use Slack channel ID C096JQVRXPG instead of channel name #blog-posts for notifications.""",
+                        CRITICAL: Always use Slack channel """ + slack_channel_target(self.site.slack_channel) + """ for notifications.""",
             tools=[self.blog_deployment_tool, self.git_commit_tool, self.slack_notification_tool],
-            verbose=True,
+            verbose=crew_verbose(),
             allow_delegation=False,
-            temperature=0.1  # ← PRECISIÓN MÁXIMA: operaciones técnicas requieren exactitud
+            llm=self.create_agent_llm("technical")  # ← PRECISIÓN MÁXIMA (0.1): operaciones técnicas requieren exactitud
         )
     
-    def create_research_task(self, agent: Agent) -> Task:
+    def create_research_task(self, agent: Agent, angle: str = None) -> Task:
         """
         Tarea de investigación: busca temas trending con VARIEDAD
+        (o sobre un ángulo concreto si se indica, p. ej. desde la cola de trabajos)
+        
+        Las instrucciones fijas van primero y el ángulo al final: así el prefijo del prompt es
+        idéntico en todas las ejecuciones y el proveedor lo sirve desde su caché de prompts
         """
         import random
         
-        # ROTAR TEMAS para evitar repetición
-        topic_angles = [
-            "Busca las últimas innovaciones en IA que resuelvan problemas específicos de PyMEs.",
-            "Investiga tecnologías emergentes como agentes IA, MCP (Model Context Protocol), RAG avanzado, o AI wrappers que permitan a PyMEs competir con grandes empresas sin grandes inversiones",
-            "Explora herramientas no-code y automation que transformen emprendedores agotados en CEOs eficientes: Zapier vs Make vs n8n...",
-            "Busca soluciones específicas de marketing con IA que generen ROI inmediato: automación de email marketing, lead generation con IA, nuevas funciones de Meta/Google Ads, CRM inteligentes económicos",
-            "Investiga cómo PyMEs pueden usar IA para ser más rentables: herramientas de análisis de datos gratuitas, dashboards automáticos, Business Intelligence accesible, métricas que importen",
-            "Tendencias de IA generativa para el marketing y las agencias de publicidad digital",
-            "Explora tecnologías que solucionen el caos operativo de pequeñas empresas: project management con IA, comunicación interna automática, gestión de equipos remotos, ERP para PyMEs",
-            "Investiga tendencias técnicas específicas pero aplicables: integración de APIs, database querying con IA, workflow automation, herramientas de productividad que realmente funcionen para equipos pequeños"
-        ]
-        
         # Seleccionar ángulo aleatorio
-        selected_angle = random.choice(topic_angles)
+        selected_angle = angle or random.choice(self.site.angles)
         
         return Task(
-            description=f"""{selected_angle}
+            description=f"""Research the angle given at the end of these instructions.
 
                           Return 1 specific trending AI topic with detailed information about:
                           - What the development/trend is
@@ -578,7 +778,12 @@ class BlogAutomationCrew:
                           - "IA para PyMEs" (demasiado genérico)
                           - "Adopción de inteligencia artificial" (muy amplio)
                           
-                          Retorna UNA herramienta, desarrollo o tendencia CONCRETA y ESPECÍFICA.""",
+                          Usa la herramienta post_search para comprobar que el tema no se ha publicado ya en el blog.
+                          
+                          Retorna UNA herramienta, desarrollo o tendencia CONCRETA y ESPECÍFICA.
+                          
+                          ÁNGULO DE ESTA INVESTIGACIÓN:
+                          {selected_angle}""",
             agent=agent,
             expected_output="""UNA herramienta, desarrollo o funcionalidad ESPECÍFICA con:
                               - Nombre exacto de la herramienta/plataforma/funcionalidad
@@ -591,39 +796,38 @@ class BlogAutomationCrew:
                               "Zapier lanzó en enero 2025 su nueva función de AI Actions que permite crear automaciones usando lenguaje natural. Cuesta $20/mes adicionales y se integra con +5000 apps. Soluciona el problema de PyMEs que no saben programar pero necesitan automatizar workflows complejos."
                               
                               EJEMPLO DE RESPUESTA MALA:
-                              "La inteligencia artificial está transformando las PyMEs..." (demasiado genérico)"""
+                              "La inteligencia artificial está transformando las PyMEs..." (demasiado genérico)""",
+            guardrail=ContextCompactor(self.context_token_budget).__call__  # ← Deduplica fuentes y limita el contexto que recibe el writer (método: CrewAI lee su código)
         )
     
-    def create_writing_task(self, agent: Agent, research_task: Task) -> Task:
+    def create_writing_task(self, agent: Agent, research_task: Task, label: str = None,
+                            author: str = None, read_time: str = None, word_range: str = "800-1200",
+                            async_execution: bool = False, date: str = None) -> Task:
         """
-        Tarea de escritura: crea el blog post en formato JSON exacto
+        Tarea de escritura: crea el blog post como salida estructurada (BlogPost)
+        
+        Los parámetros permiten escribir variantes del mismo research (label, autor, longitud);
+        lo que no se fija sale de la plantilla del sitio.
+        El archivo JSON lo escribe el código a partir de task.output.pydantic (ver save_post)
+        
+        Orden del prompt, de más a menos estable: instrucciones comunes, pitch del sitio y datos de
+        esta ejecución (fecha, autor, label, longitud). El prefijo común se sirve de la caché de prompts
         """
-        current_date = datetime.now().strftime("%d/%m/%Y")
-        author = random.choice(["Jon Ortega", "Leire Legarreta", "Elbio Nielsen"])
-        readTime = random.choice(["4 MIN", "5 MIN", "6 MIN"])
+        current_date = date or datetime.now().strftime("%d/%m/%Y")
+        label = label or self.site.label
+        author = author or random.choice(self.site.authors)
+        readTime = read_time or random.choice(READ_TIMES)
         
         return Task(
             description=f"""Take the general AI trend/development from the research and adapt it specifically for PyMEs 
                            (small and medium businesses). Write a complete blog post in Spanish that translates this 
-                           AI topic into practical business applications, following this EXACT JSON format:
-                           
-                           {{
-                               "label": "IA para tu PyME",
-                               "title": "[Compelling title about the chosen topic]",
-                               "date": "{current_date}",
-                               "author": "{author}",
-                               "readTime": "{readTime}",
-                               "summary": "[2-3 sentence summary that hooks the reader]",
-                               "coverImage": "/images/blog/[slug-based-filename].jpeg",
-                               "slug": "[url-friendly-slug]",
-                               "content": "[Full blog post content in markdown format]"
-                           }}
+                           AI topic into practical business applications. Fill in every field of the post following
+                           the POST FIELDS template at the end of these instructions.
                            
                            REQUIREMENTS:
-                           - Content must be 800-1200 words
+                           - Content length must be within the word range given at the end
                            - Use a conversational but professional tone specifically for PyME audiences
                            - Transform the general AI topic into specific PyME applications and benefits
-                           - Speak about how Wrappers.es adresses that problem: we provide long context windows for company files, infinite memory and vertical agents
                            - Address common PyME concerns: cost, complexity, implementation, ROI
                            - Incorporate relevant AI keywords naturally: contexto, RAG, agentes, wrappers, IA, LLMs, agentes verticales, memoria, ventana de contexto, etc.
                            - Use proper markdown formatting in content field
@@ -634,6 +838,7 @@ class BlogAutomationCrew:
                            - Use date format DD/MM/YYYY (not DD-MM-YYYY or YYYY-MM-DD)
                            - Focus on practical implementation and real business benefits
                            - NEVER use placeholders like "[Nombre de la Empresa]" or "[sector]" - use specific real company names and sectors
+                           - Copy label, date, author and readTime exactly as given in POST FIELDS
                            
                            SPANISH TITLE FORMATTING:
                            - Titles should use sentence case: "Así se quiere que sean las mayúsculas"
@@ -645,25 +850,28 @@ class BlogAutomationCrew:
                            but have concerns about cost, complexity, implementation time, and ROI. They need practical, 
                            actionable information about AI applications that can realistically be implemented in their business.
                            
-                           CRITICAL INSTRUCTION: You MUST use the file_writer tool to save the JSON content to a file.
-                            
-                           MANDATORY STEPS:
-                           1. Create the complete JSON content
-                           2. IMMEDIATELY call file_writer tool with filename: "[slug].json"
-                           3. Do NOT provide the JSON as final answer without saving it first
+                           BRAND:
+                           - {self.site.pitch}
                            
-                           Example filename: "automatizacion-inteligente-pymes.json"
+                           POST FIELDS:
+                           {{
+                               "label": "{label}",
+                               "title": "[Compelling title about the chosen topic]",
+                               "date": "{current_date}",
+                               "author": "{author}",
+                               "readTime": "{readTime}",
+                               "summary": "[2-3 sentence summary that hooks the reader]",
+                               "coverImage": "/images/blog/[slug-based-filename].jpeg",
+                               "slug": "[url-friendly-slug]",
+                               "content": "[Full blog post content in markdown format]"
+                           }}
                            
-                           CRITICAL JSON FORMATTING REQUIREMENTS:
-                           - ALWAYS end with a complete, valid JSON structure
-                           - Ensure all strings are properly escaped and closed with quotes
-                           - Use double quotes for JSON strings, not single quotes
-                           - Avoid control characters in content (use \\n for line breaks)
-                           - MUST end with closing quote for content field and closing brace }}
-                           - Verify the JSON is complete before considering the task done""",
+                           WORD RANGE: {word_range} words""",
             agent=agent,
             context=[research_task],  # ← El agente writer recibe el resultado del research
-            expected_output="Complete blog post in valid JSON format saved to a file using the file_writer_tool"
+            expected_output="The complete blog post with every field filled in",
+            output_pydantic=BlogPost,  # ← Salida estructurada: se parsea directamente al modelo, sin reparar JSON
+            async_execution=async_execution  # ← Las variantes se escriben en paralelo
         )
     
     def create_qa_task(self, agent: Agent, writing_task: Task) -> Task:
@@ -705,36 +913,41 @@ class BlogAutomationCrew:
     
     def create_technical_task(self, agent: Agent, writing_task: Task, blog_file: str) -> Task:
         """
-        Tarea técnica: maneja Git commits y Slack notifications
+        Tarea técnica: maneja Git commits y Slack notifications (colección, repo y canal del sitio)
         """
+        collection = self.site.collection_name
+        channel = slack_channel_target(self.site.slack_channel)
         return Task(
             description=f"""Handle technical operations for blog post deployment:
                           
                           1. DEPLOY BLOG POST:
-                             - Deploy the generated JSON blog post '{blog_file}' to blog_posts.json collection
+                             - Deploy the generated JSON blog post (path at the end) to {collection} collection
                              - Add new post entry to the collection
                              - Remove individual JSON file after adding to collection (cleanup)
+                             - The cover image is generated automatically during deployment
                              - Ensure proper JSON formatting
                           
                           2. GIT OPERATIONS:
-                             - Add only blog_posts.json to git (not individual files)
+                             - Add only {collection} to git (not individual files; cover images are added automatically)
                              - Create commit with "[blog-bot]" prefix + descriptive message
                              - Push changes to repository
                           
                           3. SLACK NOTIFICATION:
-                             - Send success notification to Slack channel using ID: C096JQVRXPG
+                             - Send success notification to Slack channel: {channel}
                           
-                          CRITICAL: Use the exact file path '{blog_file}' for deployment. Only commit blog_posts.json.
+                          CRITICAL: Use the exact file path '{blog_file}' for deployment. Only commit {collection}.
                           If any operation fails, report the error and stop execution.""",
             agent=agent,
             context=[writing_task],
             expected_output="Confirmation that blog post has been successfully deployed and notifications sent"
         )
     
-    def validate_blog_post_strict(self, blog_content: str, qa_result: str) -> Dict[str, Any]:
+    def validate_blog_post_strict(self, post, qa_result: str) -> Dict[str, Any]:
         """
         Validaciones CRÍTICAS que deben pasar 100% para proceder con commit
         
+        post: Post ya parseado (flujo normal) o texto JSON (se parsea una sola vez aquí)
+        
         Returns:
         - {"valid": True} si todo perfecto
         - {"valid": False, "errors": [...]} si hay problemas
@@ -742,125 +955,99 @@ class BlogAutomationCrew:
         errors = []
         
         try:
-            # Debug the problematic character
-            if len(blog_content) > 688:
-                char_at_688 = blog_content[688]
-                print(f"🔍 Debug - Character at position 688: '{char_at_688}' (ord: {ord(char_at_688)})")
-                
-                # Show context around position 688
-                start = max(0, 688-20)
-                end = min(len(blog_content), 688+20)
-                context = blog_content[start:end]
-                print(f"🔍 Debug - Context around 688: {repr(context)}")
-            
-            # More aggressive cleaning
-            import re
-            # Remove ALL control characters except \n, \r, \t
-            cleaned_content = ''.join(char for char in blog_content if ord(char) >= 32 or char in '\n\r\t')
-            print(f"🔍 Validation debug - JSON cleaned, original length: {len(blog_content)}, cleaned: {len(cleaned_content)}")
-            
-            # Parse JSON
-            blog_data = json.loads(cleaned_content)
+            if not isinstance(post, Post):
+                post = Post.from_json(post)
             
             # VALIDACIÓN 1: Campos obligatorios
             required_fields = ["label", "title", "date", "author", "readTime", "summary", "coverImage", "slug", "content"]
             for field in required_fields:
-                if field not in blog_data or not blog_data[field]:
+                if not getattr(post, field):
                     errors.append(f"❌ Campo obligatorio faltante o vacío: {field}")
             
             if errors:  # Si ya hay errores, no continuar
                 return {"valid": False, "errors": errors}
             
             # VALIDACIÓN 2: CoverImage DEBE coincidir exactamente con slug
-            expected_cover = f"/images/blog/{blog_data['slug']}.jpeg"
-            if blog_data["coverImage"] != expected_cover:
-                errors.append(f"❌ CRÍTICO: coverImage '{blog_data['coverImage']}' NO coincide con slug esperado '{expected_cover}'")
+            expected_cover = f"/images/blog/{post.slug}.jpeg"
+            if post.coverImage != expected_cover:
+                errors.append(f"❌ CRÍTICO: coverImage '{post.coverImage}' NO coincide con slug esperado '{expected_cover}'")
             
             # VALIDACIÓN 3: Formato fecha DD/MM/YYYY
             date_pattern = r"^\d{2}/\d{2}/\d{4}$"
-            if not re.match(date_pattern, blog_data["date"]):
-                errors.append(f"❌ CRÍTICO: Fecha '{blog_data['date']}' no está en formato DD/MM/YYYY")
+            if not re.match(date_pattern, post.date):
+                errors.append(f"❌ CRÍTICO: Fecha '{post.date}' no está en formato DD/MM/YYYY")
             
             # VALIDACIÓN 4: ReadTime debe incluir "MIN"
-            if "MIN" not in blog_data["readTime"]:
-                errors.append(f"❌ CRÍTICO: readTime '{blog_data['readTime']}' debe incluir 'MIN'")
+            if "MIN" not in post.readTime:
+                errors.append(f"❌ CRÍTICO: readTime '{post.readTime}' debe incluir 'MIN'")
             
             # VALIDACIÓN 5: Slug URL-friendly
             slug_pattern = r"^[a-z0-9-]+$"
-            if not re.match(slug_pattern, blog_data["slug"]):
-                errors.append(f"❌ CRÍTICO: Slug '{blog_data['slug']}' no es URL-friendly (solo a-z, 0-9, -)")
+            if not re.match(slug_pattern, post.slug):
+                errors.append(f"❌ CRÍTICO: Slug '{post.slug}' no es URL-friendly (solo a-z, 0-9, -)")
             
         except json.JSONDecodeError as e:
             errors.append(f"❌ CRÍTICO: JSON inválido - {str(e)}")
         except Exception as e:
             errors.append(f"❌ CRÍTICO: Error de validación - {str(e)}")
         
-        result = {"valid": len(errors) == 0, "errors": errors}
-        
-        # Include cleaned content if successful and different from original
-        if result["valid"] and 'cleaned_content' in locals() and cleaned_content != blog_content:
-            result["cleaned_content"] = cleaned_content
-            
-        return result
+        return {"valid": len(errors) == 0, "errors": errors}
 
     def list_slack_channels(self):
         """Lista todos los canales accesibles para el bot"""
         try:
-            from slack_sdk import WebClient
-            
             slack_token = os.getenv("SLACK_BOT_TOKEN")
             if not slack_token:
-                print("❌ SLACK_BOT_TOKEN no configurado")
+                log.error("❌ SLACK_BOT_TOKEN no configurado")
                 return []
                 
-            client = WebClient(token=slack_token)
+            client = get_slack_client(slack_token)
             
-            print("🔍 Listando canales accesibles para el bot...")
+            log.info("🔍 Listando canales accesibles para el bot...")
             
             # Listar canales públicos
-            public_channels = client.conversations_list(types="public_channel")
-            print("📢 Canales públicos:")
+            public_channels = call_slack_api(client.conversations_list, types="public_channel")
+            log.info("📢 Canales públicos:")
             for channel in public_channels["channels"]:
                 is_member = channel.get("is_member", False)
-                print(f"  - #{channel['name']} (ID: {channel['id']}, member: {is_member})")
+                log.info("  - #%s (ID: %s, member: %s)", channel["name"], channel["id"], is_member)
             
             # Listar canales privados donde el bot es miembro
-            private_channels = client.conversations_list(types="private_channel")
-            print("🔒 Canales privados donde soy miembro:")
+            private_channels = call_slack_api(client.conversations_list, types="private_channel")
+            log.info("🔒 Canales privados donde soy miembro:")
             for channel in private_channels["channels"]:
-                print(f"  - #{channel['name']} (ID: {channel['id']})")
+                log.info("  - #%s (ID: %s)", channel["name"], channel["id"])
                 
             # Listar DMs
-            dms = client.conversations_list(types="im")
-            print(f"💬 Mensajes directos: {len(dms['channels'])} disponibles")
+            dms = call_slack_api(client.conversations_list, types="im")
+            log.info("💬 Mensajes directos: %s disponibles", len(dms["channels"]))
             
             return public_channels["channels"] + private_channels["channels"]
             
         except Exception as e:
-            print(f"❌ Error listando canales Slack: {e}")
+            log.error("❌ Error listando canales Slack: %s", e)
             return []
 
     def send_slack_error(self, errors: list):
         """Envía errores críticos a Slack"""
         try:
-            from slack_sdk import WebClient
-            
             slack_token = os.getenv("SLACK_BOT_TOKEN")
-            channel = os.getenv("SLACK_CHANNEL", "blog-posts")
+            channel = self.site.slack_channel
             # Añadir # si no está presente
             if channel and not channel.startswith('#'):
                 channel = f"#{channel}"
             
-            print(f"🔍 Debug Slack: token={slack_token[:10] if slack_token else 'None'}..., channel='{channel}'")
+            log.debug("Slack error report -> channel=%r (token configured: %s)", channel, bool(slack_token))
             
-            # Listar canales disponibles para debug
-            self.list_slack_channels()
+            # Listar canales disponibles solo en debug: son tres llamadas a la API por notificación
+            if log.isEnabledFor(logging.DEBUG):
+                self.list_slack_channels()
             
             if not slack_token:
-                print("❌ SLACK_BOT_TOKEN no configurado")
+                log.error("❌ SLACK_BOT_TOKEN no configurado")
                 return
             
-            client = WebClient(token=slack_token)
+            client = get_slack_client(slack_token)
             
             error_message = "🚨 **BLOG POST RECHAZADO - ERRORES CRÍTICOS**\n\n"
             for i, error in enumerate(errors, 1):
@@ -868,60 +1055,237 @@ class BlogAutomationCrew:
             
             error_message += "\n❌ **NO SE REALIZÓ COMMIT** - Corrige los errores y vuelve a ejecutar"
             
-            client.chat_postMessage(
+            call_slack_api(
+                client.chat_postMessage,
+                idempotent=False,
                 channel=channel,
                 text=error_message,
                 username="Blog Automation"
             )
-            print(f"✅ Error reportado en Slack canal {channel}")
+            log.info("✅ Error reportado en Slack canal %s", channel)
             
         except Exception as e:
-            print(f"❌ Error enviando a Slack: {e}")
+            log.error("❌ Error enviando a Slack: %s", e)
 
     def send_slack_success(self, blog_data: dict, latest_file: str):
         """Envía notificación de éxito a Slack"""
         try:
-            from slack_sdk import WebClient
-            
             slack_token = os.getenv("SLACK_BOT_TOKEN")
-            channel = os.getenv("SLACK_CHANNEL", "blog-posts")
+            channel = self.site.slack_channel
             # Añadir # si no está presente
             if channel and not channel.startswith('#'):
                 channel = f"#{channel}"
             
-            print(f"🔍 Debug Slack Success: token={slack_token[:10] if slack_token else 'None'}..., channel='{channel}'")
+            log.debug("Slack success report -> channel=%r (token configured: %s)", channel, bool(slack_token))
             
-            # Listar canales disponibles para debug
-            self.list_slack_channels()
+            # Listar canales disponibles solo en debug: son tres llamadas a la API por notificación
+            if log.isEnabledFor(logging.DEBUG):
+                self.list_slack_channels()
             
             if not slack_token:
-                print("❌ SLACK_BOT_TOKEN no configurado")
+                log.error("❌ SLACK_BOT_TOKEN no configurado")
                 return
             
-            client = WebClient(token=slack_token)
+            client = get_slack_client(slack_token)
             
             success_message = f"""🎉 NUEVO BLOG POST PUBLICADO - {blog_data.get('date', 'N/A')}
 📰 Título: {blog_data.get('title', 'Sin título')}
-🔗 Link: wrappers.es/blog/{blog_data.get('slug', 'sin-slug')}
+🔗 Link: {self.site.post_link(blog_data.get('slug', 'sin-slug'))}
 📝 Resumen: {blog_data.get('summary', 'Sin resumen')}"""
             
-            client.chat_postMessage(
+            call_slack_api(
+                client.chat_postMessage,
+                idempotent=False,
                 channel=channel,
                 text=success_message,
                 username="Blog Automation"
             )
-            print(f"✅ Notificación de éxito enviada a Slack canal {channel}")
+            log.info("✅ Notificación de éxito enviada a Slack canal %s", channel)
             
         except Exception as e:
-            print(f"❌ Error enviando notificación de éxito a Slack: {e}")
+            log.error("❌ Error enviando notificación de éxito a Slack: %s", e)
 
-    def run_automation(self) -> Dict[str, Any]:
+    def _timeout_result(self, deadlines: RunDeadlines, checkpoint: RunCheckpoint) -> Dict[str, Any]:
+        """
+        Resultado estructurado cuando expira un deadline o se agota el presupuesto;
+        las salidas parciales quedan en el checkpoint y la siguiente ejecución las reanuda
+        """
+        exceeded = deadlines.exceeded
+        checkpoint.mark("timeout", stage=exceeded.stage)
+        if isinstance(exceeded, BudgetExceeded):
+            scope = "de la ejecución" if exceeded.scope == "run" else "diario"
+            error_msg = (f"Presupuesto {scope} agotado en la etapa '{exceeded.stage}' "
+                         f"({exceeded.spent:g} >= {exceeded.limit:g} {exceeded.unit})")
+            log.error("💸 %s", error_msg, extra={"fields": {"stage": exceeded.stage, "scope": exceeded.scope}})
+            self.send_slack_error([error_msg])
+            return {
+                "status": "budget_exceeded",
+                "message": error_msg,
+                "stage": exceeded.stage,
+                "scope": exceeded.scope,
+                "partial_outputs": checkpoint.outputs(),
+                "checkpoint": checkpoint.path,
+                "stage_timings": deadlines.report()
+            }
+        error_msg = f"Deadline excedido en la etapa '{exceeded.stage}' ({exceeded.elapsed:.0f}s > {exceeded.limit:.0f}s)"
+        log.error("⏱️ %s", error_msg, extra={"fields": {"stage": exceeded.stage}})
+        self.send_slack_error([error_msg])
+        return {
+            "status": "timeout",
+            "message": error_msg,
+            "stage": exceeded.stage,
+            "elapsed_s": round(exceeded.elapsed, 2),
+            "deadline_s": exceeded.limit,
+            "partial_outputs": checkpoint.outputs(),
+            "checkpoint": checkpoint.path,
+            "stage_timings": deadlines.report()
+        }
+    
+    def _resume_research(self, checkpoint: RunCheckpoint, research_task: Task, research_agent: Agent,
+                         research: str = None) -> bool:
+        """
+        Reutiliza un research ya hecho en vez de repetirlo: el indicado (p. ej. el ganador del
+        research especulativo) o el de la ejecución anterior si expiró después del research
+        """
+        resumed_research = None if research else checkpoint.resumable_output("research")
+        if resumed_research:
+            log.info("♻️ Reutilizando el research de la ejecución anterior interrumpida")
+            research_task.output = TaskOutput(description=research_task.description, raw=resumed_research, agent=research_agent.role)
+        else:
+            checkpoint.clear()
+        if research:
+            research_task.output = TaskOutput(description=research_task.description, raw=research, agent=research_agent.role)
+            checkpoint.save_stage("research", research)  # si expira la escritura, la siguiente ejecución lo reanuda
+        checkpoint.mark("in_progress")
+        return bool(resumed_research or research)
+    
+    def _prepare_memory(self, llm):
+        """Memoria acotada: se poda y compacta antes de cada ejecución"""
+        memory = create_bounded_memory(llm=llm)
+        try:
+            retention = enforce_memory_retention(memory._storage, self.memory_policy, memory_path())
+            log.info("🧠 Memoria: %s entradas, %s KB (%s expiradas, %s desalojadas)", retention["entries_after"],
+                     retention["bytes_after"] // 1024, retention["expired"], retention["evicted_entries"])
+        except Exception as e:
+            retention = {"error": str(e)}
+            log.warning("⚠️ Could not enforce memory retention: %s", e)
+        return memory, retention
+    
+    def _publish_post(self, post: Post, blog_file: str, writing_task: Task, content_result, deadlines: RunDeadlines,
+                      checkpoint: RunCheckpoint) -> Dict[str, Any]:
+        """
+        Valida un post ya parseado y, SOLO si pasa las validaciones críticas, lo despliega
+        
+        El post pasa en memoria por validación, deploy (ver stage_post) y notificación;
+        solo se escribe en disco en blog_posts.json, o como archivo de debug si algo falla
+        
+        Returns:
+        - {"status": "success", "file", "deploy_result"} si se publicó
+        - {"status": "error" | "timeout", "message", ...} si no
+        """
+        # VALIDACIÓN CRÍTICA
+        validation = self.validate_blog_post_strict(post, str(content_result))
+        
+        if not validation["valid"]:
+            log.error("🚨 VALIDACIÓN FALLÓ - %s errores críticos:\n  %s", len(validation["errors"]),
+                      LazyJoin(validation["errors"], "\n  "), extra={"fields": {"errors": validation["errors"]}})
+            
+            # SAVE FILE FOR DEBUGGING
+            debug_file = save_post(post, f"DEBUG_{blog_file}")
+            log.info("🔍 Archivo guardado para debug: %s", debug_file)
+            
+            # Enviar errores a Slack pero NO eliminar archivo
+            self.send_slack_error(validation["errors"])
+            return {
+                "status": "error", 
+                "message": "Blog post rechazado por errores críticos - archivo preservado para debug",
+                "errors": validation["errors"],
+                "debug_file": debug_file
+            }
+        
+        log.info("✅ TODAS LAS VALIDACIONES PASARON - Procediendo con commit...")
+        
+        # Solo ahora crear y usar technical agent
+        technical_agent = self.create_technical_agent()
+        technical_task = self.create_technical_task(technical_agent, writing_task, blog_file)
+        
+        crew_deploy = Crew(
+            agents=[technical_agent],
+            tasks=[technical_task],
+            verbose=crew_verbose()
+        )
+        
+        deadlines.register_task(technical_task, "deploy")
+        # La herramienta de deploy recoge el post en memoria en vez de leer y parsear el archivo
+        stage_post(blog_file, post, self.site.collection)
+        # Un deploy a la vez por proceso, salvo con group commit (la colección y git tienen sus propios locks)
+        with nullcontext() if group_commit_enabled() else path_lock(_publish_locks, self.site.collection):
+            finished, deploy_result = run_with_deadline(crew_deploy.kickoff, deadlines)
+            # Tras el timeout la herramienta ya no recoge el post (ver run_cancelled); si lo recogió antes,
+            # su deploy sigue en curso: esperar al hilo sin soltar el lock para no solaparlo con el siguiente
+            unclaimed = None if finished else take_staged_post(blog_file, self.site.collection)
+            if not finished and unclaimed is None and deadlines.worker is not None:
+                deadlines.worker.join(deadlines.stage_limits["deploy"])
+        if not finished:
+            if unclaimed is not None:
+                save_post(unclaimed, blog_file)  # no llegó a desplegarse: conservarlo en disco
+            else:
+                log.warning("⚠️ El deploy de %s empezó antes del deadline: el post está en la colección sin commit",
+                            blog_file, extra={"fields": {"file": blog_file}})
+            return self._timeout_result(deadlines, checkpoint)
+        
+        # Verificar si deployment fue exitoso
+        if "deployment process was unsuccessful" in str(deploy_result).lower() or "error" in str(deploy_result).lower():
+            error_msg = f"Deployment falló: {deploy_result}"
+            log.error("❌ %s", error_msg)
+            if take_staged_post(blog_file, self.site.collection):
+                save_post(post, blog_file)  # preservar el post para reintentar el deploy a mano
+            self.send_slack_error([error_msg])
+            return {
+                "status": "error",
+                "message": "Blog post validado pero deployment falló",
+                "deploy_result": deploy_result,
+                "file": blog_file
+            }
+        
+        # Enviar notificación de éxito a Slack
+        self.send_slack_success(post.to_dict(), blog_file)
+        
+        return {"status": "success", "file": blog_file, "deploy_result": deploy_result}
+    
+    def _reprompt_writing(self, writing_task: Task, aborted: StreamAborted, deadlines: RunDeadlines):
+        """Nuevas tareas de escritura y QA tras un borrador abortado; la violación se añade a las instrucciones"""
+        writer_agent = self.create_writer_agent()
+        retry_task = Task(
+            description=f"""{writing_task.description}
+                           
+                           A PREVIOUS DRAFT WAS REJECTED WHILE BEING WRITTEN: {aborted.violation}
+                           Fix this and follow every requirement above exactly.""",
+            agent=writer_agent,
+            context=writing_task.context,
+            expected_output=writing_task.expected_output,
+            output_pydantic=BlogPost
+        )
+        qa_task = self.create_qa_task(self.create_qa_agent(), retry_task)
+        deadlines.register_task(retry_task, "writing")
+        deadlines.register_task(qa_task, "qa")
+        return retry_task, qa_task
+    
+    @logged_run
+    @metered_run
+    def run_automation(self, angle: str = None, writing_options: Dict[str, Any] = None,
+                       run_id: str = None, research: str = None) -> Dict[str, Any]:
         """
         Ejecuta el flujo completo de automatización CON VALIDACIONES CRÍTICAS
         
+        angle y writing_options (label, author, read_time, word_range, date) permiten encargar un post
+        concreto; run_id aísla el checkpoint y el archivo generado para ejecuciones concurrentes;
+        research (ya hecho, ver run_speculative) salta la etapa de research
+        
         ¿Cómo funciona el flujo?
         1. Research Agent busca temas trending (CON ACCESO A INTERNET)
         2. Writer Agent crea el post usando esa investigación (CON ACCESO A INTERNET para verificar datos)
+           - En streaming: si el borrador viola el formato se aborta y se vuelve a pedir (STREAM_MAX_REPROMPTS)
         3. QA Agent valida formato y calidad
         4. **VALIDACIONES CRÍTICAS** - Si falla, NO procede
         5. Technical Agent maneja commit y deployment SOLO si validaciones pasan
@@ -933,155 +1297,461 @@ class BlogAutomationCrew:
         qa_agent = self.create_qa_agent()
         
         # Crear las tareas en secuencia
-        research_task = self.create_research_task(research_agent)
-        writing_task = self.create_writing_task(writer_agent, research_task)
+        output_file = f"{run_id}.json" if run_id else None
+        writing_options = {"date": datetime.now().strftime("%d/%m/%Y"), **(writing_options or {})}
+        research_task = self.create_research_task(research_agent, angle)
+        writing_task = self.create_writing_task(writer_agent, research_task, **writing_options)
         qa_task = self.create_qa_task(qa_agent, writing_task)
         
+        # Deadlines por etapa + checkpoint de salidas parciales
+        checkpoint = RunCheckpoint(self.site.checkpoint_dir, f"{run_id}.json" if run_id else CHECKPOINT_FILE)
+        deadlines = RunDeadlines(checkpoint=checkpoint, usage=current_usage())
+        deadlines.register_task(research_task, "research")
+        deadlines.register_task(writing_task, "writing")
+        deadlines.register_task(qa_task, "qa")
+        
+        content_agents = [research_agent, writer_agent, qa_agent]
+        content_tasks = [research_task, writing_task, qa_task]
+        if self._resume_research(checkpoint, research_task, research_agent, research):
+            content_agents, content_tasks = content_agents[1:], content_tasks[1:]
+        
+        memory, retention = self._prepare_memory(research_agent.llm)
+        
         # Crear y ejecutar el crew SIN technical task (validamos primero)
         crew_content = Crew(
-            agents=[research_agent, writer_agent, qa_agent],
-            tasks=[research_task, writing_task, qa_task],
-            verbose=True,
-            memory=True,  # Los agentes recuerdan contexto entre ejecuciones
-            max_rpm=10    # Control de rate limiting para APIs
+            agents=content_agents,
+            tasks=content_tasks,
+            verbose=crew_verbose(),
+            memory=memory  # Los agentes recuerdan contexto entre ejecuciones (con retención acotada)
+            # Rate limiting: lo aplica el limiter compartido 'llm' (ver install_llm_rate_limiting)
         )
         
+        # Campos que el código ya ha decidido: el validador incremental los exige tal cual
+        stream_expected = {
+            "label": writing_options.get("label", self.site.label),
+            "date": writing_options["date"],
+            "author": writing_options.get("author"),
+            "readTime": writing_options.get("read_time"),
+        }
+        aborted_drafts = []
+        
         # Ejecutar el flujo
         try:
-            print("🚀 Iniciando automatización de blog post...")
-            content_result = crew_content.kickoff()
-            
-            print("\n🔍 EJECUTANDO VALIDACIONES CRÍTICAS...")
-            
-            # Leer el archivo generado para validación
-            # Encontrar el archivo JSON generado más reciente
-            json_files = [f for f in os.listdir('.') if f.endswith('.json')]
-            # Filtrar archivos de configuración comunes Y blog_posts.json (colección)
-            json_files = [f for f in json_files if not f.startswith('.') and 'package' not in f.lower() and f != 'blog_posts.json']
-            
-            if not json_files:
-                print("🔍 Debug: Archivos en directorio:", os.listdir('.'))
-                print("🔍 Debug: Archivos JSON encontrados antes de filtrar:", [f for f in os.listdir('.') if f.endswith('.json')])
-                self.send_slack_error(["❌ No se encontró archivo JSON generado (excluyendo blog_posts.json)"])
-                return {"status": "error", "message": "No se encontró archivo JSON generado"}
-            
-            latest_file = max(json_files, key=os.path.getctime)
+            log.info("🚀 Iniciando automatización de blog post...", extra={"fields": {"angle": angle}})
+            while True:
+                watched_task = writing_task
+                stream_validators.watch(watched_task, stream_expected)
+                try:
+                    finished, content_result = run_with_deadline(crew_content.kickoff, deadlines)
+                    break
+                except StreamAborted as aborted:
+                    aborted_drafts.append(aborted.report())
+                    log.warning("✋ Borrador abortado tras %s caracteres: %s", aborted.chars_streamed, aborted.violation)
+                    if len(aborted_drafts) > self.stream_max_reprompts:
+                        error_msg = f"El writer produjo {len(aborted_drafts)} borradores inválidos: {aborted.violation}"
+                        self.send_slack_error([error_msg])
+                        return {"status": "error", "message": error_msg, "stream_validation": aborted_drafts}
+                    # El research ya está hecho: solo se repiten escritura y QA, con la violación como corrección
+                    writing_task, qa_task = self._reprompt_writing(writing_task, aborted, deadlines)
+                    crew_content = Crew(agents=[writing_task.agent, qa_task.agent], tasks=[writing_task, qa_task],
+                                        verbose=crew_verbose(), memory=memory)
+                finally:
+                    stream_validators.unwatch(watched_task)
+            if not finished:
+                return self._timeout_result(deadlines, checkpoint)
+            
+            compaction = compaction_report(research_task)
+            if compaction:
+                log.info("🗜️ Contexto research -> writer: %s -> %s tokens", compaction["tokens_before"],
+                         compaction["tokens_after"])
+            
+            log.info("🔍 EJECUTANDO VALIDACIONES CRÍTICAS...")
+            
+            # El writer devuelve un BlogPost ya parseado: se convierte una vez en Post y no se relee de disco
+            if not (writing_task.output and writing_task.output.pydantic):
+                self.send_slack_error(["❌ El writer no devolvió un BlogPost estructurado"])
+                return {"status": "error", "message": "El writer no devolvió un BlogPost estructurado"}
+            post = Post.from_model(writing_task.output.pydantic)
+            blog_file = output_file or post_filename(post)
+            
+            published = self._publish_post(post, blog_file, writing_task, content_result, deadlines, checkpoint)
+            if published["status"] == "timeout":
+                return published
+            if published["status"] != "success":
+                if "deploy_result" in published:
+                    published.update({"content_result": content_result, "context_compaction": compaction})
+                return published
+            
+            log.info("✅ Blog post creado y deployado exitosamente!")
+            checkpoint.clear()
             
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                blog_content = f.read()
+            return {
+                "status": "success",
+                "message": "Blog post validado, creado y deployeado correctamente",
+                "content_result": content_result,
+                "deploy_result": published["deploy_result"],
+                "file": blog_file,
+                "context_compaction": compaction,
+                "rate_limits": rate_limiter_metrics(),
+                "outbound_calls": resilience_metrics(),
+                "stage_timings": deadlines.report(),
+                "memory": {"retention": retention, "retrieval_by_task": memory_latency.snapshot(current_run_id())},
+                "stream_validation": aborted_drafts,
+                "agent_latency": agent_latency_report()
+            }
             
-            # VALIDACIÓN CRÍTICA
-            validation = self.validate_blog_post_strict(blog_content, str(content_result))
+        except Exception as e:
+            error_msg = f"Error en automatización: {str(e)}"
+            log.exception("❌ %s", error_msg)
+            self.send_slack_error([error_msg])
+            return {"status": "error", "message": error_msg}
+    
+    @logged_run
+    @metered_run
+    def run_speculative(self, angles: List[str] = None, max_angles: int = None,
+                        writing_options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Research especulativo: investiga varios ángulos en paralelo con presupuesto acotado
+        (max_angles researchers, SPECULATIVE_MAX_ITER iteraciones cada uno y el deadline de research),
+        los puntúa por especificidad y novedad frente a los posts publicados y escribe con el ganador
+        
+        El research de los perdedores se guarda (ver ResearchCache) y compite gratis en ejecuciones futuras
+        """
+        max_angles = max(1, int(max_angles or DEFAULT_ANGLES))
+        cache = ResearchCache(self.site.research_cache)
+        candidates = cache.fresh()  # ángulo -> research (de ejecuciones anteriores)
+        angles = list(angles or random.sample(self.site.angles, min(max_angles, len(self.site.angles))))
+        pending = [angle for angle in angles if angle not in candidates][:max_angles]
+        
+        deadlines = RunDeadlines(usage=current_usage())
+        # Todos los researchers comparten el presupuesto de una sola etapa de research
+        deadlines.total_limit = deadlines.stage_limits["research"]
+        research_tasks = {}
+        for angle in pending:
+            agent = self.create_research_agent()
+            agent.max_iter = int(os.getenv("SPECULATIVE_MAX_ITER", DEFAULT_MAX_ITER))
+            research_tasks[angle] = self.create_research_task(agent, angle)
+            deadlines.register_task(research_tasks[angle], "research")
+        
+        def research_angles():
+            futures = [task.execute_async(agent=task.agent) for task in research_tasks.values()]
+            for future in futures:
+                future.exception()  # un ángulo fallido no tumba a los demás
+        
+        log.info("🚀 Research especulativo: %s ángulos en paralelo + %s reutilizados de ejecuciones anteriores...",
+                 len(pending), len(candidates))
+        if research_tasks:
+            finished, _ = run_with_deadline(research_angles, deadlines)
+            if not finished:
+                log.warning("⏱️ Presupuesto de research agotado: compiten solo los ángulos terminados")
+        new_research = {angle: task.output.raw for angle, task in research_tasks.items() if task.output and task.output.raw}
+        candidates.update(new_research)
+        
+        if not candidates:
+            error_msg = f"Ninguno de los {len(pending)} ángulos terminó su research a tiempo"
+            self.send_slack_error([f"❌ {error_msg}"])
+            return {"status": "error", "message": error_msg, "stage_timings": deadlines.report()}
+        
+        # Ranking sin LLM: especificidad + novedad frente al archivo publicado
+        index = load_or_build_index(self.site.search_index, self.site.collection)
+        ranking = []
+        for angle, research in candidates.items():
+            score = score_research(research, index.similar({"content": research}, limit=1))
+            score.update({"angle": angle, "cached": angle not in new_research})
+            log.info("  • %.3f (especificidad %.2f, novedad %.2f)%s: %.70s", score["score"], score["specificity"],
+                     score["novelty"], " [caché]" if score["cached"] else "", angle)
+            ranking.append(score)
+        ranking.sort(key=lambda item: item["score"], reverse=True)
+        winner = ranking[0]["angle"]
+        log.info("🏆 Ángulo elegido: %.70s", winner)
+        
+        # Los perdedores nuevos quedan en caché; el ganador (si venía de caché) se consume
+        losers = {angle: research for angle, research in new_research.items() if angle != winner}
+        try:
+            cache.update(losers, consume=[winner])
+        except OSError as e:
+            log.warning("⚠️ Could not update research cache: %s", e)
+        
+        result = self.run_automation(angle=winner, writing_options=writing_options, research=candidates[winner])
+        result["speculative_research"] = {
+            "winner": winner,
+            "candidates": ranking,
+            "cached_losers": len(losers),
+            "research_timings": deadlines.report(),
+        }
+        return result
+    
+    @logged_run
+    @metered_run
+    def run_best_of(self, drafts: int = DEFAULT_DRAFTS, angle: str = None,
+                    writing_options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Best-of-N: un research, N borradores del writer en paralelo con los mismos parámetros
+        
+        Cada borrador se puntúa con métricas deterministas (ver draft_scoring): validación estricta,
+        longitud, encabezados, mención de Wrappers.es y parecido con los posts publicados.
+        Solo el mejor pasa por QA y deploy, en vez de repetir la ejecución completa si uno falla.
+        """
+        drafts = max(1, int(drafts))
+        writing_options = dict(writing_options or {})
+        writing_options.setdefault("date", datetime.now().strftime("%d/%m/%Y"))
+        writing_options.setdefault("author", random.choice(self.site.authors))
+        writing_options.setdefault("read_time", random.choice(READ_TIMES))
+        
+        research_agent = self.create_research_agent()
+        qa_agent = self.create_qa_agent()
+        research_task = self.create_research_task(research_agent, angle)
+        
+        checkpoint = RunCheckpoint(self.site.checkpoint_dir)
+        deadlines = RunDeadlines(checkpoint=checkpoint, usage=current_usage())
+        deadlines.register_task(research_task, "research")
+        
+        # Un writer por borrador: los agentes de CrewAI no son seguros para ejecutar tareas concurrentes
+        draft_tasks = []
+        for _ in range(drafts):
+            task = self.create_writing_task(self.create_writer_agent(), research_task, **writing_options)
+            deadlines.register_task(task, "writing")
+            draft_tasks.append(task)
+        
+        memory, retention = self._prepare_memory(research_agent.llm)
+        
+        def write_drafts():
+            context = research_task.output.raw
+            futures = [task.execute_async(agent=task.agent, context=context) for task in draft_tasks]
+            for future in futures:
+                future.exception()  # un borrador fallido no tumba a los demás
+        
+        try:
+            log.info("🚀 Iniciando best-of-%s: 1 research -> %s borradores en paralelo...", drafts, drafts)
+            if not self._resume_research(checkpoint, research_task, research_agent):
+                crew_research = Crew(agents=[research_agent], tasks=[research_task], verbose=crew_verbose(), memory=memory)
+                finished, _ = run_with_deadline(crew_research.kickoff, deadlines)
+                if not finished:
+                    return self._timeout_result(deadlines, checkpoint)
+            
+            finished, _ = run_with_deadline(write_drafts, deadlines)
+            if not finished:
+                return self._timeout_result(deadlines, checkpoint)
+            
+            # Puntuar cada borrador (sin LLM) contra el archivo de posts publicados
+            index = load_or_build_index(self.site.search_index, self.site.collection)
+            candidates, scores = [], []
+            for i, task in enumerate(draft_tasks, 1):
+                if not (task.output and task.output.pydantic):
+                    log.warning("  ✗ Borrador %s: sin BlogPost estructurado", i)
+                    continue
+                post = Post.from_model(task.output.pydantic)
+                score = score_draft(post, self.validate_blog_post_strict(post, ""),
+                                    writing_options.get("word_range", "800-1200"),
+                                    index.similar(post.to_dict(), limit=1), brand=self.site.brand)
+                score["draft"] = i
+                log.info("  • Borrador %s: %.3f (%s, %s palabras, similitud %.2f)", i, score["score"],
+                         "válido" if score["valid"] else "inválido", score["words"], score["similarity"])
+                candidates.append((task, post))
+                scores.append(score)
+            
+            if not candidates:
+                error_msg = f"Ninguno de los {drafts} borradores devolvió un BlogPost estructurado"
+                self.send_slack_error([f"❌ {error_msg}"])
+                return {"status": "error", "message": error_msg}
+            
+            best = rank_drafts(scores)[0]
+            best_task, post = candidates[best]
+            log.info("🏆 Borrador elegido: %s de %s", scores[best]["draft"], drafts)
+            
+            # Solo el mejor borrador pasa por QA
+            qa_task = self.create_qa_task(qa_agent, best_task)
+            deadlines.register_task(qa_task, "qa")
+            crew_qa = Crew(agents=[qa_agent], tasks=[qa_task], verbose=crew_verbose(), memory=memory)
+            finished, qa_result = run_with_deadline(crew_qa.kickoff, deadlines)
+            if not finished:
+                return self._timeout_result(deadlines, checkpoint)
+            
+            log.info("🔍 EJECUTANDO VALIDACIONES CRÍTICAS...")
+            blog_file = post_filename(post)
+            published = self._publish_post(post, blog_file, best_task, qa_result, deadlines, checkpoint)
+            published.update({"drafts": scores, "selected_draft": scores[best]["draft"]})
+            if published["status"] != "success":
+                return published
+            
+            log.info("✅ Blog post creado y deployado exitosamente!")
+            checkpoint.clear()
             
-            # Si la validación pasó y el contenido fue limpiado, reescribir el archivo
-            if validation["valid"] and validation.get("cleaned_content"):
-                with open(latest_file, 'w', encoding='utf-8') as f:
-                    f.write(validation["cleaned_content"])
-                print(f"🔧 Archivo limpiado y reescrito: {latest_file}")
+            return {
+                "status": "success",
+                "message": f"Mejor de {drafts} borradores validado, creado y deployeado correctamente",
+                "content_result": qa_result,
+                "deploy_result": published["deploy_result"],
+                "file": blog_file,
+                "drafts": scores,
+                "selected_draft": scores[best]["draft"],
+                "context_compaction": compaction_report(research_task),
+                "rate_limits": rate_limiter_metrics(),
+                "outbound_calls": resilience_metrics(),
+                "stage_timings": deadlines.report(),
+                "memory": {"retention": retention, "retrieval_by_task": memory_latency.snapshot(current_run_id())},
+                "agent_latency": agent_latency_report()
+            }
             
-            if not validation["valid"]:
-                print(f"\n🚨 VALIDACIÓN FALLÓ - {len(validation['errors'])} errores críticos:")
-                for error in validation["errors"]:
-                    print(f"  {error}")
-                
-                # SAVE FILE FOR DEBUGGING instead of deleting
-                debug_file = f"DEBUG_{latest_file}"
-                import shutil
-                shutil.move(latest_file, debug_file)
-                print(f"🔍 Archivo renombrado para debug: {debug_file}")
-                
-                # If it's a JSON control character issue, try manual fix
-                if any("control character" in error for error in validation["errors"]):
-                    print(f"🔧 Intentando reparación manual del JSON...")
-                    try:
-                        with open(latest_file, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # VERY aggressive cleaning - keep only printable + newlines
-                        import string
-                        cleaned = ''.join(char for char in content if char in string.printable)
-                        
-                        with open(latest_file, 'w', encoding='utf-8') as f:
-                            f.write(cleaned)
-                            
-                        print(f"🔧 Archivo reparado, reintentando validación...")
-                        validation_retry = self.validate_blog_post_strict(cleaned, str(content_result))
-                        
-                        if validation_retry["valid"]:
-                            print(f"✅ Reparación exitosa!")
-                            validation = validation_retry  # Use the successful validation
-                        else:
-                            print(f"❌ Reparación falló: {validation_retry['errors']}")
-                            # Don't delete, keep for manual inspection
-                            self.send_slack_error(validation["errors"])
-                            return {
-                                "status": "error", 
-                                "message": "Blog post rechazado por errores críticos - archivo preservado para debug",
-                                "errors": validation["errors"],
-                                "debug_file": debug_file
-                            }
-                    except Exception as e:
-                        print(f"❌ Error en reparación: {e}")
-                
-                if not validation.get("fixed", False):
-                    # Enviar errores a Slack pero NO eliminar archivo
-                    self.send_slack_error(validation["errors"])
-                    return {
-                        "status": "error", 
-                        "message": "Blog post rechazado por errores críticos - archivo preservado para debug",
-                        "errors": validation["errors"],
-                        "debug_file": debug_file
-                    }
-            
-            print("✅ TODAS LAS VALIDACIONES PASARON - Procediendo con commit...")
-            
-            # Solo ahora crear y usar technical agent
-            technical_agent = self.create_technical_agent()
-            technical_task = self.create_technical_task(technical_agent, writing_task, latest_file)
-            
-            crew_deploy = Crew(
-                agents=[technical_agent],
-                tasks=[technical_task],
-                verbose=True
+        except Exception as e:
+            error_msg = f"Error en automatización: {str(e)}"
+            log.exception("❌ %s", error_msg)
+            self.send_slack_error([error_msg])
+            return {"status": "error", "message": error_msg}
+    
+    @logged_run
+    @metered_run
+    def run_fanout(self, variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Research una vez, escritura N veces: un único research alimenta varias tareas de escritura
+        ejecutadas en paralelo, cada una con sus parámetros de create_writing_task
+        (label, author, read_time, word_range). Cada variante se valida y despliega por separado.
+        
+        variants: [{"name": "pymes", "label": "IA para tu PyME", "author": "...", ...}, ...]
+        """
+        variants = normalize_variants(variants)
+        
+        research_agent = self.create_research_agent()
+        qa_agent = self.create_qa_agent()
+        research_task = self.create_research_task(research_agent)
+        
+        checkpoint = RunCheckpoint(self.site.checkpoint_dir)
+        deadlines = RunDeadlines(checkpoint=checkpoint, usage=current_usage())
+        deadlines.register_task(research_task, "research")
+        
+        # Un writer por variante: los agentes de CrewAI no son seguros para ejecutar tareas concurrentes
+        writing_tasks, qa_tasks, writer_agents = {}, {}, []
+        for variant in variants:
+            writer_agent = self.create_writer_agent()
+            writer_agents.append(writer_agent)
+            writing_tasks[variant["name"]] = self.create_writing_task(
+                writer_agent, research_task,
+                label=variant.get("label"),
+                author=variant.get("author"),
+                read_time=variant.get("read_time"),
+                word_range=variant.get("word_range", "800-1200"),
+                async_execution=True
             )
+            deadlines.register_task(writing_tasks[variant["name"]], "writing")
+        for variant in variants:
+            qa_tasks[variant["name"]] = self.create_qa_task(qa_agent, writing_tasks[variant["name"]])
+            deadlines.register_task(qa_tasks[variant["name"]], "qa")
+        
+        content_agents = [research_agent] + writer_agents + [qa_agent]
+        content_tasks = [research_task] + list(writing_tasks.values()) + list(qa_tasks.values())
+        if self._resume_research(checkpoint, research_task, research_agent):
+            content_agents, content_tasks = content_agents[1:], content_tasks[1:]
+        
+        memory, retention = self._prepare_memory(research_agent.llm)
+        crew_content = Crew(agents=content_agents, tasks=content_tasks, verbose=crew_verbose(), memory=memory)
+        
+        try:
+            log.info("🚀 Iniciando fan-out: 1 research -> %s variantes...", len(variants))
+            finished, content_result = run_with_deadline(crew_content.kickoff, deadlines)
+            if not finished:
+                return self._timeout_result(deadlines, checkpoint)
             
-            deploy_result = crew_deploy.kickoff()
-            
-            # Verificar si deployment fue exitoso
-            if "deployment process was unsuccessful" in str(deploy_result).lower() or "error" in str(deploy_result).lower():
-                error_msg = f"Deployment falló: {deploy_result}"
-                print(f"❌ {error_msg}")
-                self.send_slack_error([error_msg])
-                return {
-                    "status": "error",
-                    "message": "Blog post validado pero deployment falló",
-                    "content_result": content_result,
-                    "deploy_result": deploy_result,
-                    "file": latest_file
-                }
-            
-            print("✅ Blog post creado y deployado exitosamente!")
+            compaction = compaction_report(research_task)
             
-            # Enviar notificación de éxito a Slack
-            blog_data = json.loads(blog_content)
-            self.send_slack_success(blog_data, latest_file)
+            # Portadas de todas las variantes en paralelo (pool de procesos): el deploy las copia de la caché
+            drafts = [task.output.pydantic for task in writing_tasks.values() if task.output and task.output.pydantic]
+            try:
+                prerender_covers([draft.model_dump() for draft in drafts], self.site.brand, self.site.cover_cache)
+            except Exception as e:
+                log.warning("⚠️ Could not prerender cover images: %s", e)
+            
+            # Validar y desplegar cada variante por separado (en serie: comparten blog_posts.json y el repo git)
+            results = {}
+            for variant in variants:
+                name = variant["name"]
+                log.info("🔍 EJECUTANDO VALIDACIONES CRÍTICAS - variante '%s'...", name)
+                output = writing_tasks[name].output
+                if not (output and output.pydantic):
+                    error_msg = f"❌ La variante '{name}' no devolvió un BlogPost estructurado"
+                    self.send_slack_error([error_msg])
+                    results[name] = {"status": "error", "message": error_msg}
+                    continue
+                qa_output = qa_tasks[name].output.raw if qa_tasks[name].output else content_result
+                results[name] = self._publish_post(Post.from_model(output.pydantic), variant["file"],
+                                                   writing_tasks[name], qa_output, deadlines, checkpoint)
+                if results[name]["status"] == "timeout":
+                    break
+            
+            published = [name for name, result in results.items() if result["status"] == "success"]
+            if len(published) == len(variants):
+                status = "success"
+                checkpoint.clear()
+            else:
+                status = "partial" if published else "error"
+            log.info("📦 Variantes publicadas: %s/%s", len(published), len(variants))
             
             return {
-                "status": "success",
-                "message": "Blog post validado, creado y deployeado correctamente",
-                "content_result": content_result,
-                "deploy_result": deploy_result,
-                "file": latest_file
+                "status": status,
+                "message": f"{len(published)}/{len(variants)} variantes publicadas a partir de un único research",
+                "variants": results,
+                "context_compaction": compaction,
+                "rate_limits": rate_limiter_metrics(),
+                "outbound_calls": resilience_metrics(),
+                "stage_timings": deadlines.report(),
+                "memory": {"retention": retention, "retrieval_by_task": memory_latency.snapshot(current_run_id())},
+                "agent_latency": agent_latency_report()
             }
             
         except Exception as e:
             error_msg = f"Error en automatización: {str(e)}"
-            print(f"❌ {error_msg}")
+            log.exception("❌ %s", error_msg)
             self.send_slack_error([error_msg])
             return {"status": "error", "message": error_msg}
 
+
+def post_filename(post: Post) -> str:
+    """Nombre del archivo individual del post: [slug].json (saneado por si el slug no es válido)"""
+    return (re.sub(r"[^a-z0-9-]+", "-", post.slug.lower()).strip("-") or "post") + ".json"
+
+
+def normalize_variants(variants: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Valida la lista de variantes y asigna a cada una su archivo de salida (variant-<name>.json)"""
+    if not variants:
+        raise ValueError("Se necesita al menos una variante")
+    normalized, seen = [], set()
+    for i, variant in enumerate(variants, 1):
+        variant = dict(variant)
+        variant["name"] = str(variant.get("name") or f"v{i}")
+        if not re.match(r"^[a-z0-9-]+$", variant["name"]) or variant["name"] in seen:
+            raise ValueError(f"Nombre de variante inválido o repetido: {variant['name']}")
+        seen.add(variant["name"])
+        variant["file"] = f"variant-{variant['name']}.json"
+        normalized.append(variant)
+    return normalized
+
+_site_crews: Dict[str, BlogAutomationCrew] = {}
+_site_crews_lock = threading.Lock()
+
+def get_site_crew(name: str = None) -> BlogAutomationCrew:
+    """
+    BlogAutomationCrew de un sitio, creado una vez por proceso. Lo propio del sitio vive en el crew;
+    sesiones HTTP, rate limiters, cachés de páginas y hooks LLM son globales y los comparten todos
+    """
+    site = get_site(name)
+    with _site_crews_lock:
+        if site.name not in _site_crews:
+            _site_crews[site.name] = BlogAutomationCrew(site=site)
+        return _site_crews[site.name]
+
 # Configuración para ejecutar como script
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Blog Automation System powered by CrewAI")
+    parser.add_argument("--variants", help="JSON con una lista de variantes: un research, varios posts")
+    parser.add_argument("--angles", type=int, default=int(os.getenv("SPECULATIVE_ANGLES", 1)),
+                        help="Ángulos de research en paralelo; se escribe solo con el más específico y novedoso")
+    parser.add_argument("--drafts", type=int, default=int(os.getenv("BEST_OF_DRAFTS", 1)),
+                        help="Borradores en paralelo del mismo research; solo el mejor se publica")
+    parser.add_argument("--site", default=os.getenv("SITE"),
+                        help="Sitio de sites.json en el que publicar (por defecto el primero)")
+    args = parser.parse_args()
+    
     print("🤖 Blog Automation System powered by CrewAI")
     print("=" * 50)
     
@@ -1095,8 +1765,16 @@ if __name__ == "__main__":
         exit(1)
     
     # Ejecutar automatización
-    automation = BlogAutomationCrew()
-    result = automation.run_automation()
+    automation = get_site_crew(args.site)
+    if args.variants:
+        with open(args.variants, 'r', encoding='utf-8') as f:
+            result = automation.run_fanout(json.load(f))
+    elif args.angles > 1:
+        result = automation.run_speculative(max_angles=args.angles)
+    elif args.drafts > 1:
+        result = automation.run_best_of(args.drafts)
+    else:
+        result = automation.run_automation()
     
     print("\n" + "=" * 50)
     print(f"📊 Resultado: {result['status']}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Modelo tipado del blog post (mismos campos que blog_template)
+El writer lo produce como salida estructurada y el archivo JSON lo serializa el código
+
+Post es la versión ligera (__slots__) que se parsea una vez y recorre validación, deploy y notificación
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from post_collection import COLLECTION_FILE
+
+
+class BlogPost(BaseModel):
+    """Un post del blog tal y como se guarda en blog_posts.json"""
+
+    label: str = Field(description='Categoría del post, p. ej. "IA para tu PyME"')
+    title: str = Field(description="Título en español con mayúsculas de frase (sentence case)")
+    date: str = Field(description="Fecha de publicación en formato DD/MM/YYYY")
+    author: str = Field(description="Autor del post")
+    readTime: str = Field(description='Tiempo de lectura, p. ej. "5 MIN"')
+    summary: str = Field(description="Resumen de 2-3 frases que engancha al lector")
+    coverImage: str = Field(description='Ruta exacta "/images/blog/<slug>.jpeg"')
+    slug: str = Field(description="Slug URL-friendly: solo a-z, 0-9 y guiones")
+    content: str = Field(description="Contenido completo del post en markdown")
+
+
+POST_FIELDS = tuple(BlogPost.model_fields)
+
+
+class Post:
+    """Post ya parseado: sin diccionario por instancia y sin volver a leer ni parsear el JSON"""
+
+    __slots__ = POST_FIELDS
+
+    def __init__(self, **fields):
+        for field in POST_FIELDS:
+            setattr(self, field, fields.get(field) or "")
+
+    @classmethod
+    def from_model(cls, model: BlogPost) -> "Post":
+        return cls(**model.model_dump())
+
+    @classmethod
+    def from_json(cls, text: str) -> "Post":
+        """Único punto de parseo para posts que llegan como texto (archivos antiguos, herramientas)"""
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("Blog post JSON must be an object")
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in POST_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Post(slug={self.slug!r}, title={self.title!r})"
+
+
+def save_post(post: Union[BlogPost, Post], filename: str) -> str:
+    """Serializa el post a disco (escritura atómica); el JSON siempre es válido por construcción"""
+    data = post.to_dict() if isinstance(post, Post) else post.model_dump()
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, filename)
+    return filename
+
+
+# Posts validados a la espera de que la herramienta de deploy los recoja (clave: colección del sitio y nombre
+# de archivo del post; dos sitios pueden publicar el mismo slug a la vez)
+_staged_posts: Dict[Tuple[str, str], Post] = {}
+_staged_lock = threading.Lock()
+
+
+def _staged_key(name: str, collection: str) -> Tuple[str, str]:
+    """El LLM puede pasar './slug.json', una ruta absoluta o con el directorio del sitio: cuenta solo el nombre"""
+    return os.path.abspath(collection), os.path.basename(os.path.normpath(name.strip()))
+
+
+def stage_post(name: str, post: Post, collection: str = COLLECTION_FILE) -> None:
+    with _staged_lock:
+        _staged_posts[_staged_key(name, collection)] = post
+
+
+def take_staged_post(name: str, collection: str = COLLECTION_FILE) -> Optional[Post]:
+    with _staged_lock:
+        return _staged_posts.pop(_staged_key(name, collection), None)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Compactación del contexto entre la tarea de research y la de escritura
+Deduplica fuentes, extrae hechos clave y limita el traspaso a un presupuesto de tokens
+"""
+
+import os
+import re
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+from structured_logging import get_logger
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken es opcional: sin él se estima ~4 caracteres por token
+    _ENCODING = None
+
+log = get_logger("context_compaction")
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 800
+MAX_SOURCES = 5
+
+# Similitud (Jaccard de palabras) a partir de la cual dos frases se consideran duplicadas
+DUPLICATE_THRESHOLD = 0.8
+
+_URL_RE = re.compile(r"https?://[^\s)\]>\"']+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Señales de "hecho concreto": cifras, precios, porcentajes, fechas, años
+_FACT_RE = re.compile(r"\d|[$€%]|\b(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)\b", re.IGNORECASE)
+
+
+def count_tokens(text: str) -> int:
+    """Cuenta tokens con tiktoken si está disponible, si no los estima"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def normalize_url(url: str) -> str:
+    """Normaliza una URL para deduplicar: sin esquema, www, query, fragmento ni barra final"""
+    parts = urlsplit(url.rstrip(".,;"))
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def extract_sources(text: str) -> List[str]:
+    """URLs únicas en orden de aparición"""
+    seen = set()
+    sources = []
+    for url in _URL_RE.findall(text):
+        url = url.rstrip(".,;")
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            sources.append(url)
+    return sources
+
+
+def _words(sentence: str) -> set:
+    return {word.lower() for word in _WORD_RE.findall(sentence)}
+
+
+def _is_duplicate(words: set, kept: List[set]) -> bool:
+    for other in kept:
+        union = words | other
+        if union and len(words & other) / len(union) >= DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def _score_sentence(sentence: str, position: int, topic_words: set) -> float:
+    """Puntuación heurística de 'hecho clave'"""
+    score = 0.0
+    score += 2.0 * min(3, len(_FACT_RE.findall(sentence)))
+    # Nombres propios (palabras en mayúscula que no abren la frase): herramientas, empresas
+    proper_nouns = sum(1 for word in sentence.split()[1:] if word[:1].isupper())
+    score += 1.0 * min(3, proper_nouns)
+    score += 0.5 * len(_words(sentence) & topic_words)
+    # Las primeras frases suelen contener el tema principal
+    score += max(0.0, 3.0 - position * 0.5)
+    return score
+
+
+def split_sentences(text: str) -> List[str]:
+    """Divide en frases limpias, descartando viñetas vacías y líneas de fuente"""
+    sentences = []
+    for chunk in _SENTENCE_SPLIT_RE.split(_URL_RE.sub("", text)):
+        chunk = chunk.strip(" \t-*•#>")
+        chunk = re.sub(r"^(?:Source|Fuente|Sources|Fuentes)\s*:\s*", "", chunk, flags=re.IGNORECASE)
+        if len(_WORD_RE.findall(chunk)) >= 3:
+            sentences.append(chunk)
+    return sentences
+
+
+def compact_context(text: str, token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET) -> Dict[str, Any]:
+    """
+    Compacta el texto de research dentro de un presupuesto de tokens
+
+    Returns:
+    - {"text": str, "tokens_before": int, "tokens_after": int,
+       "sources": int, "facts": int, "duplicates_removed": int}
+    """
+    tokens_before = count_tokens(text)
+    sources = extract_sources(text)[:MAX_SOURCES]
+
+    sentences = split_sentences(text)
+    kept_words: List[set] = []
+    unique: List[Tuple[int, str]] = []
+    for position, sentence in enumerate(sentences):
+        words = _words(sentence)
+        if _is_duplicate(words, kept_words):
+            continue
+        kept_words.append(words)
+        unique.append((position, sentence))
+
+    topic_words = _words(sentences[0]) if sentences else set()
+    ranked = sorted(unique, key=lambda item: _score_sentence(item[1], item[0], topic_words), reverse=True)
+
+    sources_block = ""
+    if sources:
+        sources_block = "\n\nFUENTES:\n" + "\n".join(f"- {url}" for url in sources)
+    remaining = token_budget - count_tokens("HECHOS CLAVE:\n") - count_tokens(sources_block)
+
+    selected = []
+    for position, sentence in ranked:
+        cost = count_tokens(f"- {sentence}\n")
+        if cost <= remaining:
+            selected.append((position, sentence))
+            remaining -= cost
+
+    # Mantener el orden original para que el texto siga siendo legible
+    selected.sort()
+    compacted = "HECHOS CLAVE:\n" + "\n".join(f"- {sentence}" for _, sentence in selected) + sources_block
+
+    # Si el texto original ya cabía y no había duplicados, no tocarlo
+    if tokens_before <= token_budget and len(unique) == len(sentences):
+        compacted = text
+
+    return {
+        "text": compacted,
+        "tokens_before": tokens_before,
+        "tokens_after": count_tokens(compacted),
+        "sources": len(sources),
+        "facts": len(selected),
+        "duplicates_removed": len(sentences) - len(unique),
+    }
+
+
+class ContextCompactor:
+    """
+    Guardrail de CrewAI para la tarea de research: sustituye su salida por la versión
+    compactada antes de que llegue como contexto a la tarea de escritura.
+    Uno por tarea: su informe es el de esa tarea aunque haya ejecuciones en paralelo
+    """
+
+    def __init__(self, token_budget: int = None):
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET))
+        self.last_report: Dict[str, Any] = {}
+
+    def __call__(self, task_output) -> Tuple[bool, Any]:
+        result = compact_context(task_output.raw or "", self.token_budget)
+        self.last_report = {key: value for key, value in result.items() if key != "text"}
+        self.last_report["token_budget"] = self.token_budget
+        log.info("🗜️ Contexto compactado: %s -> %s tokens (presupuesto %s, %s fuentes, %s duplicados eliminados)",
+                 result["tokens_before"], result["tokens_after"], self.token_budget, result["sources"],
+                 result["duplicates_removed"])
+        return True, result["text"]
+
+
+def compaction_report(task) -> Dict[str, Any]:
+    """Informe de compactación de una tarea de research (vacío si no se compactó, p. ej. research reanudado)"""
+    compactor = getattr(task.guardrail, "__self__", None)
+    return dict(compactor.last_report) if isinstance(compactor, ContextCompactor) else {}
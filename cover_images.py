@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Imágenes de portada generadas en el deploy: /images/blog/<slug>.jpeg y sus variantes
+
+- Plantilla con Pillow: degradado con los colores del label, label, título y marca del sitio
+- Tamaños responsive (COVER_WIDTHS) en JPEG y en WebP/AVIF (COVER_FORMATS, si el Pillow instalado
+  los soporta): <slug>.<fmt> a tamaño completo y <slug>-<ancho>w.<fmt> para srcset
+- Sin metadatos: la imagen se crea desde cero y se guarda sin EXIF, ICC ni XMP
+- Caché por hash del contenido (título, label, marca, plantilla y opciones) en .cover_cache/:
+  un redeploy con el mismo título no vuelve a renderizar y solo copia lo que haya cambiado
+- En lote (fan-out, --all) las portadas que faltan se renderizan en un pool de procesos
+"""
+
+import filecmp
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+from structured_logging import get_logger
+
+log = get_logger("cover_images")
+
+COVER_DIR = "images/blog"
+COVER_CACHE_DIR = ".cover_cache"
+TEMPLATE_VERSION = 1
+COVER_SIZE = (1200, 630)
+DEFAULT_WIDTHS = (480, 800)
+DEFAULT_FORMATS = ("webp", "avif")
+
+# Opciones de guardado por formato (la extensión de coverImage es .jpeg)
+SAVE_OPTIONS = {
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "avif": {"format": "AVIF", "quality": 60},
+}
+
+TITLE_FONT_SIZES = (72, 64, 56, 48, 42)
+MAX_TITLE_LINES = 4
+MARGIN = 72
+
+
+def cover_image_dir() -> str:
+    """Directorio de las portadas dentro del sitio (el que se sirve como /images/blog)"""
+    return os.getenv("COVER_IMAGE_DIR", COVER_DIR)
+
+
+def cover_widths() -> Tuple[int, ...]:
+    raw = os.getenv("COVER_WIDTHS")
+    widths = [int(width) for width in raw.split(",") if width.strip()] if raw else DEFAULT_WIDTHS
+    return tuple(sorted({width for width in widths if 0 < width < COVER_SIZE[0]}))
+
+
+def cover_formats() -> Tuple[str, ...]:
+    """Formatos extra además de JPEG; los que este Pillow no sabe escribir se omiten"""
+    raw = os.getenv("COVER_FORMATS")
+    requested = [fmt.strip().lower() for fmt in raw.split(",") if fmt.strip()] if raw else DEFAULT_FORMATS
+    formats = []
+    for fmt in requested:
+        if fmt in SAVE_OPTIONS and fmt != "jpeg" and fmt not in formats:
+            if features.check(fmt):
+                formats.append(fmt)
+            else:
+                log.debug("Cover format %s not supported by this Pillow build, skipped", fmt)
+    return tuple(formats)
+
+
+def cover_workers() -> int:
+    return int(os.getenv("COVER_WORKERS", os.cpu_count() or 1))
+
+
+def cover_spec(post: Dict[str, Any], brand: str) -> Dict[str, Any]:
+    """Todo lo que determina la imagen; las opciones se resuelven aquí para que el hash y el worker coincidan"""
+    return {
+        "title": str(post.get("title") or ""),
+        "label": str(post.get("label") or ""),
+        "brand": brand,
+        "widths": list(cover_widths()),
+        "formats": list(cover_formats()),
+        "font": os.getenv("COVER_FONT", ""),
+        "template": TEMPLATE_VERSION,
+    }
+
+
+def cover_hash(spec: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+
+
+def variant_names(spec: Dict[str, Any], stem: str) -> List[str]:
+    """Archivos de una portada: <stem>.<fmt> a tamaño completo y <stem>-<ancho>w.<fmt>"""
+    names = []
+    for fmt in ["jpeg"] + spec["formats"]:
+        names.append(f"{stem}.{fmt}")
+        names.extend(f"{stem}-{width}w.{fmt}" for width in spec["widths"])
+    return names
+
+
+def _palette(label: str) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+    """Dos colores oscuros estables por label: cada serie del blog tiene su degradado"""
+    digest = hashlib.md5(label.encode("utf-8")).digest()
+    start = tuple(40 + value % 60 for value in digest[:3])
+    end = tuple(10 + value % 40 for value in digest[3:6])
+    return start, end
+
+
+def _font(spec: Dict[str, Any], size: int) -> ImageFont.FreeTypeFont:
+    for path in (spec["font"], "DejaVuSans-Bold.ttf"):
+        if path:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+    return ImageFont.load_default(size)
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, max_width: int) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_cover(spec: Dict[str, Any]) -> Image.Image:
+    """Portada a tamaño completo (COVER_SIZE) con la plantilla del blog"""
+    width, height = COVER_SIZE
+    start, end = _palette(spec["label"])
+    gradient = Image.linear_gradient("L").resize(COVER_SIZE)
+    image = Image.composite(Image.new("RGB", COVER_SIZE, end), Image.new("RGB", COVER_SIZE, start), gradient)
+    draw = ImageDraw.Draw(image)
+
+    label_font = _font(spec, 30)
+    draw.text((MARGIN, MARGIN), spec["label"].upper(), font=label_font, fill=(255, 200, 87))
+
+    # El tamaño de letra más grande con el que el título cabe en MAX_TITLE_LINES
+    max_width = width - 2 * MARGIN
+    for size in TITLE_FONT_SIZES:
+        title_font = _font(spec, size)
+        lines = _wrap(draw, spec["title"], title_font, max_width)
+        if len(lines) <= MAX_TITLE_LINES:
+            break
+    lines = lines[:MAX_TITLE_LINES]
+    line_height = int(title_font.size * 1.2)
+    top = (height - line_height * len(lines)) // 2
+    for i, line in enumerate(lines):
+        draw.text((MARGIN, top + i * line_height), line, font=title_font, fill=(255, 255, 255))
+
+    draw.text((MARGIN, height - MARGIN - 30), spec["brand"], font=_font(spec, 28), fill=(200, 200, 210))
+    return image
+
+
+def _save(image: Image.Image, path: str, fmt: str) -> None:
+    # Sin exif/icc_profile/xmp: la imagen es nueva y no arrastra info de ningún origen
+    image.save(path, exif=b"", **SAVE_OPTIONS[fmt])
+
+
+def render_to_cache(spec: Dict[str, Any], cache_dir: str = COVER_CACHE_DIR) -> Tuple[str, bool]:
+    """
+    Renderiza la portada y sus variantes en cache_dir/<hash>/ (worker del pool: solo recibe datos).
+    Devuelve (hash, renderizada); si ya estaba en caché no hace nada
+    """
+    digest = cover_hash(spec)
+    target = os.path.join(cache_dir, digest)
+    if os.path.isdir(target):
+        return digest, False
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".render_")
+    try:
+        full = render_cover(spec)
+        sizes = [(None, full)] + [(w, full.resize((w, round(w * COVER_SIZE[1] / COVER_SIZE[0])), Image.LANCZOS))
+                                  for w in spec["widths"]]
+        for fmt in ["jpeg"] + spec["formats"]:
+            for width, image in sizes:
+                _save(image, os.path.join(tmp_dir, f"cover-{width}w.{fmt}" if width else f"cover.{fmt}"), fmt)
+        try:
+            os.rename(tmp_dir, target)  # el directorio aparece completo o no aparece
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(tmp_dir)  # otro proceso la renderizó a la vez
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return digest, True
+
+
+def prerender_covers(posts: List[Dict[str, Any]], brand: str, cache_dir: str = COVER_CACHE_DIR,
+                     workers: int = None) -> Dict[str, bool]:
+    """
+    Renderiza en caché las portadas que falten, en un pool de procesos si hay más de una.
+    Devuelve {hash: renderizada}
+    """
+    specs = {}
+    for post in posts:
+        spec = cover_spec(post, brand)
+        specs.setdefault(cover_hash(spec), spec)
+    missing = [spec for digest, spec in specs.items() if not os.path.isdir(os.path.join(cache_dir, digest))]
+    rendered = {digest: False for digest in specs}
+    workers = min(workers or cover_workers(), len(missing))
+    if workers > 1:
+        # spawn: el proceso padre tiene hilos (event bus, pools HTTP) y fork no es seguro con ellos
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for digest, done in pool.map(render_to_cache, missing, [cache_dir] * len(missing)):
+                rendered[digest] = done
+    else:
+        for spec in missing:
+            digest, done = render_to_cache(spec, cache_dir)
+            rendered[digest] = done
+    return rendered
+
+
+def publish_cover(post: Dict[str, Any], brand: str, cover_dir: str = COVER_DIR,
+                  cache_dir: str = COVER_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Deja la portada del post en cover_dir como <slug>.jpeg (+ variantes), renderizándola solo si no
+    está en caché. Los archivos idénticos a los publicados no se reescriben (git no ve cambios)
+    """
+    slug = post["slug"]
+    spec = cover_spec(post, brand)
+    digest, rendered = render_to_cache(spec, cache_dir)
+    os.makedirs(cover_dir, exist_ok=True)
+    written = 0
+    for cached_name, name in zip(variant_names(spec, "cover"), variant_names(spec, slug)):
+        source, target = os.path.join(cache_dir, digest, cached_name), os.path.join(cover_dir, name)
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            continue
+        shutil.copyfile(source, target + ".tmp")
+        os.replace(target + ".tmp", target)
+        written += 1
+    return {"slug": slug, "hash": digest, "rendered": rendered, "written": written,
+            "files": variant_names(spec, slug)}
+
+
+def publish_cover_safely(post: Dict[str, Any], brand: str, cover_dir: str = COVER_DIR,
+                         cache_dir: str = COVER_CACHE_DIR) -> Optional[Dict[str, Any]]:
+    """Paso del deploy: un fallo de la portada no debe impedir publicar el post"""
+    try:
+        report = publish_cover(post, brand, cover_dir, cache_dir)
+        log.info("🖼️ Cover %s: %s", report["slug"], "rendered" if report["rendered"] else "from cache",
+                 extra={"fields": {k: report[k] for k in ("slug", "hash", "rendered", "written")}})
+        return report
+    except Exception as e:
+        log.warning("⚠️ Could not generate cover image: %s", e)
+        return None
+
+
+def generate_covers(posts: List[Dict[str, Any]], brand: str, cover_dir: str = COVER_DIR,
+                    cache_dir: str = COVER_CACHE_DIR, workers: int = None) -> List[Dict[str, Any]]:
+    """Portadas de varios posts: renderizado en paralelo (procesos) y copia a cover_dir"""
+    rendered = prerender_covers(posts, brand, cache_dir, workers)
+    reports = [publish_cover(post, brand, cover_dir, cache_dir) for post in posts if post.get("slug")]
+    for report in reports:
+        report["rendered"] = rendered.get(report["hash"], report["rendered"])
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from post_collection import load_collection
+    from site_config import get_site
+
+    parser = argparse.ArgumentParser(description="Portadas de los posts de blog_posts.json")
+    parser.add_argument("slugs", nargs="*", help="Posts a generar (por defecto, todos)")
+    parser.add_argument("--site", default=os.getenv("SITE"))
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de renderizado (COVER_WORKERS)")
+    args = parser.parse_args()
+
+    site = get_site(args.site)
+    posts = [post for post in load_collection(site.collection) if not args.slugs or post.get("slug") in args.slugs]
+    if not posts:
+        print(f"🔍 No hay posts que coincidan en {site.collection}")
+        sys.exit(1)
+    reports = generate_covers(posts, site.brand, site.cover_dir, site.cover_cache, args.workers)
+    rendered = sum(1 for report in reports if report["rendered"])
+    print(f"✅ {len(reports)} portadas en {site.cover_dir} ({rendered} renderizadas, {len(reports) - rendered} de caché)")
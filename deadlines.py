@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Deadlines por etapa (research, writing, QA, deploy) y por ejecución completa
+Cancelación cooperativa y checkpoint de salidas parciales para reanudar la siguiente ejecución
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional, Tuple
+
+STAGES = ("research", "writing", "qa", "deploy")
+
+# Segundos de reloj por etapa (configurables con DEADLINE_<ETAPA>_S) y total (DEADLINE_TOTAL_S)
+DEFAULT_STAGE_DEADLINES = {"research": 300, "writing": 600, "qa": 180, "deploy": 300}
+DEFAULT_TOTAL_DEADLINE = 1800
+
+CHECKPOINT_DIR = ".checkpoints"
+CHECKPOINT_FILE = "latest_run.json"
+# Una salida parcial más antigua que esto ya no se reutiliza
+RESUME_MAX_AGE_SECONDS = 24 * 3600
+
+WATCHDOG_INTERVAL = 0.5
+
+
+class RunCancelled(Exception):
+    """Motivo por el que se cancela una ejecución en curso (deadline, presupuesto, ...)"""
+
+    def __init__(self, message: str, stage: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+class DeadlineExceeded(RunCancelled):
+    """Una etapa (o la ejecución completa) superó su deadline"""
+
+    def __init__(self, stage: str, elapsed: float, limit: float):
+        super().__init__(f"Deadline exceeded in stage '{stage}': {elapsed:.1f}s > {limit:.0f}s", stage)
+        self.elapsed = elapsed
+        self.limit = limit
+
+
+class RunDeadlines:
+    """
+    Reloj de una ejecución: deadlines por etapa, deadline total y señal de cancelación.
+    usage (opcional, ver token_budget.RunUsage) añade el presupuesto de tokens/coste a las mismas comprobaciones
+    """
+
+    def __init__(self, stage_limits: Optional[Dict[str, float]] = None, total_limit: Optional[float] = None,
+                 checkpoint: Optional["RunCheckpoint"] = None, usage=None):
+        self.checkpoint = checkpoint
+        self.usage = usage
+        self.stage_limits = {
+            stage: float(os.getenv(f"DEADLINE_{stage.upper()}_S", DEFAULT_STAGE_DEADLINES[stage]))
+            for stage in STAGES
+        }
+        self.stage_limits.update(stage_limits or {})
+        self.total_limit = total_limit or float(os.getenv("DEADLINE_TOTAL_S", DEFAULT_TOTAL_DEADLINE))
+        self.started = time.monotonic()
+        self.stage_started: Dict[str, float] = {}
+        self.stage_finished: Dict[str, float] = {}
+        self.current_stage: Optional[str] = None
+        self.cancelled = threading.Event()
+        self.exceeded: Optional[RunCancelled] = None
+        self._task_stages: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # Hilo vigilado por run_with_deadline: tras un timeout puede seguir vivo hasta su siguiente llamada LLM
+        self.worker: Optional[threading.Thread] = None
+
+    def register_task(self, task, stage: str) -> None:
+        """
+        Asocia una tarea de CrewAI a su etapa para poder vigilarla desde los hooks LLM.
+        Su callback cierra la etapa y guarda la salida en el checkpoint.
+        """
+        self._task_stages[id(task)] = stage
+        if self.usage is not None:
+            self.usage.register_task(task, stage)
+        task.callback = lambda output: self.finish_stage(stage, output.raw)
+
+    def stage_for_task(self, task) -> Optional[str]:
+        return self._task_stages.get(id(task))
+
+    def start_stage(self, stage: str) -> None:
+        with self._lock:
+            if self.current_stage and self.current_stage not in self.stage_finished:
+                self.stage_finished[self.current_stage] = time.monotonic()
+            self.stage_started.setdefault(stage, time.monotonic())
+            self.current_stage = stage
+
+    def finish_stage(self, stage: str, output: Optional[str] = None) -> None:
+        with self._lock:
+            self.stage_finished.setdefault(stage, time.monotonic())
+        if output and self.checkpoint is not None:
+            self.checkpoint.save_stage(stage, output)
+
+    def check(self) -> None:
+        """
+        Lanza DeadlineExceeded (y marca la cancelación) si la etapa actual o el total han expirado,
+        o el RunCancelled del presupuesto si usage lo ha superado
+        """
+        if self.exceeded:
+            raise self.exceeded
+        now = time.monotonic()
+        total_elapsed = now - self.started
+        if total_elapsed > self.total_limit:
+            self.cancel(DeadlineExceeded(self.current_stage or "total", total_elapsed, self.total_limit))
+        stage = self.current_stage
+        if stage and stage not in self.stage_finished:
+            elapsed = now - self.stage_started[stage]
+            if elapsed > self.stage_limits[stage]:
+                self.cancel(DeadlineExceeded(stage, elapsed, self.stage_limits[stage]))
+        if self.usage is not None and not self.exceeded:
+            try:
+                self.usage.check(stage)
+            except RunCancelled as e:
+                self.cancel(e)
+        if self.exceeded:
+            raise self.exceeded
+
+    def cancel(self, reason: RunCancelled) -> None:
+        with self._lock:
+            if self.exceeded is None:
+                self.exceeded = reason
+            self.cancelled.set()
+
+    def report(self) -> Dict[str, Any]:
+        """Tiempos por etapa frente a sus límites"""
+        now = time.monotonic()
+        stages = {}
+        for stage, started in self.stage_started.items():
+            stages[stage] = {
+                "elapsed_s": round(self.stage_finished.get(stage, now) - started, 2),
+                "deadline_s": self.stage_limits[stage],
+            }
+        return {"total_elapsed_s": round(now - self.started, 2), "total_deadline_s": self.total_limit, "stages": stages}
+
+
+_active_runs = []
+_active_lock = threading.Lock()
+# Ejecución a la que pertenece el código que corre dentro de run_with_deadline (CrewAI propaga el contexto a las herramientas)
+_current_run: contextvars.ContextVar = contextvars.ContextVar("blog_run_deadlines", default=None)
+
+
+def current_run() -> Optional[RunDeadlines]:
+    return _current_run.get()
+
+
+def run_cancelled() -> bool:
+    """True si el código corre dentro de una ejecución ya cancelada (su llamador ya no espera el resultado)"""
+    run = current_run()
+    return run is not None and run.cancelled.is_set()
+
+
+def find_run_for_task(task) -> Tuple[Optional[RunDeadlines], Optional[str]]:
+    """Busca entre las ejecuciones activas la que contiene esta tarea"""
+    with _active_lock:
+        runs = list(_active_runs)
+    for run in runs:
+        stage = run.stage_for_task(task)
+        if stage:
+            return run, stage
+    return None, None
+
+
+def run_with_deadline(func: Callable, deadlines: RunDeadlines) -> Tuple[bool, Any]:
+    """
+    Ejecuta func en un hilo vigilado. Devuelve (True, resultado) si termina a tiempo,
+    (False, None) si expira un deadline o se agota el presupuesto: la cancelación es
+    cooperativa (los hooks abortan la siguiente llamada LLM) y el llamador recupera el
+    control sin esperar al hilo. La ejecución sigue registrada hasta que el hilo termina,
+    para que los hooks la encuentren (ya cancelada) en las llamadas que haga después.
+    """
+    outcome: Dict[str, Any] = {}
+
+    def target():
+        _current_run.set(deadlines)
+        try:
+            outcome["result"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            with _active_lock:
+                _active_runs.remove(deadlines)
+
+    with _active_lock:
+        _active_runs.append(deadlines)
+    # El hilo hereda el contexto (run_id de los logs) del llamador
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(target,), daemon=True,
+                              name="deadline-worker")
+    deadlines.worker = worker
+    try:
+        worker.start()
+    except BaseException:
+        with _active_lock:
+            _active_runs.remove(deadlines)
+        raise
+    while worker.is_alive():
+        worker.join(WATCHDOG_INTERVAL)
+        try:
+            deadlines.check()
+        except RunCancelled:
+            return False, None
+
+    if "error" in outcome:
+        if deadlines.cancelled.is_set():
+            return False, None
+        raise outcome["error"]
+    return True, outcome["result"]
+
+
+class RunCheckpoint:
+    """Salidas parciales por etapa guardadas en disco para que la siguiente ejecución continúe"""
+
+    def __init__(self, directory: str = CHECKPOINT_DIR, filename: str = CHECKPOINT_FILE):
+        self.path = os.path.join(directory, filename)
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_stage(self, stage: str, output: str) -> None:
+        self.data.setdefault("stages", {})[stage] = {"output": output, "saved_at": time.time()}
+        self._save()
+
+    def mark(self, status: str, **details) -> None:
+        self.data["status"] = status
+        self.data["updated"] = datetime.now().isoformat(timespec="seconds")
+        self.data.update(details)
+        self._save()
+
+    def resumable_output(self, stage: str) -> Optional[str]:
+        """Salida de una etapa de una ejecución anterior que expiró por deadline, si es reciente"""
+        if self.data.get("status") != "timeout":
+            return None
+        entry = self.data.get("stages", {}).get(stage)
+        if not entry or time.time() - entry.get("saved_at", 0) > RESUME_MAX_AGE_SECONDS:
+            return None
+        return entry.get("output") or None
+
+    def outputs(self) -> Dict[str, str]:
+        return {stage: entry["output"] for stage, entry in self.data.get("stages", {}).items()}
+
+    def clear(self) -> None:
+        self.data = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Puntuación determinista de borradores del writer (modo best-of-N)
+
+Métricas baratas, sin LLM: validación estricta, longitud frente al rango pedido, estructura de
+encabezados, mención de la marca del sitio (Wrappers.es) y parecido con los posts ya publicados
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_DRAFTS = 3
+
+# Peso de cada métrica en la puntuación final (0-1)
+SCORE_WEIGHTS = {"length": 0.3, "headings": 0.2, "wrappers": 0.2, "originality": 0.3}
+
+# Número de secciones (## / ###) que se considera una estructura sana
+MIN_HEADINGS = 3
+MAX_HEADINGS = 8
+
+# A partir de este parecido con un post publicado, la originalidad puntúa 0
+DUPLICATE_SIMILARITY = 0.6
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_HEADING_RE = re.compile(r"^(#{1,6})\s+\S", re.MULTILINE)
+
+
+def parse_word_range(word_range: str) -> Tuple[int, int]:
+    """'800-1200' -> (800, 1200); un único número se toma como mínimo y máximo"""
+    numbers = [int(n) for n in re.findall(r"\d+", word_range or "")]
+    if not numbers:
+        return 800, 1200
+    return min(numbers), max(numbers)
+
+
+def length_score(words: int, low: int, high: int) -> float:
+    if low <= words <= high:
+        return 1.0
+    distance = low - words if words < low else words - high
+    return max(0.0, 1 - distance / max(low, 1))
+
+
+def heading_score(content: str) -> float:
+    """Secciones ## / ###; un H1 dentro del contenido duplica el título y penaliza"""
+    levels = [len(match.group(1)) for match in _HEADING_RE.finditer(content)]
+    sections = sum(1 for level in levels if level in (2, 3))
+    if sections < MIN_HEADINGS:
+        score = sections / MIN_HEADINGS
+    elif sections > MAX_HEADINGS:
+        score = max(0.0, 1 - (sections - MAX_HEADINGS) / MAX_HEADINGS)
+    else:
+        score = 1.0
+    return score * (0.5 if 1 in levels else 1.0)
+
+
+def score_draft(post, validation: Dict[str, Any], word_range: str = "800-1200",
+                similar: Optional[List[Dict[str, Any]]] = None, brand: str = "wrappers.es") -> Dict[str, Any]:
+    """
+    Puntúa un borrador ya parseado (Post) con su resultado de validate_blog_post_strict
+    y los posts publicados más parecidos (PostSearchIndex.similar); brand es la marca del sitio
+    """
+    content = post.content or ""
+    words = len(_WORD_RE.findall(content))
+    closest = similar[0] if similar else None
+    similarity = closest["similarity"] if closest else 0.0
+
+    metrics = {
+        "length": length_score(words, *parse_word_range(word_range)),
+        "headings": heading_score(content),
+        "wrappers": 1.0 if brand.lower() in content.lower() else 0.0,
+        "originality": max(0.0, 1 - similarity / DUPLICATE_SIMILARITY),
+    }
+    return {
+        "valid": validation["valid"],
+        "errors": validation["errors"],
+        "score": round(sum(SCORE_WEIGHTS[name] * value for name, value in metrics.items()), 3),
+        "metrics": {name: round(value, 3) for name, value in metrics.items()},
+        "words": words,
+        "closest_post": closest["slug"] if closest else None,
+        "similarity": similarity,
+    }
+
+
+def rank_drafts(scores: List[Dict[str, Any]]) -> List[int]:
+    """Índices de los borradores de mejor a peor: cualquier borrador válido va antes que uno inválido"""
+    return sorted(range(len(scores)), key=lambda i: (scores[i]["valid"], scores[i]["score"], -i), reverse=True)
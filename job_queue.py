@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos duradera en SQLite para encargos de generación (ángulo, autor, fecha concretos)
+Semántica enqueue / claim / ack con visibility timeout, pool de workers y CLI para gestionarla
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from structured_logging import get_logger
+
+log = get_logger("job_queue")
+
+JOB_QUEUE_DB = "blog_jobs.db"
+DEFAULT_VISIBILITY_TIMEOUT = 3600   # un job reclamado vuelve a la cola si su worker no da señales en este tiempo
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 5.0
+
+# Parámetros aceptados en un encargo; 'site' elige el blog y todo lo que no sea 'angle' va a create_writing_task
+JOB_PARAMS = ("site", "angle", "label", "author", "read_time", "word_range", "date")
+
+# Claves del resultado de run_automation que se guardan en el job (el resto no es serializable o es enorme)
+RESULT_KEYS = ("status", "message", "file", "stage", "errors", "debug_file", "run_id")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    params TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    claimed_by TEXT,
+    visible_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    stage_timings TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (status, visible_at);
+"""
+
+
+class JobQueue:
+    """
+    Cola en SQLite (modo WAL): segura entre hilos y procesos de la misma máquina
+
+    Estados: queued -> running -> done | failed
+    Un job 'running' cuyo visibility timeout expira vuelve a poder reclamarse (worker caído)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("JOB_QUEUE_DB", JOB_QUEUE_DB)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for field in ("params", "result", "stage_timings"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def enqueue(self, params: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        unknown = set(params) - set(JOB_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown job parameters: {', '.join(sorted(unknown))}")
+        if params.get("date") and not re.match(r"^\d{2}/\d{2}/\d{4}$", params["date"]):
+            raise ValueError(f"Job date '{params['date']}' must be DD/MM/YYYY")
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (params, max_attempts, visible_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(params, ensure_ascii=False), max_attempts, now, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Reclama el job visible más antiguo. Los jobs expirados sin intentos restantes pasan a 'failed'"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # bloqueo de escritura: dos workers nunca reclaman el mismo job
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'visibility timeout expired'), updated_at = ? "
+                "WHERE status = 'running' AND visible_at <= ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') AND visible_at <= ? ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', claimed_by = ?, attempts = attempts + 1, visible_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (worker_id, now + visibility_timeout, now, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return self._to_dict(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: int, worker_id: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """Extiende el visibility timeout. False si el job ya no pertenece a este worker"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET visible_at = ?, updated_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (now + visibility_timeout, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def ack(self, job_id: int, worker_id: str, result: Dict[str, Any],
+            stage_timings: Optional[Dict[str, Any]] = None) -> bool:
+        """Marca el job como terminado (done). False si otro worker lo reclamó tras expirar"""
+        return self._finish(job_id, worker_id, "done", result=result, stage_timings=stage_timings)
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True,
+             result: Optional[Dict[str, Any]] = None, stage_timings: Optional[Dict[str, Any]] = None) -> bool:
+        """Devuelve el job a la cola si quedan intentos (y retry), o lo marca como 'failed'"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        status = "queued" if retry and row and row["attempts"] < row["max_attempts"] else "failed"
+        return self._finish(job_id, worker_id, status, result=result, error=error, stage_timings=stage_timings)
+
+    def _finish(self, job_id: int, worker_id: str, status: str, result=None, error=None, stage_timings=None) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, stage_timings = COALESCE(?, stage_timings), "
+                "visible_at = ?, updated_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None, error,
+                 json.dumps(stage_timings) if stage_timings is not None else None, now, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            return [self._to_dict(row) for row in rows.fetchall()]
+
+
+def run_blog_job(automation, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta un encargo con el BlogAutomationCrew de su sitio; run_id aísla su checkpoint y su archivo"""
+    params = dict(job["params"])
+    params.pop("site", None)
+    angle = params.pop("angle", None)
+    return automation.run_automation(angle=angle, writing_options=params, run_id=f"job-{job['id']}")
+
+
+class WorkerPool:
+    """
+    N hilos que reclaman jobs de la cola y los ejecutan
+    - success -> ack; timeout -> vuelve a la cola (reanuda desde su checkpoint); error -> failed
+    - Mientras un job corre, un latido renueva su visibility timeout
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = 1, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+                 runner: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None, poll_interval: float = POLL_INTERVAL):
+        self.queue = queue
+        self.workers = workers
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.runner = runner or self._default_runner()
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    @staticmethod
+    def _default_runner() -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        from blog_automation import get_site_crew
+        # Un crew por sitio, compartido entre workers; clientes, limiters y cachés son comunes a todos los sitios
+        return lambda job: run_blog_job(get_site_crew(job["params"].get("site")), job)
+
+    def _heartbeat(self, job_id: int, worker_id: str, done: threading.Event) -> None:
+        while not done.wait(max(1.0, self.visibility_timeout / 3)):
+            if not self.queue.heartbeat(job_id, worker_id, self.visibility_timeout):
+                return
+
+    def process_one(self, worker_id: str) -> bool:
+        """Reclama y ejecuta un job. False si la cola estaba vacía"""
+        job = self.queue.claim(worker_id, self.visibility_timeout)
+        if job is None:
+            return False
+
+        log.info("🧵 %s: job #%s (intento %s/%s)", worker_id, job["id"], job["attempts"], job["max_attempts"])
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job["id"], worker_id, done), daemon=True).start()
+        try:
+            result = self.runner(job)
+        except Exception as e:
+            log.exception("❌ %s: job #%s falló", worker_id, job["id"])
+            result = {"status": "error", "message": f"Error ejecutando el job: {e}", "retry": True}
+        finally:
+            done.set()
+
+        summary = {key: result[key] for key in RESULT_KEYS if key in result}
+        timings = result.get("stage_timings")
+        if result.get("status") == "success":
+            self.queue.ack(job["id"], worker_id, summary, timings)
+        else:
+            retry = result.get("status") == "timeout" or result.get("retry", False)
+            self.queue.fail(job["id"], worker_id, result.get("message", "unknown error"), retry=retry,
+                            result=summary, stage_timings=timings)
+        log.info("📊 %s: job #%s -> %s", worker_id, job["id"], result.get("status"),
+                 extra={"fields": {"job_id": job["id"], "status": result.get("status")}})
+        with self._lock:
+            self.processed += 1
+        return True
+
+    def _work(self, worker_id: str, exit_when_empty: bool) -> None:
+        while not self.stop_event.is_set():
+            if not self.process_one(worker_id):
+                if exit_when_empty:
+                    return
+                self.stop_event.wait(self.poll_interval)
+
+    def start(self, exit_when_empty: bool = False) -> None:
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{prefix}-w{i + 1}", exit_when_empty),
+                                      name=f"job-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S") if timestamp else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Cola de encargos de generación de blog posts")
+    parser.add_argument("--db", default=None, help=f"Base de datos SQLite (JOB_QUEUE_DB, por defecto {JOB_QUEUE_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Encola un encargo")
+    submit.add_argument("--site", help="Sitio de sites.json (por defecto el primero)")
+    submit.add_argument("--angle", help="Ángulo o tema concreto para el research")
+    submit.add_argument("--author")
+    submit.add_argument("--date", help="Fecha del post, DD/MM/YYYY")
+    submit.add_argument("--label")
+    submit.add_argument("--read-time", dest="read_time", help='p. ej. "5 MIN"')
+    submit.add_argument("--word-range", dest="word_range", help='p. ej. "800-1200"')
+    submit.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    listing = commands.add_parser("list", help="Lista los jobs")
+    listing.add_argument("--status", choices=["queued", "running", "done", "failed"])
+    listing.add_argument("--limit", type=int, default=50)
+
+    inspect = commands.add_parser("inspect", help="Muestra un job con su resultado y tiempos por etapa")
+    inspect.add_argument("job_id", type=int)
+
+    work = commands.add_parser("work", help="Arranca el pool de workers")
+    work.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", 1)))
+    work.add_argument("--visibility-timeout", type=float,
+                      default=float(os.getenv("JOB_VISIBILITY_TIMEOUT", DEFAULT_VISIBILITY_TIMEOUT)))
+    work.add_argument("--exit-when-empty", action="store_true", help="Termina cuando no queden jobs")
+
+    args = parser.parse_args(argv)
+    queue = JobQueue(args.db)
+
+    if args.command == "submit":
+        params = {key: getattr(args, key) for key in JOB_PARAMS if getattr(args, key)}
+        try:
+            job_id = queue.enqueue(params, max_attempts=args.max_attempts)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"✅ Job #{job_id} encolado")
+
+    elif args.command == "list":
+        jobs = queue.list(args.status, args.limit)
+        if not jobs:
+            print("📭 No hay jobs")
+        for job in jobs:
+            angle = (job["params"].get("angle") or "(ángulo aleatorio)")[:60]
+            site = job["params"].get("site") or "-"
+            print(f"#{job['id']:<5} {job['status']:<8} intentos {job['attempts']}/{job['max_attempts']}  "
+                  f"{_format_time(job['created_at'])}  [{site}] {angle}")
+
+    elif args.command == "inspect":
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"❌ Job #{args.job_id} no existe")
+            raise SystemExit(1)
+        print(f"📋 Job #{job['id']} - {job['status']} (intentos {job['attempts']}/{job['max_attempts']})")
+        print(f"   Creado: {_format_time(job['created_at'])}  Actualizado: {_format_time(job['updated_at'])}")
+        print(f"   Worker: {job['claimed_by'] or '-'}")
+        print(f"   Parámetros: {json.dumps(job['params'], ensure_ascii=False)}")
+        if job["error"]:
+            print(f"   Error: {job['error']}")
+        if job["result"]:
+            print(f"   Resultado: {json.dumps(job['result'], ensure_ascii=False)}")
+        timings = job["stage_timings"] or {}
+        for stage, values in timings.get("stages", {}).items():
+            print(f"   ⏱️ {stage:<8} {values['elapsed_s']:>8.2f}s / {values['deadline_s']:.0f}s")
+        if timings:
+            print(f"   ⏱️ total    {timings['total_elapsed_s']:>8.2f}s / {timings['total_deadline_s']:.0f}s")
+
+    elif args.command == "work":
+        pool = WorkerPool(queue, workers=args.workers, visibility_timeout=args.visibility_timeout)
+        print(f"🚀 {args.workers} worker(s) sobre {queue.path}")
+        pool.start(exit_when_empty=args.exit_when_empty)
+        try:
+            while pool.is_alive():
+                pool.join(1.0)
+        except KeyboardInterrupt:
+            print("👋 Deteniendo workers (los jobs en curso terminan primero)...")
+            pool.stop()
+            pool.join()
+        print(f"📦 Jobs procesados: {pool.processed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Retención acotada para la memoria del Crew de contenido
+Límite de entradas y bytes, expiración por antigüedad, compactación periódica
+y medición de cuánto tiempo añade la recuperación de memoria a cada tarea
+"""
+
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_COMPACT_EVERY_RUNS = 4
+CREW_MEMORY_SCOPE = "/crew/crew"  # el mismo scope que usa CrewAI con memory=True
+STATE_FILE = "retention_state.json"
+
+
+def memory_path() -> Path:
+    """Directorio de la memoria: MEMORY_DIR, o el mismo que usaría CrewAI por defecto"""
+    if os.getenv("MEMORY_DIR"):
+        return Path(os.getenv("MEMORY_DIR"))
+    if os.getenv("CREWAI_STORAGE_DIR"):
+        return Path(os.getenv("CREWAI_STORAGE_DIR")) / "memory"
+    from crewai_core.paths import db_storage_path
+    return Path(db_storage_path()) / "memory"
+
+
+def directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class MemoryRetentionPolicy:
+    """Límites de la memoria, configurables por entorno (MEMORY_MAX_ENTRIES, MEMORY_MAX_BYTES, ...)"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_age_days: Optional[float] = None, compact_every_runs: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("MEMORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.max_bytes = max_bytes or int(os.getenv("MEMORY_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.max_age_days = max_age_days or float(os.getenv("MEMORY_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS))
+        self.compact_every_runs = compact_every_runs or int(os.getenv("MEMORY_COMPACT_EVERY", DEFAULT_COMPACT_EVERY_RUNS))
+
+
+def create_bounded_memory(llm=None, path: Optional[Path] = None):
+    """Memory de CrewAI sobre LanceDB en un directorio conocido (para poder medirlo y podarlo)"""
+    from crewai.memory.unified_memory import Memory
+
+    kwargs = {"storage": str(path or memory_path()), "root_scope": CREW_MEMORY_SCOPE}
+    if llm is not None:
+        kwargs["llm"] = llm
+    return Memory(**kwargs)
+
+
+def _load_state(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path / STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path: Path, state: Dict[str, Any]) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def enforce_memory_retention(storage, policy: MemoryRetentionPolicy, path: Path) -> Dict[str, Any]:
+    """
+    Aplica la política sobre un StorageBackend de CrewAI:
+    1. Borra entradas más antiguas que max_age_days
+    2. Si hay más de max_entries, borra las menos importantes y más antiguas
+    3. Si el directorio supera max_bytes, borra las entradas equivalentes más antiguas
+    4. Compacta (optimize) cada compact_every_runs ejecuciones o si se borró algo
+    """
+    report = {"entries_before": storage.count(), "bytes_before": directory_size(path),
+              "expired": 0, "evicted_entries": 0, "evicted_bytes": 0, "compacted": False}
+
+    cutoff = datetime.utcnow() - timedelta(days=policy.max_age_days)
+    report["expired"] = storage.delete(older_than=cutoff) or 0
+
+    count = storage.count()
+    excess = count - policy.max_entries
+    if report["bytes_before"] > policy.max_bytes and count:
+        bytes_per_entry = report["bytes_before"] / max(1, report["entries_before"])
+        excess_for_bytes = math.ceil((report["bytes_before"] - policy.max_bytes) / bytes_per_entry)
+        report["evicted_bytes"] = max(0, excess_for_bytes - max(0, excess))
+        excess = max(excess, excess_for_bytes)
+
+    if excess > 0:
+        records = storage.list_records(limit=count)
+        # Primero las menos importantes; a igual importancia, las más antiguas
+        records.sort(key=lambda record: (record.importance, record.created_at))
+        victims = [record.id for record in records[:excess]]
+        report["evicted_entries"] = storage.delete(record_ids=victims) or 0
+
+    state = _load_state(path)
+    state["runs_since_compaction"] = state.get("runs_since_compaction", 0) + 1
+    removed = report["expired"] + report["evicted_entries"]
+    if (removed or state["runs_since_compaction"] >= policy.compact_every_runs) and hasattr(storage, "optimize"):
+        storage.optimize()
+        state["runs_since_compaction"] = 0
+        state["last_compaction"] = datetime.now().isoformat(timespec="seconds")
+        report["compacted"] = True
+    _save_state(path, state)
+
+    report["entries_after"] = storage.count()
+    report["bytes_after"] = directory_size(path)
+    return report
+
+
+class MemoryLatencyTracker:
+    """
+    Acumula el tiempo de recuperación de memoria por tarea (a partir de eventos de CrewAI), por ejecución:
+    las ejecuciones simultáneas (workers de la cola, varios sitios) no mezclan ni borran sus datos
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_run: Dict[Optional[str], Dict[str, Dict[str, float]]] = {}
+
+    def record(self, task_name: Optional[str], milliseconds: float, run_id: Optional[str] = None) -> None:
+        key = (task_name or "unknown").strip().split("\n")[0][:60]
+        with self._lock:
+            entry = self._by_run.setdefault(run_id, {}).setdefault(key, {"retrievals": 0, "total_ms": 0.0})
+            entry["retrievals"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + milliseconds, 2)
+
+    def snapshot(self, run_id: Optional[str] = None, reset: bool = True) -> Dict[str, Dict[str, float]]:
+        """Datos de la ejecución run_id; con reset se descartan (la ejecución ya los devolvió)"""
+        with self._lock:
+            by_task = self._by_run.pop(run_id, {}) if reset else self._by_run.get(run_id, {})
+            data = {task: dict(values) for task, values in by_task.items()}
+        return data
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Modelo por agente y enrutado según latencia
+
+- Cada agente (research, writer, qa, technical) tiene su modelo, temperatura y max_tokens,
+  configurables con <AGENTE>_MODEL, <AGENTE>_TEMPERATURE y <AGENTE>_MAX_TOKENS
+- Con MODEL_ROUTING=true, si la latencia media o la tasa de errores del modelo principal en la
+  ventana reciente supera los umbrales, el agente se crea con su <AGENTE>_FALLBACK_MODEL
+- La latencia de cada llamada LLM se acumula por agente (y por ejecución) para el resultado de la ejecución
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+from crewai.constants import DEFAULT_LLM_MODEL
+
+# Temperatura por agente: creatividad para research y escritura, precisión para QA y operaciones
+AGENT_TEMPERATURES = {"research": 0.7, "writer": 0.7, "qa": 0.2, "technical": 0.1}
+
+DEFAULT_MAX_LATENCY_MS = 30000
+DEFAULT_MAX_ERROR_RATE = 0.3
+DEFAULT_WINDOW_S = 600
+DEFAULT_MIN_CALLS = 3
+
+
+def default_model() -> str:
+    """Modelo por defecto de CrewAI (MODEL / OPENAI_MODEL_NAME o el de la librería)"""
+    return os.getenv("MODEL") or os.getenv("OPENAI_MODEL_NAME") or DEFAULT_LLM_MODEL
+
+
+def model_routing_enabled() -> bool:
+    return os.getenv("MODEL_ROUTING", "false").lower() in ("1", "true", "yes")
+
+
+class AgentModelConfig:
+    """Modelo, temperatura, max_tokens y modelo de respaldo de un agente"""
+
+    def __init__(self, agent: str, model: str = None, temperature: float = None, max_tokens: int = None,
+                 fallback_model: str = None):
+        self.agent = agent
+        self.model = model or default_model()
+        self.temperature = AGENT_TEMPERATURES.get(agent, 0.7) if temperature is None else temperature
+        self.max_tokens = max_tokens
+        self.fallback_model = fallback_model
+
+    @classmethod
+    def from_env(cls, agent: str) -> "AgentModelConfig":
+        prefix = agent.upper()
+        temperature = os.getenv(f"{prefix}_TEMPERATURE")
+        max_tokens = os.getenv(f"{prefix}_MAX_TOKENS")
+        return cls(
+            agent,
+            model=os.getenv(f"{prefix}_MODEL"),
+            temperature=float(temperature) if temperature else None,
+            max_tokens=int(max_tokens) if max_tokens else None,
+            fallback_model=os.getenv(f"{prefix}_FALLBACK_MODEL") or os.getenv("FALLBACK_MODEL"),
+        )
+
+    def llm_params(self, model: str) -> Dict[str, Any]:
+        params = {"model": model, "temperature": self.temperature}
+        if self.max_tokens:
+            params["max_tokens"] = self.max_tokens
+        return params
+
+
+def model_key(model: Optional[str]) -> str:
+    """
+    Nombre del modelo sin prefijo de proveedor: CrewAI lo quita al crear el LLM ("openai/gpt-4o-mini" llega
+    en los eventos como "gpt-4o-mini"), así que la configuración y las muestras se comparan sin él
+    """
+    return (model or "unknown").strip().rsplit("/", 1)[-1]
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)] if ordered else 0.0
+
+
+class ModelRouter:
+    """
+    Salud reciente de cada modelo (latencia y errores en una ventana de tiempo) y elección del
+    modelo al crear un agente. Las muestras caducan: pasada la ventana el principal se vuelve a probar
+    """
+
+    def __init__(self, max_latency_ms: float = None, max_error_rate: float = None, window_s: float = None,
+                 min_calls: int = None, clock=time.monotonic):
+        self.max_latency_ms = max_latency_ms or float(os.getenv("MODEL_ROUTING_MAX_LATENCY_MS", DEFAULT_MAX_LATENCY_MS))
+        self.max_error_rate = (max_error_rate if max_error_rate is not None
+                               else float(os.getenv("MODEL_ROUTING_MAX_ERROR_RATE", DEFAULT_MAX_ERROR_RATE)))
+        self.window_s = window_s or float(os.getenv("MODEL_ROUTING_WINDOW_S", DEFAULT_WINDOW_S))
+        self.min_calls = min_calls or int(os.getenv("MODEL_ROUTING_MIN_CALLS", DEFAULT_MIN_CALLS))
+        self.clock = clock
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency_ms: float, ok: bool = True) -> None:
+        with self._lock:
+            self._samples.setdefault(model_key(model), deque()).append((self.clock(), latency_ms, ok))
+
+    def health(self, model: str) -> Dict[str, Any]:
+        """Llamadas, latencia media / p95 y tasa de errores del modelo dentro de la ventana"""
+        with self._lock:
+            samples = self._samples.get(model_key(model), deque())
+            horizon = self.clock() - self.window_s
+            while samples and samples[0][0] < horizon:
+                samples.popleft()
+            latencies = [latency for _ts, latency, ok in samples if ok]
+            errors = sum(1 for _ts, _latency, ok in samples if not ok)
+            calls = len(samples)
+        return {
+            "calls": calls,
+            "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p95_ms": round(_percentile(latencies, 0.95), 1),
+            "error_rate": round(errors / calls, 3) if calls else 0.0,
+        }
+
+    def degraded(self, model: str) -> Optional[str]:
+        """Motivo por el que el modelo no debería usarse ahora, o None si está sano"""
+        health = self.health(model)
+        if health["calls"] < self.min_calls:
+            return None
+        if health["error_rate"] > self.max_error_rate:
+            return f"tasa de errores {health['error_rate']:.0%} > {self.max_error_rate:.0%}"
+        if health["mean_ms"] > self.max_latency_ms:
+            return f"latencia media {health['mean_ms']:.0f}ms > {self.max_latency_ms:.0f}ms"
+        return None
+
+    def choose(self, config: AgentModelConfig) -> Tuple[str, Optional[str]]:
+        """(modelo, motivo del desvío o None): el de respaldo solo si el principal está degradado"""
+        if not (model_routing_enabled() and config.fallback_model) or model_key(config.fallback_model) == model_key(config.model):
+            return config.model, None
+        reason = self.degraded(config.model)
+        return (config.fallback_model, reason) if reason else (config.model, None)
+
+
+class AgentLatencyTracker:
+    """
+    Acumula la latencia de las llamadas LLM por agente (a partir de eventos de CrewAI), por ejecución:
+    las ejecuciones simultáneas no mezclan ni borran sus muestras
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_run: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+
+    def record(self, agent_role: Optional[str], model: Optional[str], latency_ms: float, ok: bool = True,
+               run_id: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self._by_run.setdefault(run_id, {}).setdefault(
+                agent_role or "unknown", {"calls": 0, "errors": 0, "latencies": [], "models": {}})
+            entry["calls"] += 1
+            entry["models"][model or "unknown"] = entry["models"].get(model or "unknown", 0) + 1
+            if ok:
+                entry["latencies"].append(latency_ms)
+            else:
+                entry["errors"] += 1
+
+    def snapshot(self, run_id: Optional[str] = None, reset: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Latencia por agente de la ejecución run_id; con reset se descarta (la ejecución ya la devolvió)"""
+        with self._lock:
+            by_agent = self._by_run.pop(run_id, {}) if reset else self._by_run.get(run_id, {})
+            data = {}
+            for role, entry in by_agent.items():
+                latencies = entry["latencies"]
+                data[role] = {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "total_ms": round(sum(latencies), 1),
+                    "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                    "p95_ms": round(_percentile(latencies, 0.95), 1),
+                    "models": dict(entry["models"]),
+                }
+        return data
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Descarga concurrente de páginas de resultados y extracción del texto principal
+Límites por host, timeouts estrictos, tamaño máximo y caché en disco por URL y ETag
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+PAGE_CACHE_DIR = ".page_cache"
+CACHE_TTL_SECONDS = 24 * 3600
+
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 2
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_FETCH_SECONDS = 15          # tiempo total máximo por página (incluida la descarga del cuerpo)
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+MAX_TEXT_CHARS = 20000
+USER_AGENT = "Mozilla/5.0 (compatible; BlogAutomationBot/1.0)"
+
+# Elementos que nunca forman parte del artículo
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg", "button"]
+TEXT_TAGS = ["h1", "h2", "h3", "h4", "p", "li", "blockquote", "pre"]
+
+
+class PageCache:
+    """Caché en disco de documentos extraídos: un JSON por URL (nombre = sha256 de la URL)"""
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("url") == url else None
+        except (OSError, ValueError):
+            return None
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(entry["url"]))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def extract_main_text(html, encoding: Optional[str] = None) -> Dict[str, str]:
+    """Extrae título y texto principal de una página HTML (str, o bytes con su charset si se conoce)"""
+    if isinstance(html, bytes):
+        soup = BeautifulSoup(html, "html.parser", from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+
+    title = ""
+    og_title = soup.find("meta", attrs={"property": "og:title"})
+    if og_title and og_title.get("content"):
+        title = og_title["content"].strip()
+    elif soup.title and soup.title.string:
+        title = soup.title.string.strip()
+
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    # Preferir <article>/<main>; si no, el bloque con más texto en párrafos
+    container = soup.find("article") or soup.find("main")
+    if container is None:
+        candidates = soup.find_all(["div", "section"]) or [soup]
+        container = max(candidates, key=lambda el: sum(len(p.get_text()) for p in el.find_all("p", recursive=False)))
+        if not container.find_all("p", recursive=False):
+            container = soup.body or soup
+
+    blocks = []
+    for element in container.find_all(TEXT_TAGS):
+        # Evitar duplicar texto de <p> dentro de <li>/<blockquote>
+        if element.find_parent(TEXT_TAGS) is not None:
+            continue
+        text = re.sub(r"\s+", " ", element.get_text(" ", strip=True))
+        if len(text) >= 20 or element.name.startswith("h"):
+            blocks.append(text)
+
+    text = "\n".join(blocks)
+    if not text:
+        text = re.sub(r"\s+", " ", container.get_text(" ", strip=True))
+    return {"title": title, "text": text[:MAX_TEXT_CHARS]}
+
+
+class PageFetcher:
+    """
+    Descarga páginas en paralelo con:
+    - Límite de conexiones simultáneas por host
+    - Timeouts de conexión/lectura y tiempo total por página
+    - Tamaño máximo de descarga
+    - Caché en disco con revalidación por ETag / Last-Modified
+    """
+
+    def __init__(self, cache_dir: str = PAGE_CACHE_DIR, max_workers: int = MAX_WORKERS,
+                 per_host_limit: int = PER_HOST_LIMIT, max_bytes: int = MAX_PAGE_BYTES,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_fetch_seconds: float = MAX_FETCH_SECONDS,
+                 cache_ttl: float = CACHE_TTL_SECONDS):
+        self.cache = PageCache(cache_dir)
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_fetch_seconds = max_fetch_seconds
+        self.cache_ttl = cache_ttl
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"})
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def _download(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        """GET en streaming respetando tamaño y tiempo máximos"""
+        started = time.monotonic()
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True, allow_redirects=True) as response:
+            if response.status_code == 304:
+                return {"status": 304}
+            if response.status_code != 200:
+                return {"status": response.status_code, "error": f"HTTP {response.status_code}"}
+
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type.lower():
+                return {"status": response.status_code, "error": f"Unsupported content type: {content_type}"}
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                return {"status": response.status_code, "error": f"Page too large ({declared} bytes)"}
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=16384):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    return {"status": response.status_code, "error": f"Page exceeds {self.max_bytes} bytes"}
+                if time.monotonic() - started > self.max_fetch_seconds:
+                    return {"status": response.status_code, "error": f"Fetch exceeded {self.max_fetch_seconds}s"}
+                chunks.append(chunk)
+
+            # Solo fiarse del charset declarado en la cabecera; si no, BeautifulSoup lo detecta
+            charset = re.search(r"charset=([\w-]+)", content_type, re.IGNORECASE)
+            return {
+                "status": 200,
+                "html": b"".join(chunks),
+                "encoding": charset.group(1) if charset else None,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+
+    def fetch(self, url: str) -> Dict[str, Any]:
+        """
+        Descarga y extrae una página
+
+        Returns:
+        - {"url", "title", "text", "from_cache": bool} si todo bien
+        - {"url", "error": str} si falla
+        """
+        cached = self.cache.get(url)
+        if cached and time.time() - cached.get("fetched_at", 0) < self.cache_ttl:
+            return {"url": url, "title": cached["title"], "text": cached["text"], "from_cache": True}
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            with self._host_semaphore(url):
+                result = self._download(url, headers)
+        except requests.RequestException as e:
+            if cached:  # Mejor contenido algo antiguo que nada
+                return {"url": url, "title": cached["title"], "text": cached["text"], "from_cache": True}
+            return {"url": url, "error": str(e)}
+
+        if result["status"] == 304 and cached:
+            cached["fetched_at"] = time.time()
+            self.cache.put(cached)
+            return {"url": url, "title": cached["title"], "text": cached["text"], "from_cache": True}
+        if "error" in result:
+            return {"url": url, "error": result["error"]}
+
+        extracted = extract_main_text(result["html"], result["encoding"])
+        self.cache.put({
+            "url": url,
+            "etag": result["etag"],
+            "last_modified": result["last_modified"],
+            "fetched_at": time.time(),
+            "title": extracted["title"],
+            "text": extracted["text"],
+        })
+        return {"url": url, "title": extracted["title"], "text": extracted["text"], "from_cache": False}
+
+    def fetch_many(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Descarga varias páginas en paralelo; devuelve los resultados en el mismo orden"""
+        urls = [url for url in urls if url]
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(self.fetch, urls))
+
+
+_shared_fetcher: Optional[PageFetcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """Fetcher compartido por todas las herramientas del proceso (reutiliza sesión HTTP y límites)"""
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = PageFetcher(cache_dir=os.getenv("PAGE_CACHE_DIR", PAGE_CACHE_DIR))
+        return _shared_fetcher
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Escrituras seguras en la colección de posts (blog_posts.json)
+
+- Bloqueo de archivo (entre procesos) + lock por ruta (entre hilos) en cada lectura-modificación-escritura
+- Escritura atómica: archivo temporal en el mismo directorio, fsync, rename y fsync del directorio
+- Una colección corrupta es un error, nunca se reinicia a []
+- Group commit opcional: los posts que llegan a la vez se fusionan en una sola escritura
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+COLLECTION_FILE = "blog_posts.json"
+DEFAULT_LOCK_TIMEOUT = 30
+DEFAULT_GROUP_COMMIT_WINDOW_MS = 50
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CollectionCorruptedError(ValueError):
+    """blog_posts.json existe pero no es una lista JSON válida: hay que repararlo a mano"""
+
+
+def group_commit_enabled() -> bool:
+    return os.getenv("DEPLOY_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+
+def _try_lock_file(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def collection_lock(path: str = COLLECTION_FILE, timeout: float = None):
+    """Lock exclusivo sobre <path>.lock; TimeoutError si otro deploy lo retiene más de timeout segundos"""
+    path = os.path.abspath(path)
+    timeout = timeout or float(os.getenv("COLLECTION_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT))
+    deadline = time.monotonic() + timeout
+    thread_lock = _thread_lock(path)
+    if not thread_lock.acquire(timeout=timeout):
+        raise TimeoutError(f"Timeout esperando el lock de {path}")
+    try:
+        fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while not _try_lock_file(fd):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timeout esperando el lock de {path}")
+                time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                _unlock_file(fd)
+        finally:
+            os.close(fd)
+    finally:
+        thread_lock.release()
+
+
+def load_collection(path: str = COLLECTION_FILE) -> List[Dict[str, Any]]:
+    """Posts de la colección ([] si aún no existe); CollectionCorruptedError si no se puede leer"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            posts = json.load(f)
+        except json.JSONDecodeError as e:
+            raise CollectionCorruptedError(f"{path} no es JSON válido: {e}") from e
+    if not isinstance(posts, list):
+        raise CollectionCorruptedError(f"{path} no contiene una lista de posts")
+    return posts
+
+
+def serialize_collection(posts: List[Dict[str, Any]]) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Mismo JSON que json.dump(posts, indent=2) y el tramo (offset, length) en bytes de cada post"""
+    if not posts:
+        return b"[]", []
+    chunks, spans, position = [b"[\n"], [], 2
+    for i, post in enumerate(posts):
+        body = ("  " + json.dumps(post, indent=2, ensure_ascii=False).replace("\n", "\n  ")).encode("utf-8")
+        separator = b",\n" if i < len(posts) - 1 else b"\n]"
+        spans.append((position + 2, len(body) - 2))
+        chunks += [body, separator]
+        position += len(body) + len(separator)
+    return b"".join(chunks), spans
+
+
+def write_collection(posts: List[Dict[str, Any]], path: str = COLLECTION_FILE) -> List[Tuple[int, int]]:
+    """
+    Escritura atómica y durable: un fallo a mitad deja intacta la versión anterior.
+    Devuelve el tramo en bytes de cada post (ver post_query: el índice se actualiza sin releer el archivo)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    data, spans = serialize_collection(posts)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".blog_posts_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):  # el rename también debe llegar a disco
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return spans
+
+
+# before_write(colección, n_nuevos): ajusta la colección (p. ej. posts relacionados) bajo el mismo lock
+BeforeWrite = Callable[[List[Dict[str, Any]], int], None]
+# after_write(colección, tramos): se entera de lo escrito (p. ej. el índice de consultas) sin soltar el lock
+AfterWrite = Callable[[List[Dict[str, Any]], List[Tuple[int, int]]], None]
+
+
+def append_posts(posts: List[Dict[str, Any]], path: str = COLLECTION_FILE,
+                 before_write: Optional[BeforeWrite] = None, after_write: Optional[AfterWrite] = None) -> int:
+    """Añade posts a la colección bajo lock en una única escritura. Devuelve el total de posts"""
+    with collection_lock(path):
+        collection = load_collection(path)
+        collection.extend(posts)
+        if before_write is not None:
+            before_write(collection, len(posts))
+        spans = write_collection(collection, path)
+        if after_write is not None:
+            after_write(collection, spans)
+        return len(collection)
+
+
+class GroupCommitter:
+    """
+    Fusiona los deploys concurrentes en una escritura: el primero en llegar espera una ventana
+    corta, recoge todo lo encolado y lo escribe de una vez; los demás esperan su confirmación
+    """
+
+    def __init__(self, path: str = COLLECTION_FILE, window_ms: float = None,
+                 before_write: Optional[BeforeWrite] = None, after_write: Optional[AfterWrite] = None):
+        self.path = path
+        self.before_write = before_write
+        self.after_write = after_write
+        self.window = (window_ms if window_ms is not None
+                       else float(os.getenv("DEPLOY_GROUP_COMMIT_WINDOW_MS", DEFAULT_GROUP_COMMIT_WINDOW_MS))) / 1000
+        self.stats = {"commits": 0, "posts": 0}
+        self._pending: List[Dict[str, Any]] = []
+        self._leader_active = False
+        self._lock = threading.Lock()
+
+    def submit(self, post: Dict[str, Any]) -> int:
+        """Encola un post y bloquea hasta que está escrito en disco. Devuelve el total de posts"""
+        entry = {"post": post, "done": threading.Event(), "error": None, "total": None}
+        with self._lock:
+            self._pending.append(entry)
+            leader = not self._leader_active
+            self._leader_active = True
+        if leader:
+            time.sleep(self.window)
+            self._drain()
+        entry["done"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry["total"]
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._leader_active = False
+                    return
+            try:
+                total = append_posts([entry["post"] for entry in batch], self.path, self.before_write,
+                                     self.after_write)
+                self.stats["commits"] += 1
+                self.stats["posts"] += len(batch)
+            except Exception as e:
+                total = None
+                for entry in batch:
+                    entry["error"] = e
+            for entry in batch:
+                entry["total"] = total
+                entry["done"].set()
+
+
+_committers: Dict[str, GroupCommitter] = {}
+_committers_lock = threading.Lock()
+
+
+def get_group_committer(path: str = COLLECTION_FILE, before_write: Optional[BeforeWrite] = None,
+                        after_write: Optional[AfterWrite] = None) -> GroupCommitter:
+    with _committers_lock:
+        committer = _committers.setdefault(os.path.abspath(path), GroupCommitter(path))
+        if before_write is not None:
+            committer.before_write = before_write
+        if after_write is not None:
+            committer.after_write = after_write
+        return committer
+
+
+def deploy_post(post: Dict[str, Any], path: str = COLLECTION_FILE,
+                before_write: Optional[BeforeWrite] = None, after_write: Optional[AfterWrite] = None) -> int:
+    """Añade un post a la colección (vía group commit si DEPLOY_GROUP_COMMIT). Devuelve el total de posts"""
+    if group_commit_enabled():
+        return get_group_committer(path, before_write, after_write).submit(post)
+    return append_posts([post], path, before_write, after_write)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+API de consulta sobre blog_posts.json con índices secundarios precalculados
+
+El índice guarda, por post, sus metadatos (slug, fecha, autor, label, título) y su posición
+en bytes dentro de la colección, más índices por slug, autor, label y fecha. Las consultas
+no cargan el contenido de ningún post; get() lee solo el tramo del post pedido (mmap).
+El deploy lo actualiza con los posts en memoria y los tramos de la escritura (update_query_index):
+solo se reconstruye releyendo el archivo si la colección cambió por otra vía.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+
+from post_collection import COLLECTION_FILE
+from structured_logging import get_logger
+
+log = get_logger("post_query")
+
+QUERY_INDEX_FILE = "blog_posts.idx.json"
+QUERY_INDEX_VERSION = 1
+
+# Strings JSON completos (con escapes) o llaves: lo único que importa para delimitar objetos
+_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}]', re.DOTALL)
+_DATE_RE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+
+ROW_FIELDS = ("slug", "date", "author", "label", "title", "offset", "length")
+
+
+def iso_date(date: str) -> str:
+    """'21/07/2025' -> '2025-07-21' (ordenable); '' si no tiene formato DD/MM/YYYY"""
+    match = _DATE_RE.match(date or "")
+    return f"{match.group(3)}-{match.group(2)}-{match.group(1)}" if match else ""
+
+
+def scan_collection(path: str = COLLECTION_FILE):
+    """Recorre la colección con mmap y devuelve (offset, length) de cada post sin cargar el archivo entero"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        depth, start = 0, None
+        for match in _TOKEN_RE.finditer(data):
+            token = match.group()
+            if token == b"{":
+                depth += 1
+                if depth == 1:
+                    start = match.start()
+            elif token == b"}":
+                depth -= 1
+                if depth == 0 and start is not None:
+                    yield start, match.end() - start
+                    start = None
+
+
+def _row(post: Dict[str, Any], offset: int, length: int) -> List[Any]:
+    return [str(post.get("slug", "")), iso_date(post.get("date", "")), str(post.get("author", "")),
+            str(post.get("label", "")), str(post.get("title", "")), offset, length]
+
+
+def _collection_signature(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class PostQueryIndex:
+    """Filas de metadatos + índices secundarios (slug, autor, label, fecha) sobre una colección"""
+
+    def __init__(self, rows: List[List[Any]], signature: Optional[List[int]] = None):
+        self.rows = rows
+        self.signature = signature
+        self.by_slug: Dict[str, int] = {}
+        self.by_author: Dict[str, List[int]] = {}
+        self.by_label: Dict[str, List[int]] = {}
+        for i, (slug, date, author, label, *_rest) in enumerate(rows):
+            self.by_slug[slug] = i  # con slugs repetidos gana el último publicado
+            self.by_author.setdefault(author.lower(), []).append(i)
+            self.by_label.setdefault(label.lower(), []).append(i)
+        # Filas ordenadas por (fecha, posición): las más recientes al final
+        self.by_date = sorted(range(len(rows)), key=lambda i: (rows[i][1], i))
+        self._dates = [rows[i][1] for i in self.by_date]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def build(cls, path: str = COLLECTION_FILE) -> "PostQueryIndex":
+        """Una pasada por la colección: cada post se parsea por separado y se descarta su contenido"""
+        rows = []
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset, length in scan_collection(path):
+                    rows.append(_row(json.loads(data[offset:offset + length]), offset, length))
+        return cls(rows, _collection_signature(path) if os.path.exists(path) else None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": QUERY_INDEX_VERSION, "signature": self.signature, "fields": ROW_FIELDS, "rows": self.rows}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PostQueryIndex":
+        if data.get("version") != QUERY_INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+        return cls(data["rows"], data.get("signature"))
+
+    def save(self, path: str = QUERY_INDEX_FILE) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".query_index_", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    def query(self, author: str = None, label: str = None, date_from: str = None, date_to: str = None,
+              limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Metadatos de los posts que cumplen todos los filtros, del más reciente al más antiguo
+        (fechas en DD/MM/YYYY, rango inclusivo)
+        """
+        low = bisect.bisect_left(self._dates, iso_date(date_from)) if date_from else 0
+        high = bisect.bisect_right(self._dates, iso_date(date_to)) if date_to else len(self._dates)
+        candidates = self.by_date[low:high]
+        for key, index in ((author, self.by_author), (label, self.by_label)):
+            if key is not None:
+                allowed = set(index.get(key.lower(), ()))
+                candidates = [i for i in candidates if i in allowed]
+        selected = candidates[::-1][offset:]
+        if limit is not None:
+            selected = selected[:limit]
+        return [self.describe(i) for i in selected]
+
+    def latest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.query(limit=limit)
+
+    def describe(self, row: int) -> Dict[str, Any]:
+        slug, date, author, label, title, _offset, _length = self.rows[row]
+        display_date = "/".join(reversed(date.split("-"))) if date else ""
+        return {"slug": slug, "date": display_date, "author": author, "label": label, "title": title}
+
+
+# Caché en proceso: (ruta del índice) -> índice
+_query_cache: Dict[str, PostQueryIndex] = {}
+
+
+def load_query_index(index_path: str = QUERY_INDEX_FILE, collection_path: str = COLLECTION_FILE) -> PostQueryIndex:
+    """Índice vigente: de memoria o disco si coincide con la colección actual, si no se reconstruye"""
+    abs_path = os.path.abspath(index_path)
+    signature = _collection_signature(collection_path) if os.path.exists(collection_path) else None
+    index = _query_cache.get(abs_path)
+    if index is None or index.signature != signature:
+        try:
+            with open(abs_path, "r", encoding="utf-8") as f:
+                index = PostQueryIndex.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is None or index.signature != signature:
+            index = PostQueryIndex.build(collection_path)
+            index.save(abs_path)
+        _query_cache[abs_path] = index
+    return index
+
+
+def update_query_index(collection: List[Dict[str, Any]], spans: List[Tuple[int, int]],
+                       index_path: str = QUERY_INDEX_FILE, collection_path: str = COLLECTION_FILE) -> PostQueryIndex:
+    """
+    after_write del deploy (bajo el lock de la colección): filas a partir de los posts en memoria y los
+    tramos recién escritos, sin volver a recorrer ni parsear el archivo
+    """
+    rows = [_row(post, offset, length) for post, (offset, length) in zip(collection, spans)]
+    index = PostQueryIndex(rows, _collection_signature(collection_path))
+    abs_path = os.path.abspath(index_path)
+    index.save(abs_path)
+    _query_cache[abs_path] = index
+    return index
+
+
+def update_query_index_safely(collection: List[Dict[str, Any]], spans: List[Tuple[int, int]],
+                              index_path: str = QUERY_INDEX_FILE, collection_path: str = COLLECTION_FILE) -> None:
+    """Un fallo del índice no debe impedir publicar el post: la siguiente consulta lo reconstruye"""
+    try:
+        update_query_index(collection, spans, index_path, collection_path)
+    except Exception as e:
+        log.warning("⚠️ Could not update query index: %s", e)
+
+
+def get_post(slug: str, index_path: str = QUERY_INDEX_FILE,
+             collection_path: str = COLLECTION_FILE) -> Optional[Dict[str, Any]]:
+    """Post completo (con contenido) leyendo solo su tramo de la colección"""
+    index = load_query_index(index_path, collection_path)
+    row = index.by_slug.get(slug)
+    if row is None:
+        return None
+    offset, length = index.rows[row][5], index.rows[row][6]
+    with open(collection_path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def query_posts(author: str = None, label: str = None, date_from: str = None, date_to: str = None,
+                limit: int = None, offset: int = 0, index_path: str = QUERY_INDEX_FILE,
+                collection_path: str = COLLECTION_FILE) -> List[Dict[str, Any]]:
+    """API de consulta: 'últimos 10 posts', 'posts de Leire Legarreta en 2025', ..."""
+    index = load_query_index(index_path, collection_path)
+    return index.query(author, label, date_from, date_to, limit, offset)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consultas indexadas sobre blog_posts.json")
+    parser.add_argument("--author", help="Autor exacto (sin distinguir mayúsculas)")
+    parser.add_argument("--label", help="Label exacto (sin distinguir mayúsculas)")
+    parser.add_argument("--since", help="Desde esta fecha (DD/MM/YYYY, incluida)")
+    parser.add_argument("--until", help="Hasta esta fecha (DD/MM/YYYY, incluida)")
+    parser.add_argument("--year", type=int, help="Atajo para --since 01/01/AAAA --until 31/12/AAAA")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--slug", help="Imprime el post completo con este slug")
+    parser.add_argument("--index", default=QUERY_INDEX_FILE)
+    parser.add_argument("--collection", default=COLLECTION_FILE)
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruye el índice desde la colección")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index = PostQueryIndex.build(args.collection)
+        index.save(args.index)
+        _query_cache[os.path.abspath(args.index)] = index
+        print(f"✅ Índice reconstruido: {len(index)} posts -> {args.index}")
+
+    if args.slug:
+        post = get_post(args.slug, args.index, args.collection)
+        if post is None:
+            print(f"🔍 No existe ningún post con slug '{args.slug}'")
+            sys.exit(1)
+        print(json.dumps(post, indent=2, ensure_ascii=False))
+        sys.exit(0)
+
+    since, until = args.since, args.until
+    if args.year:
+        since, until = since or f"01/01/{args.year}", until or f"31/12/{args.year}"
+    hits = query_posts(args.author, args.label, since, until, args.limit, args.offset, args.index, args.collection)
+    if not hits:
+        print("🔍 Sin resultados")
+    for hit in hits:
+        print(f"  {hit['date']}  {hit['author']:<16}  {hit['title']}  ({hit['slug']})")
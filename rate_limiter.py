@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Rate limiting compartido para todas las APIs externas (LLM, Serper, Slack, git remote)
+Un token bucket adaptativo por proveedor, compartido por herramientas y pipelines del proceso
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+# Peticiones por minuto por defecto (configurables con RATE_LIMIT_<PROVEEDOR>_RPM)
+DEFAULT_RPM = {
+    "llm": 10,      # equivalente al antiguo max_rpm=10 del Crew de contenido
+    "serper": 60,
+    "slack": 50,    # Slack tier 3 ~50 req/min
+    "git": 6,
+}
+FALLBACK_RPM = 30
+
+# Tras un 429 la tasa se multiplica por este factor; cada éxito recupera una fracción de la tasa base
+BACKOFF_FACTOR = 0.5
+RECOVERY_FRACTION = 0.05
+MIN_RATE_FRACTION = 0.1
+DEFAULT_RETRY_AFTER = 5.0
+MAX_RETRY_AFTER = 300.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convierte la cabecera Retry-After (segundos o fecha HTTP) a segundos de espera"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket thread-safe con reserva: cada llamada reserva su turno y duerme fuera del lock
+
+    - 429 -> reduce la tasa (multiplicativo) y respeta Retry-After bloqueando el bucket
+    - éxito -> recupera la tasa poco a poco hasta la base (aditivo)
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: Optional[int] = None):
+        self.name = name
+        self.base_rate = rate_per_minute / 60.0
+        self.rate = self.base_rate
+        self.burst = burst or max(1, int(rate_per_minute // 6))
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.calls = 0
+        self.throttled_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited_responses = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self) -> float:
+        """Espera hasta que haya cupo. Devuelve los segundos de espera en cola"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(self.blocked_until - now, -self.tokens / self.rate if self.tokens < 0 else 0.0)
+            self.calls += 1
+            if wait > 0:
+                self.throttled_calls += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_response(self, status_code: int, headers: Optional[Dict[str, Any]] = None) -> None:
+        """Adapta la tasa según la respuesta del proveedor"""
+        if status_code == 429:
+            retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+            self.on_rate_limited(retry_after)
+        elif status_code < 400:
+            with self._lock:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_FRACTION)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate_limited_responses += 1
+            self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate * BACKOFF_FACTOR)
+            pause = min(MAX_RETRY_AFTER, retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled_calls": self.throttled_calls,
+                "queue_delay_total_s": round(self.total_wait, 3),
+                "queue_delay_max_s": round(self.max_wait, 3),
+                "queue_delay_avg_s": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+                "rate_limited_responses": self.rate_limited_responses,
+                "current_rpm": round(self.rate * 60, 2),
+                "base_rpm": round(self.base_rate * 60, 2),
+            }
+
+
+_limiters: Dict[str, AdaptiveTokenBucket] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> AdaptiveTokenBucket:
+    """Limiter compartido del proveedor (uno por proceso)"""
+    with _registry_lock:
+        if provider not in _limiters:
+            rpm = float(os.getenv(f"RATE_LIMIT_{provider.upper()}_RPM", DEFAULT_RPM.get(provider, FALLBACK_RPM)))
+            _limiters[provider] = AdaptiveTokenBucket(provider, rpm)
+        return _limiters[provider]
+
+
+def rate_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todos los limiters usados en el proceso (incluye el retraso de cola)"""
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
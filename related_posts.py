@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Posts relacionados para enlazado interno, calculados en el deploy
+
+- Vectores TF-IDF (tokenización en español de search_index) en una matriz dispersa CSR (arrays de NumPy,
+  producto con scipy.sparse) guardada en disco (blog_related.npz): cada deploy añade filas, no recalcula el archivo
+- Las frecuencias se guardan crudas y el IDF se aplica al consultar, así añadir posts no invalida filas;
+  las listas de los posts antiguos no se recalculan con cada cambio de IDF (para eso está --rebuild)
+- Un deploy calcula los top-k vecinos de los posts nuevos con un solo producto disperso x denso
+  y actualiza la lista de los posts existentes en los que un post nuevo entra en su top-k
+- Cada post de blog_posts.json lleva sus relacionados en "relatedPosts" (slugs)
+"""
+
+import math
+import os
+import sys
+import tempfile
+from typing import Dict, Any, List, Optional, Set
+
+import numpy as np
+import scipy.sparse as sparse
+
+from post_collection import COLLECTION_FILE, collection_lock, load_collection, write_collection
+from search_index import term_frequencies
+from structured_logging import get_logger
+
+log = get_logger("related_posts")
+
+RELATED_FILE = "blog_related.npz"
+RELATED_FIELD = "relatedPosts"
+MATRIX_VERSION = 1
+DEFAULT_RELATED_K = 3
+# Filas por bloque al reconstruir la matriz completa (acota la memoria de las consultas y los scores densos)
+REBUILD_BLOCK = 64
+
+
+def related_k() -> int:
+    return int(os.getenv("RELATED_POSTS_K", DEFAULT_RELATED_K))
+
+
+class RelatedPostsMatrix:
+    """
+    Fila i = post i de la colección (mismo orden). CSR: indptr / indices (término) / data (1 + log tf).
+    related_idx / related_score: top-k vecinos de cada fila (-1 = hueco)
+    """
+
+    def __init__(self, k: int = DEFAULT_RELATED_K):
+        self.k = k
+        self.slugs: List[str] = []
+        self.vocab: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.related_idx = np.full((0, k), -1, dtype=np.int32)
+        self.related_score = np.zeros((0, k), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def _append_rows(self, posts: List[Dict[str, Any]]) -> None:
+        """Vectoriza los posts, amplía vocabulario y document frequency y añade sus filas"""
+        indices, data, lengths = [], [], []
+        for post in posts:
+            row = sorted((self.vocab.setdefault(term, len(self.vocab)), 1 + math.log(freq))
+                         for term, freq in term_frequencies(post).items())
+            indices.extend(column for column, _ in row)
+            data.extend(weight for _, weight in row)
+            lengths.append(len(row))
+            self.slugs.append(str(post.get("slug") or ""))
+        new_indices = np.asarray(indices, dtype=np.int32)
+        self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int32)])
+        np.add.at(self.df, new_indices, 1)
+        self.indices = np.concatenate([self.indices, new_indices])
+        self.data = np.concatenate([self.data, np.asarray(data, dtype=np.float32)])
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths, dtype=np.int64)])
+        self.related_idx = np.vstack([self.related_idx, np.full((len(posts), self.k), -1, dtype=np.int32)])
+        self.related_score = np.vstack([self.related_score, np.zeros((len(posts), self.k), dtype=np.float32)])
+
+    def _similarities(self, rows: np.ndarray) -> np.ndarray:
+        """Coseno TF-IDF de todas las filas contra las filas indicadas: matriz (n_posts, len(rows))"""
+        n = len(self.slugs)
+        idf = (np.log((1 + n) / (1 + self.df)) + 1).astype(np.float32)
+        vectors = sparse.csr_matrix((self.data * idf[self.indices], self.indices, self.indptr),
+                                    shape=(n, len(self.vocab)))
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        vectors = sparse.diags((1 / norms).astype(np.float32)) @ vectors
+
+        # CSR x denso: solo las consultas (vocabulario x len(rows)) y el resultado son densos
+        queries = vectors[rows].T.toarray()
+        return np.asarray(vectors @ queries, dtype=np.float32)
+
+    @staticmethod
+    def _top_k(candidate_idx: np.ndarray, candidate_score: np.ndarray, k: int):
+        """Top-k por fila entre candidatos (índice, score); los scores <= 0 dejan hueco (-1)"""
+        order = np.argsort(-candidate_score, axis=1, kind="stable")[:, :k]
+        idx = np.take_along_axis(candidate_idx, order, axis=1)
+        score = np.take_along_axis(candidate_score, order, axis=1)
+        idx[score <= 0] = -1
+        score[score <= 0] = 0
+        return idx.astype(np.int32), score.astype(np.float32)
+
+    def add_posts(self, posts: List[Dict[str, Any]]) -> Set[int]:
+        """Añade posts nuevos; devuelve las filas cuya lista de relacionados cambió (incluidas las nuevas)"""
+        if not posts:
+            return set()
+        first = len(self.slugs)
+        self._append_rows(posts)
+        new_rows = np.arange(first, len(self.slugs))
+        scores = self._similarities(new_rows)             # (n, nuevos)
+        scores[new_rows, np.arange(len(new_rows))] = -1   # un post no es relacionado de sí mismo
+
+        # Filas nuevas: top-k sobre todo el archivo
+        all_rows = np.broadcast_to(np.arange(len(self.slugs)), (len(new_rows), len(self.slugs)))
+        self.related_idx[new_rows], self.related_score[new_rows] = self._top_k(all_rows, scores.T, self.k)
+
+        # Filas existentes: sus k actuales + los nuevos como candidatos
+        old = slice(0, first)
+        before = self.related_idx[old].copy()
+        candidate_idx = np.hstack([self.related_idx[old], np.broadcast_to(new_rows, (first, len(new_rows)))])
+        current_score = np.where(self.related_idx[old] >= 0, self.related_score[old], 0)
+        candidate_score = np.hstack([current_score, scores[old]])
+        self.related_idx[old], self.related_score[old] = self._top_k(candidate_idx, candidate_score, self.k)
+        changed = np.nonzero((self.related_idx[old] != before).any(axis=1))[0]
+        return set(changed.tolist()) | set(new_rows.tolist())
+
+    @classmethod
+    def build(cls, posts: List[Dict[str, Any]], k: int = DEFAULT_RELATED_K) -> "RelatedPostsMatrix":
+        """Matriz completa desde la colección (bloques de consultas; solo sin matriz previa o desincronizada)"""
+        matrix = cls(k)
+        matrix._append_rows(posts)
+        n = len(matrix.slugs)
+        for start in range(0, n, REBUILD_BLOCK):
+            rows = np.arange(start, min(start + REBUILD_BLOCK, n))
+            scores = matrix._similarities(rows)
+            scores[rows, np.arange(len(rows))] = -1
+            all_rows = np.broadcast_to(np.arange(n), (len(rows), n))
+            matrix.related_idx[rows], matrix.related_score[rows] = cls._top_k(all_rows, scores.T, k)
+        return matrix
+
+    def related(self, row: int) -> List[str]:
+        return [self.slugs[i] for i in self.related_idx[row] if i >= 0 and self.slugs[i]]
+
+    def save(self, path: str = RELATED_FILE) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".related_", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, version=MATRIX_VERSION, k=self.k, slugs=np.array(self.slugs, dtype=str),
+                         vocab=np.array(list(self.vocab), dtype=str), df=self.df, indptr=self.indptr,
+                         indices=self.indices, data=self.data, related_idx=self.related_idx,
+                         related_score=self.related_score)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str = RELATED_FILE) -> "RelatedPostsMatrix":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != MATRIX_VERSION:
+                raise ValueError(f"Versión de matriz no soportada: {int(data['version'])}")
+            matrix = cls(int(data["k"]))
+            matrix.slugs = data["slugs"].tolist()
+            matrix.vocab = {term: i for i, term in enumerate(data["vocab"].tolist())}
+            for name in ("df", "indptr", "indices", "data", "related_idx", "related_score"):
+                setattr(matrix, name, data[name])
+        return matrix
+
+
+# Caché en proceso: (ruta) -> ((tamaño, mtime), matriz)
+_matrix_cache: Dict[str, Any] = {}
+
+
+def _load_matrix(path: str) -> Optional[RelatedPostsMatrix]:
+    abs_path = os.path.abspath(path)
+    try:
+        stat = os.stat(abs_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = _matrix_cache.get(abs_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        matrix = RelatedPostsMatrix.load(abs_path)
+    except (OSError, ValueError, KeyError):
+        return None
+    _matrix_cache[abs_path] = (signature, matrix)
+    return matrix
+
+
+def _save_matrix(matrix: RelatedPostsMatrix, path: str) -> None:
+    abs_path = os.path.abspath(path)
+    matrix.save(abs_path)
+    stat = os.stat(abs_path)
+    _matrix_cache[abs_path] = ((stat.st_size, stat.st_mtime_ns), matrix)
+
+
+def link_related_posts(collection: List[Dict[str, Any]], new_count: int, path: str = RELATED_FILE,
+                       k: int = None) -> int:
+    """
+    Se ejecuta bajo el lock de la colección, justo antes de escribirla (ver append_posts):
+    los últimos new_count posts son los nuevos. Rellena "relatedPosts" de los nuevos y de los
+    vecinos afectados. Devuelve cuántos posts cambiaron
+    """
+    k = k or related_k()
+    existing = collection[:len(collection) - new_count]
+    matrix = _load_matrix(path)
+    if (matrix is None or matrix.k != k
+            or matrix.slugs != [str(post.get("slug") or "") for post in existing]):
+        matrix = RelatedPostsMatrix.build(existing, k)  # primera vez o colección editada a mano
+        changed = set(range(len(existing)))
+    else:
+        changed = set()
+    changed |= matrix.add_posts(collection[len(existing):])
+    for row in changed:
+        collection[row][RELATED_FIELD] = matrix.related(row)
+    _save_matrix(matrix, path)
+    return len(changed)
+
+
+def link_related_posts_safely(collection: List[Dict[str, Any]], new_count: int, path: str = RELATED_FILE) -> None:
+    """before_write del deploy: un fallo aquí no debe impedir publicar el post"""
+    try:
+        changed = link_related_posts(collection, new_count, path)
+        log.debug("Related posts updated for %s posts", changed)
+    except Exception as e:
+        log.warning("⚠️ Could not update related posts: %s", e)
+
+
+def backfill_related_posts(collection_path: str = COLLECTION_FILE, path: str = RELATED_FILE) -> int:
+    """Recalcula la matriz y los relacionados de toda la colección (bajo lock). Devuelve el número de posts"""
+    with collection_lock(collection_path):
+        collection = load_collection(collection_path)
+        matrix = RelatedPostsMatrix.build(collection, related_k())
+        for row, post in enumerate(collection):
+            post[RELATED_FIELD] = matrix.related(row)
+        write_collection(collection, collection_path)
+        _save_matrix(matrix, path)
+    return len(collection)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Posts relacionados (TF-IDF) de blog_posts.json")
+    parser.add_argument("slug", nargs="?", help="Muestra los relacionados de este post")
+    parser.add_argument("--matrix", default=RELATED_FILE)
+    parser.add_argument("--collection", default=COLLECTION_FILE)
+    parser.add_argument("--rebuild", action="store_true", help="Recalcula la matriz y relatedPosts de todos los posts")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        total = backfill_related_posts(args.collection, args.matrix)
+        print(f"✅ Relacionados recalculados para {total} posts -> {args.matrix}")
+
+    if args.slug:
+        matrix = _load_matrix(args.matrix)
+        if matrix is None or args.slug not in matrix.slugs:
+            print(f"🔍 '{args.slug}' no está en la matriz (prueba --rebuild)")
+            sys.exit(1)
+        row = len(matrix.slugs) - 1 - matrix.slugs[::-1].index(args.slug)
+        for slug, score in zip(matrix.related(row), matrix.related_score[row]):
+            print(f"  {score:.3f}  {slug}")
+    elif not args.rebuild:
+        parser.print_help()
+        sys.exit(1)
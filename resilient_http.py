@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Llamadas salientes resilientes: timeouts, reintentos con backoff exponencial y jitter,
+circuit breaker y peticiones duplicadas (hedging) cuando se supera el p95 de latencia
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from rate_limiter import AdaptiveTokenBucket, get_rate_limiter, parse_retry_after
+from structured_logging import get_logger
+
+log = get_logger("resilient_http")
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 20
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60.0
+
+# Hedging: solo cuando hay suficientes muestras para estimar el p95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Respuestas que garantizan que la petición no se procesó: se reintentan también si no es idempotente
+UNPROCESSED_STATUS = {429, 503}
+
+
+class CircuitOpenError(Exception):
+    """El circuito del proveedor está abierto: se rechaza la llamada sin intentarla"""
+
+
+class RetryableError(Exception):
+    """
+    Fallo transitorio que merece reintento (opcionalmente tras retry_after segundos).
+    processed=False: el proveedor seguro que no procesó la petición (429/503, conexión no establecida),
+    así que también se puede reintentar una llamada no idempotente
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, result: Any = None,
+                 processed: bool = True):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.result = result
+        self.processed = processed
+
+
+def never_sent(error: BaseException) -> bool:
+    """Errores de red en los que la petición no llegó a enviarse (fallo al conectar)"""
+    if isinstance(error, (requests.ConnectTimeout, ConnectionRefusedError)):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker clásico:
+    - closed: deja pasar; tras N fallos consecutivos -> open
+    - open: rechaza hasta reset_timeout; luego -> half-open
+    - half-open: deja pasar una prueba; éxito -> closed, fallo -> open. Si la prueba no informa de su
+      resultado en reset_timeout se admite otra (el circuito nunca se queda bloqueado en half-open)
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[str]:
+        """"call" si el circuito deja pasar la llamada, "probe" si es la prueba half-open, None si la rechaza"""
+        with self._lock:
+            if self.state != "closed" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self.opened_at = time.monotonic()  # plazo de la prueba
+                return "probe"
+            return "call" if self.state == "closed" else None
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half-open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias para estimar percentiles"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Backoff exponencial con full jitter: uniforme en [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ResilientClient:
+    """
+    Ejecuta llamadas a un proveedor con rate limiting, circuit breaker, reintentos y hedging
+
+    La función llamada debe lanzar RetryableError (o una excepción de red) para fallos transitorios.
+    Con idempotent=False solo se reintenta lo que el proveedor seguro que no procesó: un timeout de
+    lectura tras enviar la petición se relanza (reintentarlo podría duplicar, p. ej., un mensaje de Slack)
+    """
+
+    def __init__(self, name: str, max_retries: int = DEFAULT_MAX_RETRIES,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT), hedge: bool = False,
+                 hedge_min_samples: int = HEDGE_MIN_SAMPLES, limiter: Optional[AdaptiveTokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter or get_rate_limiter(name)
+        self.breaker = breaker or CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self.session = requests.Session()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"hedge-{name}")
+
+        # Métricas
+        self.calls = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.circuit_rejections = 0
+
+    def _timed(self, func: Callable, *args, **kwargs):
+        self.limiter.acquire()
+        started = time.monotonic()
+        result = func(*args, **kwargs)
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    def _attempt(self, func: Callable, idempotent: bool, *args, **kwargs):
+        """Un intento, con petición duplicada si tarda más que el p95 histórico"""
+        threshold = self.latency.percentile(95) if len(self.latency) >= self.hedge_min_samples else None
+        if not (self.hedge and idempotent and threshold):
+            return self._timed(func, *args, **kwargs)
+
+        primary = self._hedge_pool.submit(self._timed, func, *args, **kwargs)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        self.hedged += 1
+        backup = self._hedge_pool.submit(self._timed, func, *args, **kwargs)
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner is backup:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def call(self, func: Callable, *args, idempotent: bool = True, **kwargs):
+        """Ejecuta func(*args, **kwargs) con todas las protecciones. Relanza el último error"""
+        admitted = self.breaker.admit()
+        if admitted is None:
+            self.circuit_rejections += 1
+            raise CircuitOpenError(f"Circuit open for {self.name}: too many consecutive failures")
+
+        self.calls += 1
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = self._attempt(func, idempotent, *args, **kwargs)
+                self.breaker.record_success()
+                return result
+            except RetryableError as e:
+                last_error = e
+                delay = e.retry_after if e.retry_after is not None else backoff_delay(attempt)
+                if not idempotent and e.processed:
+                    break
+            except (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError) as e:
+                last_error = e
+                delay = backoff_delay(attempt)
+                if not idempotent and not never_sent(e):
+                    break
+            except Exception:
+                # Error no transitorio (p. ej. validación o un fallo del llamador): no dice nada de la salud del
+                # proveedor, salvo que sea la prueba half-open, que hay que resolver para no dejar el circuito colgado
+                if admitted == "probe":
+                    self.breaker.record_failure()
+                raise
+
+            if attempt >= self.max_retries:
+                break
+            self.retries += 1
+            log.warning("🔁 %s: reintento %s/%s en %.2fs (%s)", self.name, attempt + 1, self.max_retries, delay, last_error)
+            time.sleep(delay)
+
+        # El circuito cuenta llamadas fallidas (tras agotar reintentos), no intentos sueltos
+        self.breaker.record_failure()
+        if isinstance(last_error, RetryableError) and last_error.result is not None:
+            return last_error.result  # Devolver la última respuesta para que el llamador la reporte
+        raise last_error
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Petición HTTP con timeout por defecto; 429/5xx se reintentan respetando Retry-After"""
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = kwargs.pop("idempotent", method.upper() in ("GET", "HEAD", "OPTIONS"))
+
+        def send():
+            response = self.session.request(method, url, **kwargs)
+            self.limiter.on_response(response.status_code, response.headers)
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableError(f"HTTP {response.status_code}",
+                                     parse_retry_after(response.headers.get("Retry-After")), response,
+                                     processed=response.status_code not in UNPROCESSED_STATUS)
+            return response
+
+        return self.call(send, idempotent=idempotent)
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "circuit_state": self.breaker.state,
+            "circuit_rejections": self.circuit_rejections,
+            "latency_p50_s": round(p50, 3) if p50 is not None else None,
+            "latency_p95_s": round(p95, 3) if p95 is not None else None,
+        }
+
+
+_clients: Dict[str, ResilientClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_resilient_client(name: str) -> ResilientClient:
+    """
+    Cliente compartido por proveedor, configurable por entorno:
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_HEDGE (true/false)
+    """
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ResilientClient(
+                name,
+                max_retries=int(os.getenv("HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                timeout=(float(os.getenv("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                         float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT))),
+                hedge=os.getenv("HTTP_HEDGE", "false").lower() == "true",
+            )
+        return _clients[name]
+
+
+def resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    with _clients_lock:
+        clients = dict(_clients)
+    return {name: client.stats() for name, client in clients.items()}
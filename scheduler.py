@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Modo daemon: ejecuta la automatización según una expresión cron manteniendo el proceso vivo
+Imports, sesiones HTTP, clientes de Slack, cachés e índices siguen calientes entre ejecuciones
+Estado (próxima ejecución, últimos resultados) en un archivo JSON y en un endpoint HTTP local
+"""
+
+import argparse
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional, Set
+
+from structured_logging import get_logger
+
+log = get_logger("scheduler")
+
+DEFAULT_SCHEDULE = "0 9 * * 1"  # lunes a las 9:00 (hora local)
+STATUS_FILE = ".daemon_status.json"
+DEFAULT_STATUS_PORT = 8765
+MAX_RESULTS_KEPT = 10
+MAX_SLEEP_SECONDS = 60  # el bucle se despierta al menos cada minuto (cambios de hora, parada)
+
+# Claves del resultado de run_automation que se guardan en el estado (el resto no es serializable o es enorme)
+RESULT_SUMMARY_KEYS = ("status", "message", "file", "stage", "errors", "debug_file", "variants", "stage_timings",
+                       "run_id", "sites")
+
+
+class CronSchedule:
+    """
+    Expresión cron de 5 campos: minuto hora día-del-mes mes día-de-la-semana
+    Admite *, valores, listas (1,15), rangos (1-5) y pasos (*/15, 0-30/10). Domingo = 0 o 7
+    """
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        parts = self.expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        parsed = [self._parse_field(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        # Como en cron: si día del mes y día de la semana están restringidos, basta con que coincida uno
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step: '{field}'")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(value) for value in item.split("-", 1))
+            else:
+                start = end = int(item)
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron value out of range {low}-{high}: '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_run(self, after: datetime) -> datetime:
+        """Primer instante estrictamente posterior a 'after' que cumple la expresión"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months or not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: result[key] for key in RESULT_SUMMARY_KEYS if key in result}
+
+
+class DaemonStatus:
+    """Estado del daemon, compartido entre el bucle principal y el endpoint HTTP"""
+
+    def __init__(self, schedule: CronSchedule, path: str = STATUS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "schedule": schedule.expression,
+            "state": "starting",
+            "next_run": None,
+            "runs": 0,
+            "last_results": [],
+        }
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            self.data.update(fields)
+        self.save()
+
+    def record_result(self, started: datetime, duration: float, result: Dict[str, Any]) -> None:
+        entry = {"started_at": started.isoformat(timespec="seconds"), "duration_s": round(duration, 2)}
+        entry.update(summarize_result(result))
+        with self._lock:
+            self.data["runs"] += 1
+            self.data["last_results"] = ([entry] + self.data["last_results"])[:MAX_RESULTS_KEPT]
+        self.save()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.data, default=str))
+
+    def save(self) -> None:
+        """Escritura atómica para que otros procesos nunca lean un archivo a medias"""
+        data = self.snapshot()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+
+
+def start_status_server(status: DaemonStatus, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Endpoint local: GET /health (200 si el daemon está vivo) y GET /status (estado completo)"""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                snapshot = status.snapshot()
+                body = {"ok": snapshot["state"] != "stopped", "state": snapshot["state"], "next_run": snapshot["next_run"]}
+            elif self.path.rstrip("/") in ("", "/status"):
+                body = status.snapshot()
+            else:
+                self.send_error(404)
+                return
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # sin ruido en la salida del daemon
+
+    server = ThreadingHTTPServer((host, port), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="status-server").start()
+    return server
+
+
+class BlogDaemon:
+    """
+    Bucle de larga duración: espera a la siguiente ejecución del cron y lanza el job
+    El job (por defecto BlogAutomationCrew().run_automation) se construye una sola vez
+    """
+
+    def __init__(self, schedule: CronSchedule, job: Callable[[], Dict[str, Any]], status: DaemonStatus,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.schedule = schedule
+        self.job = job
+        self.status = status
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self.run_now_event = threading.Event()
+
+    def run_once(self) -> Dict[str, Any]:
+        started = self.clock()
+        self.status.update(state="running", current_run_started=started.isoformat(timespec="seconds"))
+        began = time.monotonic()
+        try:
+            result = self.job()
+        except Exception as e:
+            log.exception("❌ Error en ejecución programada")
+            result = {"status": "error", "message": f"Error en ejecución programada: {e}"}
+        self.status.record_result(started, time.monotonic() - began, result)
+        return result
+
+    def serve(self) -> None:
+        next_run = self.schedule.next_run(self.clock())
+        self.status.update(state="idle", next_run=next_run.isoformat(timespec="seconds"))
+        log.info("⏰ Daemon activo (%s). Próxima ejecución: %s", self.schedule.expression, f"{next_run:%d/%m/%Y %H:%M}")
+
+        while not self.stop_event.is_set():
+            remaining = (next_run - self.clock()).total_seconds()
+            if remaining > 0 and not self.run_now_event.is_set():
+                self.run_now_event.wait(min(remaining, MAX_SLEEP_SECONDS))
+                continue
+            self.run_now_event.clear()
+            if self.stop_event.is_set():
+                break
+
+            log.info("🚀 Ejecución programada (%s)", f"{self.clock():%d/%m/%Y %H:%M}")
+            result = self.run_once()
+            log.info("📊 Resultado: %s - %s", result.get("status"), result.get("message"))
+
+            next_run = self.schedule.next_run(self.clock())
+            self.status.update(state="idle", next_run=next_run.isoformat(timespec="seconds"), current_run_started=None)
+            log.info("⏰ Próxima ejecución: %s", f"{next_run:%d/%m/%Y %H:%M}")
+
+        self.status.update(state="stopped", next_run=None)
+
+    def stop(self, *_args) -> None:
+        self.stop_event.set()
+        self.run_now_event.set()  # despierta el bucle
+
+
+def run_sites(jobs: Dict[str, Callable[[], Dict[str, Any]]]) -> Dict[str, Any]:
+    """Una ejecución programada por sitio, en serie; con un solo sitio el resultado es el suyo tal cual"""
+    if len(jobs) == 1:
+        return next(iter(jobs.values()))()
+    results = {}
+    for name, job in jobs.items():
+        log.info("🌐 Sitio %s", name, extra={"fields": {"site": name}})
+        try:
+            results[name] = summarize_result(job())
+        except Exception as e:
+            log.exception("❌ Error en el sitio %s", name)
+            results[name] = {"status": "error", "message": f"Error en el sitio {name}: {e}"}
+    published = [name for name, result in results.items() if result.get("status") == "success"]
+    status = "success" if len(published) == len(results) else "partial" if published else "error"
+    return {"status": status, "message": f"{len(published)}/{len(results)} sitios publicados", "sites": results}
+
+
+def warm_up(sites=None) -> List[str]:
+    """Precarga lo que una ejecución en frío construiría desde cero (el índice de búsqueda de cada sitio)"""
+    from page_fetcher import get_page_fetcher
+    from resilient_http import get_resilient_client
+    from search_index import load_or_build_index
+    from site_config import get_site
+
+    warmed = []
+    get_page_fetcher()
+    get_resilient_client("serper")
+    warmed += ["page_fetcher", "serper_client"]
+    for site in sites or [get_site()]:
+        try:
+            load_or_build_index(site.search_index, site.collection)
+            warmed.append(f"search_index:{site.name}")
+        except Exception as e:
+            log.warning("⚠️ Could not preload search index for %s: %s", site.name, e)
+    if os.getenv("SLACK_BOT_TOKEN"):
+        from blog_automation import get_slack_client
+        get_slack_client(os.getenv("SLACK_BOT_TOKEN"))
+        warmed.append("slack_client")
+    return warmed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Daemon de automatización del blog con programación tipo cron")
+    parser.add_argument("--cron", default=os.getenv("SCHEDULE_CRON", DEFAULT_SCHEDULE),
+                        help=f"Expresión cron de 5 campos (por defecto '{DEFAULT_SCHEDULE}')")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STATUS_PORT", DEFAULT_STATUS_PORT)),
+                        help="Puerto del endpoint de estado local (0 = desactivado)")
+    parser.add_argument("--status-file", default=os.getenv("STATUS_FILE", STATUS_FILE))
+    parser.add_argument("--run-now", action="store_true", help="Ejecuta una vez al arrancar y sigue con el cron")
+    parser.add_argument("--site", action="append", dest="sites",
+                        help="Sitio de sites.json a publicar en cada ejecución (repetible; por defecto todos)")
+    args = parser.parse_args(argv)
+
+    schedule = CronSchedule(args.cron)
+    status = DaemonStatus(schedule, args.status_file)
+
+    from blog_automation import get_site_crew
+    from site_config import get_sites
+    crews = {name: get_site_crew(name) for name in (args.sites or get_sites())}
+    status.update(warmed=warm_up([crew.site for crew in crews.values()]))
+
+    jobs = {name: crew.run_automation for name, crew in crews.items()}
+    daemon = BlogDaemon(schedule, lambda: run_sites(jobs), status)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+
+    server = None
+    if args.port:
+        server = start_status_server(status, args.port)
+        print(f"🩺 Estado en http://127.0.0.1:{args.port}/status (health: /health)")
+    if args.run_now:
+        daemon.run_now_event.set()
+
+    try:
+        daemon.serve()
+    finally:
+        if server:
+            server.shutdown()
+        print("👋 Daemon detenido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Índice invertido de búsqueda full-text sobre los posts publicados
+Tokenización en español, plegado de acentos y stemming ligero
+"""
+
+import gzip
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from post_collection import collection_lock
+
+SEARCH_INDEX_FILE = "blog_search_index.json.gz"
+INDEX_VERSION = 1
+
+# Peso de cada campo en la frecuencia de términos: el título pesa más que el cuerpo
+FIELD_WEIGHTS = {"title": 3, "summary": 2, "content": 1}
+
+# BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun bajo bien cada como con
+contra cual cuales cuando de del desde donde dos durante e el ella ellas ello ellos en entre era
+eres es esa esas ese eso esos esta estan estar estas este esto estos fue fueron ha hace hacen
+hacer han hasta hay la las le les lo los mas me mi mientras mismo mucho muy nada ni no nos nuestra
+nuestras nuestro nuestros o otra otras otro otros para pero poco por porque puede pueden que quien
+se sea ser si sin sobre solo son su sus tambien tan tanto te tiene tienen todo todos tu tus un una
+unas uno unos usted ya y yo
+the and for with from that this are was how what your you
+""".split())
+
+# Sufijos ordenados de más largo a más corto; se elimina el primero que encaje
+SUFFIXES = (
+    "amientos", "imientos", "amiento", "imiento", "aciones", "uciones", "adoras", "adores",
+    "ancias", "idades", "mente", "acion", "ucion", "adora", "ador", "ancia", "idad",
+    "ismos", "istas", "ables", "ibles", "ismo", "ista", "able", "ible",
+    "osos", "osas", "ivos", "ivas", "oso", "osa", "ivo", "iva",
+    "ar", "er", "ir", "es", "os", "as", "s", "o", "a", "e",
+)
+MIN_STEM_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold_accents(text: str) -> str:
+    """Pasa a minúsculas y elimina tildes/diacríticos (ñ -> n)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """Stemming ligero para español: elimina el sufijo más largo que deje una raíz razonable"""
+    if word.isdigit():
+        return word
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokeniza texto en español: plegado de acentos, stopwords fuera y stemming"""
+    if not text:
+        return []
+    tokens = _TOKEN_RE.findall(fold_accents(text))
+    return [stem(token) for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+def term_frequencies(post: Dict[str, Any]) -> Counter:
+    """Frecuencias de términos ponderadas por campo (título > resumen > contenido)"""
+    term_freqs = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(post.get(field, "")):
+            term_freqs[token] += weight
+    return term_freqs
+
+
+class PostSearchIndex:
+    """
+    Índice invertido incremental sobre la colección de posts
+
+    - postings: término -> {slug: frecuencia ponderada}
+    - docs: slug -> metadatos mínimos (título, fecha, autor, longitud)
+    """
+
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._norms: Optional[Dict[str, float]] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.docs
+
+    @classmethod
+    def build(cls, posts: List[Dict[str, Any]]) -> "PostSearchIndex":
+        """Construye el índice completo a partir de una colección de posts"""
+        index = cls()
+        for post in posts:
+            index.add_post(post)
+        return index
+
+    def add_post(self, post: Dict[str, Any]) -> bool:
+        """Añade (o reemplaza) un post en el índice. Devuelve False si no tiene slug"""
+        slug = post.get("slug")
+        if not slug:
+            return False
+        if slug in self.docs:
+            self.remove_post(slug)
+
+        term_freqs = term_frequencies(post)
+        length = sum(term_freqs.values())
+        self.docs[slug] = {
+            "title": post.get("title", ""),
+            "date": post.get("date", ""),
+            "author": post.get("author", ""),
+            "length": length,
+        }
+        self._total_length += length
+        self._norms = None
+        for term, freq in term_freqs.items():
+            self.postings.setdefault(term, {})[slug] = freq
+        return True
+
+    def remove_post(self, slug: str) -> bool:
+        """Elimina un post del índice"""
+        doc = self.docs.pop(slug, None)
+        if doc is None:
+            return False
+        self._total_length -= doc["length"]
+        self._norms = None
+        empty_terms = []
+        for term, docs in self.postings.items():
+            if docs.pop(slug, None) is not None and not docs:
+                empty_terms.append(term)
+        for term in empty_terms:
+            del self.postings[term]
+        return True
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Busca posts relevantes con BM25. Devuelve [{slug, title, date, author, score}]"""
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+
+        n_docs = len(self.docs)
+        avg_length = (self._total_length / n_docs) or 1
+        scores: Dict[str, float] = {}
+
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for slug, freq in docs.items():
+                length_norm = 1 - BM25_B + BM25_B * self.docs[slug]["length"] / avg_length
+                scores[slug] = scores.get(slug, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {
+                "slug": slug,
+                "title": self.docs[slug]["title"],
+                "date": self.docs[slug]["date"],
+                "author": self.docs[slug]["author"],
+                "score": round(score, 3),
+            }
+            for slug, score in ranked
+        ]
+
+    def similar(self, post: Dict[str, Any], limit: int = 3) -> List[Dict[str, Any]]:
+        """Posts más parecidos a un borrador (coseno sobre frecuencias ponderadas). Devuelve [{slug, title, similarity}]"""
+        query = term_frequencies(post)
+        query_norm = math.sqrt(sum(freq * freq for freq in query.values()))
+        if not query_norm or not self.docs:
+            return []
+        if self._norms is None:
+            norms: Dict[str, float] = {}
+            for docs in self.postings.values():
+                for slug, freq in docs.items():
+                    norms[slug] = norms.get(slug, 0.0) + freq * freq
+            self._norms = {slug: math.sqrt(total) for slug, total in norms.items()}
+
+        dots: Dict[str, float] = {}
+        for term, freq in query.items():
+            for slug, doc_freq in self.postings.get(term, {}).items():
+                dots[slug] = dots.get(slug, 0.0) + freq * doc_freq
+        ranked = sorted(
+            ((slug, dot / (query_norm * self._norms[slug])) for slug, dot in dots.items()),
+            key=lambda item: item[1], reverse=True
+        )[:limit]
+        return [{"slug": slug, "title": self.docs[slug]["title"], "similarity": round(sim, 3)} for slug, sim in ranked]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato compacto: docs como filas y postings como listas planas [doc_id, tf, doc_id, tf, ...]"""
+        slugs = list(self.docs)
+        doc_ids = {slug: i for i, slug in enumerate(slugs)}
+        return {
+            "version": INDEX_VERSION,
+            "docs": [
+                [slug, self.docs[slug]["title"], self.docs[slug]["date"],
+                 self.docs[slug]["author"], self.docs[slug]["length"]]
+                for slug in slugs
+            ],
+            "postings": {
+                term: [value for slug, freq in docs.items() for value in (doc_ids[slug], freq)]
+                for term, docs in self.postings.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PostSearchIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+        index = cls()
+        slugs = []
+        for slug, title, date, author, length in data["docs"]:
+            index.docs[slug] = {"title": title, "date": date, "author": author, "length": length}
+            index._total_length += length
+            slugs.append(slug)
+        for term, flat in data["postings"].items():
+            index.postings[term] = {slugs[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)}
+        return index
+
+    def save(self, path: str = SEARCH_INDEX_FILE) -> None:
+        """Guarda el índice comprimido (gzip) con escritura atómica"""
+        payload = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".search_index_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                    f.write(payload)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str = SEARCH_INDEX_FILE) -> "PostSearchIndex":
+        with gzip.open(path, "rb") as f:
+            return cls.from_dict(json.loads(f.read().decode("utf-8")))
+
+
+def _load_collection(collection_path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(collection_path):
+        return []
+    with open(collection_path, "r", encoding="utf-8") as f:
+        try:
+            posts = json.load(f)
+        except json.JSONDecodeError:
+            return []
+    return posts if isinstance(posts, list) else []
+
+
+# Caché en proceso: (ruta del índice) -> (mtime en ns, índice)
+_index_cache: Dict[str, Any] = {}
+# Los deploys concurrentes (group commit) actualizan el mismo índice en memoria; entre procesos, además,
+# la lectura-modificación-escritura del archivo va bajo el lock de <índice>.lock
+_update_lock = threading.Lock()
+
+
+def load_or_build_index(index_path: str = SEARCH_INDEX_FILE,
+                        collection_path: str = "blog_posts.json") -> PostSearchIndex:
+    """
+    Carga el índice desde disco (cacheado en memoria mientras no cambie el fichero)
+    o lo reconstruye desde la colección si no existe o está corrupto
+    """
+    abs_path = os.path.abspath(index_path)
+    try:
+        mtime = os.stat(abs_path).st_mtime_ns
+        cached = _index_cache.get(abs_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = PostSearchIndex.load(abs_path)
+    except (OSError, ValueError, KeyError, EOFError):
+        index = PostSearchIndex.build(_load_collection(collection_path))
+        index.save(abs_path)
+        mtime = os.stat(abs_path).st_mtime_ns
+    _index_cache[abs_path] = (mtime, index)
+    return index
+
+
+def update_index_with_post(post: Dict[str, Any], index_path: str = SEARCH_INDEX_FILE,
+                           collection_path: str = "blog_posts.json") -> PostSearchIndex:
+    """
+    Actualización incremental tras un deploy: añade el post y persiste el índice. Bajo lock de archivo:
+    otro proceso que despliega a la vez relee el índice (su mtime cambió) en vez de pisar la entrada
+    """
+    abs_path = os.path.abspath(index_path)
+    with _update_lock, collection_lock(abs_path):
+        index = load_or_build_index(abs_path, collection_path)
+        index.add_post(post)
+        index.save(abs_path)
+        _index_cache[abs_path] = (os.stat(abs_path).st_mtime_ns, index)
+        return index
+
+
+def search_posts(query: str, limit: int = 5, index_path: Optional[str] = None,
+                 collection_path: str = "blog_posts.json") -> List[Dict[str, Any]]:
+    """API de consulta: '¿hemos escrito sobre X?'"""
+    index = load_or_build_index(index_path or SEARCH_INDEX_FILE, collection_path)
+    return index.search(query, limit)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Búsqueda full-text sobre blog_posts.json")
+    parser.add_argument("query", nargs="?", default="", help="Texto a buscar")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--index", default=SEARCH_INDEX_FILE)
+    parser.add_argument("--collection", default="blog_posts.json")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruye el índice desde la colección")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index = PostSearchIndex.build(_load_collection(args.collection))
+        index.save(args.index)
+        print(f"✅ Índice reconstruido: {len(index)} posts, {len(index.postings)} términos -> {args.index}")
+
+    if args.query:
+        hits = search_posts(args.query, args.limit, args.index, args.collection)
+        if not hits:
+            print("🔍 Sin resultados")
+        for hit in hits:
+            print(f"  {hit['score']:>7}  {hit['date']}  {hit['title']}  ({hit['slug']})")
+    elif not args.rebuild:
+        parser.print_help()
+        sys.exit(1)
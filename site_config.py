@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Configuración por sitio: un mismo proceso publica en varios blogs
+
+- Cada sitio tiene su plantilla (label, autores, pitch de la marca, URL de los posts), sus ángulos de
+  research, su directorio (colección, índices, portadas, exportación estática, checkpoints y caché de research), su remoto git y su canal de Slack
+- Los sitios se leen de sites.json (SITES_FILE); sin archivo hay un único sitio "default" con los valores
+  de siempre, así que una instalación de un solo blog no cambia
+- Lo caro se comparte entre sitios: sesiones HTTP, rate limiters, caché de páginas, hooks LLM y pool de workers
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional
+
+from cover_images import COVER_CACHE_DIR, cover_image_dir
+from deadlines import CHECKPOINT_DIR
+from post_collection import COLLECTION_FILE
+from post_query import QUERY_INDEX_FILE
+from related_posts import RELATED_FILE
+from search_index import SEARCH_INDEX_FILE
+from speculative_research import RESEARCH_CACHE_FILE
+from static_export import static_export_dir
+
+SITES_FILE = "sites.json"
+DEFAULT_SITE = "default"
+DEFAULT_GIT_REMOTE = "blog-poster"
+DEFAULT_SLACK_CHANNEL = "blog-posts"
+
+DEFAULT_LABEL = "IA para tu PyME"
+DEFAULT_BRAND = "wrappers.es"
+DEFAULT_POST_URL = "wrappers.es/blog/{slug}"
+DEFAULT_PITCH = ("Speak about how Wrappers.es adresses that problem: we provide long context windows "
+                 "for company files, infinite memory and vertical agents")
+
+# Autores entre los que se elige cuando la ejecución no lo fija
+WRITER_AUTHORS = ("Jon Ortega", "Leire Legarreta", "Elbio Nielsen")
+
+# ROTAR TEMAS para evitar repetición: ángulos de research entre los que se elige
+TOPIC_ANGLES = (
+    "Busca las últimas innovaciones en IA que resuelvan problemas específicos de PyMEs.",
+    "Investiga tecnologías emergentes como agentes IA, MCP (Model Context Protocol), RAG avanzado, o AI wrappers que permitan a PyMEs competir con grandes empresas sin grandes inversiones",
+    "Explora herramientas no-code y automation que transformen emprendedores agotados en CEOs eficientes: Zapier vs Make vs n8n...",
+    "Busca soluciones específicas de marketing con IA que generen ROI inmediato: automación de email marketing, lead generation con IA, nuevas funciones de Meta/Google Ads, CRM inteligentes económicos",
+    "Investiga cómo PyMEs pueden usar IA para ser más rentables: herramientas de análisis de datos gratuitas, dashboards automáticos, Business Intelligence accesible, métricas que importen",
+    "Tendencias de IA generativa para el marketing y las agencias de publicidad digital",
+    "Explora tecnologías que solucionen el caos operativo de pequeñas empresas: project management con IA, comunicación interna automática, gestión de equipos remotos, ERP para PyMEs",
+    "Investiga tendencias técnicas específicas pero aplicables: integración de APIs, database querying con IA, workflow automation, herramientas de productividad que realmente funcionen para equipos pequeños",
+)
+
+SITE_FIELDS = ("name", "directory", "collection", "label", "authors", "pitch", "brand", "post_url", "angles",
+               "git_remote", "slack_channel")
+
+
+class SiteConfig:
+    """Un blog: plantilla, ángulos y dónde se publica (directorio, remoto git y canal de Slack)"""
+
+    def __init__(self, name: str = DEFAULT_SITE, directory: str = ".", collection: str = COLLECTION_FILE,
+                 label: str = DEFAULT_LABEL, authors: List[str] = WRITER_AUTHORS, pitch: str = DEFAULT_PITCH,
+                 brand: str = DEFAULT_BRAND, post_url: str = DEFAULT_POST_URL, angles: List[str] = TOPIC_ANGLES,
+                 git_remote: str = DEFAULT_GIT_REMOTE, slack_channel: str = None):
+        if not authors or not angles:
+            raise ValueError(f"Site '{name}' needs at least one author and one angle")
+        self.name = name
+        self.directory = directory
+        self.collection_name = collection
+        self.label = label
+        self.authors = tuple(authors)
+        self.pitch = pitch
+        self.brand = brand
+        self.post_url = post_url
+        self.angles = tuple(angles)
+        self.git_remote = git_remote
+        self.slack_channel = slack_channel or os.getenv("SLACK_CHANNEL", DEFAULT_SLACK_CHANNEL)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SiteConfig":
+        unknown = set(data) - set(SITE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown site fields: {', '.join(sorted(unknown))}")
+        if not data.get("name"):
+            raise ValueError("Every site needs a name")
+        return cls(**data)
+
+    def path(self, filename: str) -> str:
+        """Ruta de un archivo del sitio; el sitio por defecto ('.') conserva las rutas relativas de siempre"""
+        return filename if self.directory in ("", ".") else os.path.join(self.directory, filename)
+
+    @property
+    def collection(self) -> str:
+        return self.path(self.collection_name)
+
+    @property
+    def search_index(self) -> str:
+        return self.path(SEARCH_INDEX_FILE)
+
+    @property
+    def query_index(self) -> str:
+        return self.path(QUERY_INDEX_FILE)
+
+    @property
+    def related_matrix(self) -> str:
+        return self.path(RELATED_FILE)
+
+    @property
+    def cover_dir(self) -> str:
+        return self.path(cover_image_dir())
+
+    @property
+    def cover_cache(self) -> str:
+        return self.path(COVER_CACHE_DIR)
+
+    @property
+    def export_dir(self) -> str:
+        return self.path(static_export_dir())
+
+    @property
+    def checkpoint_dir(self) -> str:
+        return self.path(CHECKPOINT_DIR)
+
+    @property
+    def research_cache(self) -> str:
+        return self.path(RESEARCH_CACHE_FILE)
+
+    def post_link(self, slug: str) -> str:
+        return self.post_url.format(slug=slug)
+
+    def template(self) -> Dict[str, str]:
+        """Plantilla del blog post del sitio (mismos campos que BlogPost)"""
+        return {
+            "label": self.label,
+            "title": "",
+            "date": "",
+            "author": self.authors[0],
+            "readTime": "5 MIN",
+            "summary": "",
+            "coverImage": "/images/blog/",
+            "slug": "",
+            "content": ""
+        }
+
+
+def load_sites(path: str = None) -> Dict[str, SiteConfig]:
+    """
+    Sitios de sites.json ({"sites": [...]} o directamente la lista), en orden. Sin archivo: solo el
+    sitio por defecto. Dos sitios no pueden compartir directorio: sus índices y checkpoints chocarían
+    """
+    path = path or os.getenv("SITES_FILE", SITES_FILE)
+    if not os.path.exists(path):
+        return {DEFAULT_SITE: SiteConfig()}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data.get("sites") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must contain a non-empty list of sites")
+    sites: Dict[str, SiteConfig] = {}
+    directories: Dict[str, str] = {}
+    for entry in entries:
+        site = SiteConfig.from_dict(entry)
+        directory = os.path.abspath(site.directory)
+        if site.name in sites:
+            raise ValueError(f"Duplicate site name: {site.name}")
+        if directory in directories:
+            raise ValueError(f"Sites '{directories[directory]}' and '{site.name}' share directory {site.directory}")
+        sites[site.name] = site
+        directories[directory] = site.name
+    return sites
+
+
+_sites: Optional[Dict[str, SiteConfig]] = None
+_sites_lock = threading.Lock()
+
+
+def get_sites() -> Dict[str, SiteConfig]:
+    """Sitios del proceso (se leen una vez)"""
+    global _sites
+    with _sites_lock:
+        if _sites is None:
+            _sites = load_sites()
+        return _sites
+
+
+def get_site(name: str = None) -> SiteConfig:
+    """Sitio por nombre; sin nombre, el de SITE o el primero configurado"""
+    sites = get_sites()
+    name = name or os.getenv("SITE")
+    if not name:
+        return next(iter(sites.values()))
+    if name not in sites:
+        raise ValueError(f"Unknown site '{name}' (configured: {', '.join(sites)})")
+    return sites[name]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Research especulativo: varios ángulos investigados en paralelo y se escribe solo con el mejor
+
+Los candidatos se puntúan sin LLM por especificidad (datos, nombres propios, fuentes, poca
+palabrería genérica) y novedad frente a los posts publicados. El research de los perdedores
+se guarda en disco y compite de nuevo, gratis, en las siguientes ejecuciones.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from draft_scoring import DUPLICATE_SIMILARITY
+
+DEFAULT_ANGLES = 3
+# Iteraciones máximas de cada researcher especulativo (presupuesto de llamadas LLM/herramientas)
+DEFAULT_MAX_ITER = 8
+
+RESEARCH_CACHE_FILE = ".research_cache.json"
+# El research es actualidad: a partir de aquí ya no se reutiliza
+DEFAULT_CACHE_MAX_AGE_HOURS = 72
+
+SPECIFICITY_WEIGHT = 0.5
+NOVELTY_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_URL_RE = re.compile(r"https?://\S+")
+_FACT_RE = re.compile(r"\d|[$€%]|\b(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)\b",
+                      re.IGNORECASE)
+GENERIC_PHRASES = (
+    "ia para pymes", "adopción de inteligencia artificial", "está transformando", "está revolucionando",
+    "cada vez más", "en la era digital", "el futuro de", "sin precedentes",
+)
+
+
+def specificity_score(text: str) -> float:
+    """0-1: densidad de datos y nombres propios, fuentes citadas y ausencia de frases genéricas"""
+    words = _WORD_RE.findall(text)
+    if not words:
+        return 0.0
+    per_100 = 100 / max(len(words), 1)
+    facts = min(1.0, len(_FACT_RE.findall(text)) * per_100 / 5)
+    proper_nouns = sum(1 for i, word in enumerate(text.split()) if i and word[:1].isupper())
+    names = min(1.0, proper_nouns * per_100 / 8)
+    sources = min(1.0, len(_URL_RE.findall(text)) / 3)
+    lowered = text.lower()
+    generic = min(0.5, 0.15 * sum(1 for phrase in GENERIC_PHRASES if phrase in lowered))
+    substance = min(1.0, len(words) / 80)  # un research de dos frases no sostiene un post
+    return max(0.0, (0.4 * facts + 0.35 * names + 0.25 * sources) * substance - generic)
+
+
+def score_research(text: str, similar: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Especificidad + novedad (1 - parecido con el post publicado más cercano, ver PostSearchIndex.similar)"""
+    closest = similar[0] if similar else None
+    similarity = closest["similarity"] if closest else 0.0
+    specificity = specificity_score(text)
+    novelty = max(0.0, 1 - similarity / DUPLICATE_SIMILARITY)
+    return {
+        "score": round(SPECIFICITY_WEIGHT * specificity + NOVELTY_WEIGHT * novelty, 3),
+        "specificity": round(specificity, 3),
+        "novelty": round(novelty, 3),
+        "closest_post": closest["slug"] if closest else None,
+        "similarity": similarity,
+    }
+
+
+class ResearchCache:
+    """Research de ángulos perdedores guardado en disco (escritura atómica) para ejecuciones futuras"""
+
+    def __init__(self, path: str = RESEARCH_CACHE_FILE, max_age_hours: float = None):
+        self.path = path
+        self.max_age = 3600 * (max_age_hours or float(os.getenv("RESEARCH_CACHE_MAX_AGE_HOURS", DEFAULT_CACHE_MAX_AGE_HOURS)))
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        now = time.time()
+        return {angle: entry for angle, entry in data.items()
+                if isinstance(entry, dict) and now - entry.get("saved_at", 0) <= self.max_age}
+
+    def _save(self, data: Dict[str, Dict[str, Any]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+
+    def fresh(self) -> Dict[str, str]:
+        """Research reutilizable por ángulo (las entradas caducadas se ignoran)"""
+        with self._lock:
+            return {angle: entry["research"] for angle, entry in self._load().items()}
+
+    def update(self, store: Dict[str, str], consume: List[str] = ()) -> None:
+        """Guarda research nuevo y retira el que se acaba de usar; de paso purga lo caducado"""
+        with self._lock:
+            data = self._load()
+            for angle in consume:
+                data.pop(angle, None)
+            now = time.time()
+            for angle, research in store.items():
+                data[angle] = {"research": research, "saved_at": now}
+            self._save(data)
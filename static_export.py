@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Exportación estática incremental del blog: HTML por post, páginas de índice, RSS y sitemap
+
+- Cada post se renderiza de markdown a HTML en <blog>/<slug>/index.html (rutas sacadas de post_url del sitio)
+- Incremental: un manifiesto (.export_manifest.json) guarda el hash de cada post y de cada archivo escrito;
+  solo se re-renderizan los posts cuyo hash cambió (contenido, metadatos o títulos de sus relacionados)
+  y solo se reescriben los archivos cuyo contenido cambió
+- Paginación estable: /page/N/ agrupa los posts de más antiguo a más nuevo, así un post nuevo solo toca la
+  última página del archivo, el índice, el feed y el sitemap (O(1) páginas, no la reconstrucción completa)
+- Cada HTML/XML escrito lleva su copia precomprimida .gz y, si está instalado brotli, .br
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se escriben las copias .gz
+    brotli = None
+
+from post_collection import collection_lock, load_collection
+from post_query import iso_date
+from related_posts import RELATED_FIELD
+from structured_logging import get_logger
+
+log = get_logger("static_export")
+
+EXPORT_DIR = "public"
+MANIFEST_FILE = ".export_manifest.json"
+EXPORT_VERSION = 1
+DEFAULT_PAGE_SIZE = 10
+RSS_ITEMS = 20
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def static_export_enabled() -> bool:
+    return os.getenv("STATIC_EXPORT", "false").lower() in ("1", "true", "yes")
+
+
+def static_export_dir() -> str:
+    return os.getenv("STATIC_EXPORT_DIR", EXPORT_DIR)
+
+
+def page_size() -> int:
+    return int(os.getenv("STATIC_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+
+
+# --- Markdown -> HTML (el subconjunto que escribe el writer: títulos, párrafos, listas, citas, código, enlaces) ---
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_UL_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+_OL_RE = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_HR_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_CODE_SPAN_RE = re.compile(r"`([^`]+)`")
+_LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+_ITALIC_RE = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])")
+_SAFE_URL_RE = re.compile(r"^(https?://|mailto:|/|#)", re.IGNORECASE)
+
+
+def _inline(text: str) -> str:
+    """Formato en línea: escapa el texto y aplica código, enlaces (solo URLs seguras), negrita y cursiva"""
+    text = html.escape(text)
+    spans: List[str] = []
+
+    def keep_code(match):
+        spans.append(f"<code>{match.group(1)}</code>")
+        return f"\x00{len(spans) - 1}\x00"
+
+    def link(match):
+        label, url = match.group(1), match.group(2)
+        return f'<a href="{url}">{label}</a>' if _SAFE_URL_RE.match(html.unescape(url)) else label
+
+    text = _CODE_SPAN_RE.sub(keep_code, text)
+    text = _LINK_RE.sub(link, text)
+    text = _BOLD_RE.sub(lambda match: f"<strong>{match.group(1) or match.group(2)}</strong>", text)
+    text = _ITALIC_RE.sub(r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda match: spans[int(match.group(1))], text)
+
+
+def _anchor(text: str) -> str:
+    return re.sub(r"[^\w]+", "-", text.lower()).strip("-")
+
+
+def render_markdown(text: str) -> str:
+    """Markdown del campo content a HTML (todo el texto se escapa: el contenido viene de un LLM)"""
+    out: List[str] = []
+    paragraph: List[str] = []
+    items: List[str] = []
+    list_tag = None
+    quote: List[str] = []
+    lines = (text or "").replace("\r\n", "\n").split("\n")
+
+    def flush():
+        nonlocal list_tag
+        if paragraph:
+            out.append(f"<p>{_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if items:
+            out.append(f"<{list_tag}>" + "".join(f"<li>{_inline(item)}</li>" for item in items) + f"</{list_tag}>")
+            items.clear()
+            list_tag = None
+        if quote:
+            out.append(f"<blockquote><p>{_inline(' '.join(quote))}</p></blockquote>")
+            quote.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            flush()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            out.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+        elif not stripped:
+            flush()
+        elif _HEADING_RE.match(stripped):
+            flush()
+            hashes, title = _HEADING_RE.match(stripped).groups()
+            level = len(hashes)
+            out.append(f'<h{level} id="{_anchor(title)}">{_inline(title)}</h{level}>')
+        elif _HR_RE.match(stripped):
+            flush()
+            out.append("<hr>")
+        elif _UL_RE.match(line) or _OL_RE.match(line):
+            tag = "ul" if _UL_RE.match(line) else "ol"
+            if paragraph or quote or (list_tag and list_tag != tag):
+                flush()
+            list_tag = tag
+            items.append((_UL_RE.match(line) or _OL_RE.match(line)).group(1))
+        elif stripped.startswith(">"):
+            if paragraph or items:
+                flush()
+            quote.append(stripped[1:].strip())
+        elif items and line[:1].isspace():
+            items[-1] += " " + stripped  # continuación del elemento anterior
+        else:
+            if items or quote:
+                flush()
+            paragraph.append(stripped)
+        i += 1
+    flush()
+    return "\n".join(out)
+
+
+# --- Rutas y plantillas ---
+
+class SiteUrls:
+    """URLs y rutas de archivo a partir de post_url del sitio ('wrappers.es/blog/{slug}')"""
+
+    def __init__(self, post_url: str):
+        template = post_url if "://" in post_url else f"https://{post_url}"
+        parts = urlsplit(template.format(slug=""))
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.blog_path = "/" + parts.path.strip("/") + "/" if parts.path.strip("/") else "/"
+        self.template = template
+
+    def post(self, slug: str) -> str:
+        return self.template.format(slug=slug).rstrip("/") + "/"
+
+    def post_file(self, slug: str) -> str:
+        return f"{urlsplit(self.post(slug)).path.strip('/')}/index.html"
+
+    def page(self, number: int = None) -> str:
+        return self.origin + self.blog_path + (f"page/{number}/" if number else "")
+
+    def page_file(self, number: int = None) -> str:
+        return (self.blog_path.strip("/") + "/" if self.blog_path != "/" else "") + (
+            f"page/{number}/index.html" if number else "index.html")
+
+    @property
+    def feed(self) -> str:
+        return self.origin + self.blog_path + "rss.xml"
+
+    @property
+    def feed_file(self) -> str:
+        return self.blog_path.lstrip("/") + "rss.xml"
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<meta name="description" content="{description}">
+<link rel="canonical" href="{canonical}">
+<link rel="alternate" type="application/rss+xml" title="{brand}" href="{feed}">
+{head}</head>
+<body>
+<header><a href="{blog}">{brand}</a></header>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+def _page(urls: SiteUrls, brand: str, title: str, description: str, canonical: str, body: str, head: str = "") -> str:
+    e = html.escape
+    return PAGE_TEMPLATE.format(title=e(title), description=e(description), canonical=e(canonical), brand=e(brand),
+                                feed=e(urls.feed), blog=e(urls.page()), head=head, body=body)
+
+
+def render_post_page(post: Dict[str, Any], related: List[Tuple[str, str]], urls: SiteUrls, brand: str) -> str:
+    e = html.escape
+    content = post.get("content", "")
+    body = render_markdown(content)
+    if not content.lstrip().startswith("# "):
+        body = f"<h1>{e(post.get('title', ''))}</h1>\n{body}"
+    meta = " · ".join(e(str(post.get(field) or "")) for field in ("label", "date", "author", "readTime"))
+    cover = (f'<img src="{e(post["coverImage"])}" alt="{e(post.get("title", ""))}" width="1200" height="630">'
+             if post.get("coverImage") else "")
+    related_html = ""
+    if related:
+        links = "".join(f'<li><a href="{e(urls.post(slug))}">{e(title)}</a></li>' for slug, title in related)
+        related_html = f'\n<aside><h2>Artículos relacionados</h2><ul>{links}</ul></aside>'
+    head = (f'<meta property="og:title" content="{e(post.get("title", ""))}">\n'
+            f'<meta property="og:image" content="{e(urls.origin + post.get("coverImage", ""))}">\n')
+    article = f'<article>\n<p class="meta">{meta}</p>\n{cover}\n{body}\n</article>{related_html}'
+    return _page(urls, brand, f"{post.get('title', '')} | {brand}", post.get("summary", ""),
+                 urls.post(post["slug"]), article, head)
+
+
+def _post_card(post: Dict[str, Any], urls: SiteUrls) -> str:
+    e = html.escape
+    return (f'<li><a href="{e(urls.post(post["slug"]))}">{e(post.get("title", ""))}</a> '
+            f'<time>{e(post.get("date", ""))}</time><p>{e(post.get("summary", ""))}</p></li>')
+
+
+def render_listing(posts: List[Dict[str, Any]], urls: SiteUrls, brand: str, number: Optional[int],
+                   pages: int) -> str:
+    """Índice (number=None: los más recientes) o página N del archivo; los posts, del más nuevo al más antiguo"""
+    e = html.escape
+    cards = "\n".join(_post_card(post, urls) for post in reversed(posts))
+    nav = []
+    if number and number < pages:
+        nav.append(f'<a rel="next" href="{e(urls.page(number + 1))}">Más recientes</a>')
+    if number and number > 1:
+        nav.append(f'<a rel="prev" href="{e(urls.page(number - 1))}">Anteriores</a>')
+    if number is None and pages:
+        nav.append(f'<a href="{e(urls.page(pages))}">Archivo</a>')
+    title = brand if number is None else f"{brand} - página {number}"
+    body = f"<h1>{e(title)}</h1>\n<ul class=\"posts\">\n{cards}\n</ul>\n<nav>{' '.join(nav)}</nav>"
+    return _page(urls, brand, title, f"Artículos de {brand}", urls.page(number), body)
+
+
+def _rfc822(date: str) -> str:
+    iso = iso_date(date) or "1970-01-01"
+    return format_datetime(datetime.strptime(iso, "%Y-%m-%d").replace(tzinfo=timezone.utc))
+
+
+def render_feed(posts: List[Dict[str, Any]], urls: SiteUrls, brand: str) -> str:
+    """RSS 2.0 con los RSS_ITEMS posts más recientes; la fecha del canal es la del último post, no la del build"""
+    e = html.escape
+    latest = list(reversed(posts[-RSS_ITEMS:]))
+    items = "".join(
+        f"<item><title>{e(post.get('title', ''))}</title><link>{e(urls.post(post['slug']))}</link>"
+        f"<guid isPermaLink=\"true\">{e(urls.post(post['slug']))}</guid>"
+        f"<pubDate>{_rfc822(post.get('date', ''))}</pubDate><author>{e(post.get('author', ''))}</author>"
+        f"<description>{e(post.get('summary', ''))}</description></item>\n" for post in latest)
+    updated = f"<lastBuildDate>{_rfc822(latest[0].get('date', ''))}</lastBuildDate>" if latest else ""
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+            f"<title>{e(brand)}</title><link>{e(urls.page())}</link><description>Artículos de {e(brand)}</description>"
+            f"<language>es</language>{updated}\n{items}</channel></rss>\n")
+
+
+def render_sitemap(posts: List[Dict[str, Any]], urls: SiteUrls, pages: int) -> str:
+    e = html.escape
+    entries = [f"<url><loc>{e(urls.page())}</loc></url>"]
+    entries += [f"<url><loc>{e(urls.page(number))}</loc></url>" for number in range(1, pages + 1)]
+    for post in posts:
+        lastmod = iso_date(post.get("date", ""))
+        entries.append(f"<url><loc>{e(urls.post(post['slug']))}</loc>"
+                       + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>")
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + "\n".join(entries) + "\n</urlset>\n")
+
+
+# --- Escritura incremental ---
+
+def _hash(data: Any) -> str:
+    raw = data if isinstance(data, bytes) else json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:20]
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".export_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _compressed(data: bytes) -> Dict[str, bytes]:
+    """Copias precomprimidas (mtime=0: el mismo HTML da siempre el mismo .gz)"""
+    copies = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies[".br"] = brotli.compress(data, quality=11)
+    return copies
+
+
+class StaticExport:
+    """Una pasada de exportación sobre export_dir con el manifiesto de la anterior"""
+
+    def __init__(self, export_dir: str, urls: SiteUrls, brand: str, full: bool = False):
+        self.export_dir = export_dir
+        self.urls = urls
+        self.brand = brand
+        self.manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+        manifest = {} if full else self._load_manifest()
+        self.old_posts: Dict[str, str] = manifest.get("posts", {})
+        self.old_files: Dict[str, str] = manifest.get("files", {})
+        self.posts: Dict[str, str] = {}
+        self.files: Dict[str, str] = {}
+        self.report = {"posts_rendered": [], "posts_skipped": 0, "files_written": [], "files_removed": []}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if manifest.get("version") == EXPORT_VERSION else {}
+
+    def _up_to_date(self, relpath: str, digest: str) -> bool:
+        path = os.path.join(self.export_dir, relpath)
+        suffixes = (".gz", ".br") if brotli is not None else (".gz",)
+        return (self.old_files.get(relpath) == digest and os.path.exists(path)
+                and all(os.path.exists(path + suffix) for suffix in suffixes))
+
+    def write(self, relpath: str, text: str) -> None:
+        """Escribe el archivo y sus copias comprimidas solo si su contenido cambió"""
+        data = text.encode("utf-8")
+        digest = _hash(data)
+        self.files[relpath] = digest
+        if self._up_to_date(relpath, digest):
+            return
+        path = os.path.join(self.export_dir, relpath)
+        _write_atomic(path, data)
+        for suffix, compressed in _compressed(data).items():
+            _write_atomic(path + suffix, compressed)
+        self.report["files_written"].append(relpath)
+
+    def keep(self, relpath: str) -> None:
+        """Post sin cambios: el archivo publicado sigue valiendo sin volver a renderizarlo"""
+        self.files[relpath] = self.old_files[relpath]
+
+    def remove_stale(self) -> None:
+        for relpath in set(self.old_files) - set(self.files):
+            path = os.path.join(self.export_dir, relpath)
+            for target in [path] + [path + suffix for suffix in COMPRESSED_SUFFIXES]:
+                if os.path.exists(target):
+                    os.remove(target)
+            # Carpetas de posts o páginas que quedan vacías, sin salir de export_dir
+            directory = os.path.dirname(path)
+            while os.path.abspath(directory) != os.path.abspath(self.export_dir) and not os.listdir(directory):
+                os.rmdir(directory)
+                directory = os.path.dirname(directory)
+            self.report["files_removed"].append(relpath)
+
+    def save_manifest(self) -> None:
+        data = json.dumps({"version": EXPORT_VERSION, "posts": self.posts, "files": self.files},
+                          indent=2, sort_keys=True, ensure_ascii=False)
+        _write_atomic(self.manifest_path, data.encode("utf-8"))
+
+    def run(self, collection: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Con slugs repetidos (un post corregido y republicado) gana el último, como en PostQueryIndex.by_slug:
+        # una URL es una página, una entrada del feed y una del sitemap
+        latest = {post["slug"]: i for i, post in enumerate(collection) if post.get("slug")}
+        posts = [post for i, post in enumerate(collection) if post.get("slug") and latest[post["slug"]] == i]
+        titles = {post["slug"]: post.get("title", "") for post in posts}
+
+        for post in posts:
+            slug = post["slug"]
+            related = [(other, titles[other]) for other in post.get(RELATED_FIELD) or [] if other in titles]
+            digest = _hash({"post": post, "related": related, "brand": self.brand,
+                            "url": self.urls.template, "version": EXPORT_VERSION})
+            self.posts[slug] = digest
+            relpath = self.urls.post_file(slug)
+            if self.old_posts.get(slug) == digest and self._up_to_date(relpath, self.old_files.get(relpath)):
+                self.keep(relpath)
+                self.report["posts_skipped"] += 1
+                continue
+            self.write(relpath, render_post_page(post, related, self.urls, self.brand))
+            self.report["posts_rendered"].append(slug)
+
+        # Las listas se generan en memoria (sin markdown) y solo se escriben las que cambiaron
+        size = page_size()
+        chunks = [posts[start:start + size] for start in range(0, len(posts), size)]
+        self.write(self.urls.page_file(), render_listing(posts[-size:], self.urls, self.brand, None, len(chunks)))
+        for number, chunk in enumerate(chunks, 1):
+            self.write(self.urls.page_file(number), render_listing(chunk, self.urls, self.brand, number, len(chunks)))
+        self.write(self.urls.feed_file, render_feed(posts, self.urls, self.brand))
+        self.write("sitemap.xml", render_sitemap(posts, self.urls, len(chunks)))
+
+        self.remove_stale()
+        self.save_manifest()
+        return self.report
+
+
+def export_site(collection_path: str, export_dir: str, post_url: str, brand: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Exporta la colección a export_dir (post_url y brand son los del sitio). Manifiesto y colección se leen
+    bajo el lock del manifiesto: dos exportaciones seguidas nunca dejan escrita una versión anterior.
+    full=True ignora el manifiesto
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    with collection_lock(os.path.join(export_dir, MANIFEST_FILE)):
+        return StaticExport(export_dir, SiteUrls(post_url), brand, full).run(load_collection(collection_path))
+
+
+def export_site_safely(collection_path: str, export_dir: str, post_url: str, brand: str) -> Optional[Dict[str, Any]]:
+    """Paso del deploy: un fallo de la exportación no debe impedir publicar el post"""
+    try:
+        report = export_site(collection_path, export_dir, post_url, brand)
+        log.info("🗂️ Static export: %s posts rendered, %s files written", len(report["posts_rendered"]),
+                 len(report["files_written"]), extra={"fields": {
+                     "posts_rendered": len(report["posts_rendered"]), "posts_skipped": report["posts_skipped"],
+                     "files_written": len(report["files_written"]), "files_removed": len(report["files_removed"])}})
+        return report
+    except Exception as e:
+        log.warning("⚠️ Could not export static site: %s", e)
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from site_config import get_site
+
+    parser = argparse.ArgumentParser(description="Exportación estática (HTML, índices, RSS y sitemap) de blog_posts.json")
+    parser.add_argument("--site", default=os.getenv("SITE"))
+    parser.add_argument("--full", action="store_true", help="Re-renderiza todo ignorando el manifiesto")
+    args = parser.parse_args()
+
+    site = get_site(args.site)
+    report = export_site(site.collection, site.export_dir, site.post_url, site.brand, args.full)
+    print(f"✅ {site.export_dir}: {len(report['posts_rendered'])} posts renderizados, {report['posts_skipped']} sin cambios, "
+          f"{len(report['files_written'])} archivos escritos, {len(report['files_removed'])} eliminados"
+          + ("" if brotli is not None else " (sin brotli: solo .gz)"))
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Validación incremental de la salida del writer mientras se genera (streaming)
+
+El JSON del BlogPost se analiza chunk a chunk: estructura (objeto, claves conocidas, valores string)
+y reglas de campo (fecha, readTime, slug, coverImage, placeholders). Ante una violación irrecuperable
+se aborta la generación y el flujo vuelve a pedir el post, sin pagar el resto de un borrador condenado.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Any, Optional
+
+from blog_post import POST_FIELDS
+
+DEFAULT_MAX_REPROMPTS = 2
+
+DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+SLUG_CHAR = re.compile(r"[a-z0-9-]")
+COVER_PREFIX = "/images/blog/"
+PLACEHOLDER_PATTERN = re.compile(
+    r"\[(?:nombre de (?:la|tu) empresa|nombre|empresa|tu empresa|sector|ciudad|cliente|producto)\]", re.IGNORECASE
+)
+# Ventana del final del contenido que se revisa en cada chunk (un placeholder cabe de sobra)
+PLACEHOLDER_WINDOW = 64
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def stream_validation_enabled() -> bool:
+    return os.getenv("STREAM_VALIDATION", "true").lower() not in ("0", "false", "no")
+
+
+class StreamAborted(BaseException):
+    """
+    Borrador abortado por el validador incremental
+
+    Hereda de BaseException: CrewAI captura las Exception de los handlers del event bus,
+    y esta debe atravesar el bucle de streaming (cerrando la conexión) hasta run_automation
+    """
+
+    def __init__(self, violation: str, chars_streamed: int):
+        super().__init__(violation)
+        self.violation = violation
+        self.chars_streamed = chars_streamed
+
+    def report(self) -> Dict[str, Any]:
+        return {"violation": self.violation, "chars_streamed": self.chars_streamed}
+
+
+class StreamingPostValidator:
+    """
+    Parser JSON incremental para un BlogPost: feed(chunk) devuelve la primera violación o None
+
+    expected fija valores concretos de campos ya decididos por el código (p. ej. date o label)
+    """
+
+    def __init__(self, expected: Optional[Dict[str, str]] = None):
+        self.expected = {k: v for k, v in (expected or {}).items() if v}
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = "start"
+        self.fields: Dict[str, str] = {}
+        self.key: Optional[str] = None
+        self.buffer = []
+        self.escape: Optional[str] = None
+        self.chars_seen = 0
+        self.violation: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.violation:
+            return self.violation
+        for char in chunk:
+            self.chars_seen += 1
+            self.violation = self._consume(char)
+            if self.violation:
+                return self.violation
+        if self.state == "value" and self.key == "content":
+            self.violation = self._check_placeholders()
+        return self.violation
+
+    @property
+    def complete(self) -> bool:
+        return self.state == "done"
+
+    def _consume(self, char: str) -> Optional[str]:
+        state = self.state
+        if state in ("key", "value"):
+            return self._consume_string(char)
+        if char.isspace():
+            return None
+        if state == "start":
+            if char != "{":
+                return f"La salida no empieza con un objeto JSON (recibido {char!r})"
+            self.state = "key_or_end"
+        elif state in ("key_or_end", "key_start"):
+            if char == "}" and state == "key_or_end":
+                return self._close_object()
+            if char != '"':
+                return f"Se esperaba una clave entre comillas (recibido {char!r})"
+            self.state, self.buffer = "key", []
+        elif state == "colon":
+            if char != ":":
+                return f"Se esperaba ':' tras la clave '{self.key}'"
+            self.state = "value_start"
+        elif state == "value_start":
+            if char != '"':
+                return f"El campo '{self.key}' debe ser un string"
+            self.state, self.buffer = "value", []
+        elif state == "after_value":
+            if char == ",":
+                self.state = "key_start"
+            elif char == "}":
+                return self._close_object()
+            else:
+                return f"Se esperaba ',' o '}}' tras el campo '{self.key}'"
+        elif state == "done":
+            return f"Texto adicional tras el objeto JSON ({char!r})"
+        return None
+
+    def _consume_string(self, char: str) -> Optional[str]:
+        if self.escape is not None:
+            return self._consume_escape(char)
+        if char == "\\":
+            self.escape = ""
+            return None
+        if char == '"':
+            return self._close_string()
+        if char in "\n\r\t":
+            return "Carácter de control sin escapar dentro de un string"
+        return self._append(char)
+
+    def _consume_escape(self, char: str) -> Optional[str]:
+        if self.escape == "":
+            if char == "u":
+                self.escape = "u"
+                return None
+            self.escape = None
+            if char not in _ESCAPES:
+                return f"Secuencia de escape inválida '\\{char}'"
+            return self._append(_ESCAPES[char])
+        self.escape += char
+        if len(self.escape) < 5:
+            return None
+        code, self.escape = self.escape[1:], None
+        try:
+            return self._append(chr(int(code, 16)))
+        except ValueError:
+            return f"Secuencia de escape inválida '\\u{code}'"
+
+    def _append(self, char: str) -> Optional[str]:
+        self.buffer.append(char)
+        if self.state == "value" and self.key == "slug" and not SLUG_CHAR.match(char):
+            return f"Slug con carácter no permitido {char!r}: solo a-z, 0-9 y guiones"
+        return None
+
+    def _close_string(self) -> Optional[str]:
+        text = "".join(self.buffer)
+        if self.state == "key":
+            if text not in POST_FIELDS:
+                return f"Campo desconocido '{text}'"
+            if text in self.fields:
+                return f"Campo '{text}' repetido"
+            self.key, self.state = text, "colon"
+            return None
+        self.fields[self.key] = text
+        self.state = "after_value"
+        return self._check_field(self.key, text)
+
+    def _close_object(self) -> Optional[str]:
+        self.state = "done"
+        missing = [field for field in POST_FIELDS if not self.fields.get(field, "").strip()]
+        if missing:
+            return f"Campos vacíos o ausentes: {', '.join(missing)}"
+        return None
+
+    def _check_field(self, field: str, value: str) -> Optional[str]:
+        if not value.strip():
+            return f"Campo '{field}' vacío"
+        if field == "date" and not DATE_PATTERN.match(value):
+            return f"Fecha '{value}' no tiene formato DD/MM/YYYY"
+        expected = self.expected.get(field)
+        if expected and value != expected:
+            return f"Campo '{field}' debe ser '{expected}' (recibido '{value}')"
+        if field == "readTime" and "MIN" not in value:
+            return f"readTime '{value}' debe incluir 'MIN'"
+        if field == "content":
+            return self._check_placeholders()
+        if field in ("coverImage", "slug"):
+            return self._check_cover_image()
+        return None
+
+    def _check_cover_image(self) -> Optional[str]:
+        cover = self.fields.get("coverImage")
+        if cover is None:
+            return None
+        if not (cover.startswith(COVER_PREFIX) and cover.endswith(".jpeg")):
+            return f"coverImage '{cover}' debe ser '{COVER_PREFIX}<slug>.jpeg'"
+        slug = self.fields.get("slug")
+        if slug is not None and cover != f"{COVER_PREFIX}{slug}.jpeg":
+            return f"coverImage '{cover}' no coincide con el slug '{slug}'"
+        return None
+
+    def _check_placeholders(self) -> Optional[str]:
+        tail = "".join(self.buffer[-PLACEHOLDER_WINDOW:]) if self.state == "value" else self.fields.get("content", "")
+        match = PLACEHOLDER_PATTERN.search(tail)
+        if match:
+            return f"El contenido usa el placeholder '{match.group(0)}'"
+        return None
+
+
+class StreamValidationRegistry:
+    """Validadores activos por tarea (clave: task.id, el mismo que llevan los eventos de streaming)"""
+
+    def __init__(self):
+        self._validators: Dict[str, StreamingPostValidator] = {}
+        self._responses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, task, expected: Optional[Dict[str, str]] = None) -> StreamingPostValidator:
+        validator = StreamingPostValidator(expected)
+        with self._lock:
+            self._validators[str(task.id)] = validator
+        return validator
+
+    def unwatch(self, task) -> None:
+        with self._lock:
+            self._validators.pop(str(task.id), None)
+            self._responses.pop(str(task.id), None)
+
+    def feed(self, task_id: Optional[str], chunk: str, response_id: Optional[str] = None) -> None:
+        """Pasa un chunk al validador de su tarea; lanza StreamAborted ante una violación"""
+        with self._lock:
+            validator = self._validators.get(task_id)
+            if validator is None:
+                return
+            if response_id and self._responses.get(task_id) != response_id:
+                self._responses[task_id] = response_id
+                validator.reset()  # nueva respuesta del LLM para la misma tarea: empezar de cero
+        violation = validator.feed(chunk)
+        if violation:
+            raise StreamAborted(violation, validator.chars_seen)
+
+
+stream_validators = StreamValidationRegistry()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Logging estructurado para la automatización
+
+- Un logger por módulo bajo 'blog' (get_logger), configurado una sola vez desde el entorno
+- LOG_FORMAT=text (por defecto): el mensaje tal cual, como los print de siempre
+- LOG_FORMAT=json: una línea JSON por evento con ts, level, logger, run_id, msg y campos extra
+- Formateo perezoso: los argumentos estilo %s solo se formatean si el nivel está activo
+- LOG_MODE=production: JSON, nivel INFO y crews/agentes sin verbose; los volcados debug no cuestan nada
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+ROOT_LOGGER = "blog"
+DEFAULT_LEVEL = "INFO"
+
+_run_id: contextvars.ContextVar = contextvars.ContextVar("blog_run_id", default=None)
+_configured = False
+
+
+def production_mode() -> bool:
+    return os.getenv("LOG_MODE", "development").lower() in ("production", "prod")
+
+
+def crew_verbose() -> bool:
+    """verbose de agentes y crews: nunca en producción; en desarrollo salvo LOG_LEVEL por encima de INFO"""
+    if production_mode():
+        return False
+    return logging.getLogger(ROOT_LOGGER).getEffectiveLevel() <= logging.INFO
+
+
+def current_run_id() -> Optional[str]:
+    return _run_id.get()
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def run_context(run_id: str = None):
+    """Asocia un run_id a todo lo que se registra dentro (hilos incluidos si copian el contexto)"""
+    if current_run_id() is not None and run_id is None:
+        yield current_run_id()  # ejecución anidada: conserva el id del run exterior
+        return
+    token = _run_id.set(run_id or new_run_id())
+    try:
+        yield _run_id.get()
+    finally:
+        _run_id.reset(token)
+
+
+def logged_run(method):
+    """Decorador de los run_*: cada ejecución tiene su run_id (el run_id explícito si lo hay) y lo devuelve"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with run_context(kwargs.get("run_id")) as run_id:
+            result = method(*args, **kwargs)
+        if isinstance(result, dict):
+            result.setdefault("run_id", run_id)
+        return result
+    return wrapper
+
+
+class LazyJoin:
+    """Une una lista solo si el mensaje llega a formatearse: log.debug("%s", LazyJoin(items))"""
+
+    def __init__(self, items, separator: str = ", "):
+        self.items = items
+        self.separator = separator
+
+    def __str__(self) -> str:
+        return self.separator.join(str(item) for item in self.items)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Una línea JSON por registro; los campos de extra={'fields': {...}} se añaden al objeto"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", None),
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Escribe en el sys.stdout vigente en cada registro (no en el que había al configurar)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _value):
+        pass
+
+
+class _RunIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = current_run_id()
+        return True
+
+
+def configure_logging(level: str = None, fmt: str = None, stream=None, force: bool = False) -> logging.Logger:
+    """Configura el logger 'blog' desde LOG_LEVEL / LOG_FORMAT / LOG_MODE (idempotente salvo force)"""
+    global _configured
+    logger = logging.getLogger(ROOT_LOGGER)
+    if _configured and not force:
+        return logger
+    fmt = (fmt or os.getenv("LOG_FORMAT") or ("json" if production_mode() else "text")).lower()
+    level = (level or os.getenv("LOG_LEVEL") or DEFAULT_LEVEL).upper()
+
+    handler = logging.StreamHandler(stream) if stream is not None else _StdoutHandler()
+    handler.setFormatter(JsonLinesFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    handler.addFilter(_RunIdFilter())
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(getattr(logging, level, logging.INFO))
+    logger.propagate = False
+    _configured = True
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger hijo de 'blog'; el handler lo instala configure_logging() una vez cargado el .env"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
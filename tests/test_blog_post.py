@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test del modelo BlogPost: salida estructurada del writer y serialización por código
+"""
+
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.utilities.converter import convert_to_model
+
+from blog_automation import BlogAutomationCrew, BlogDeploymentTool, post_filename
+from blog_post import BlogPost, Post, save_post, stage_post, take_staged_post
+from deadlines import RunCheckpoint, RunDeadlines
+
+SAMPLE_POST = {
+    "label": "IA para tu PyME",
+    "title": "Zapier AI Actions: automatiza tu PyME hablando",
+    "date": "21/07/2025",
+    "author": "Jon Ortega",
+    "readTime": "5 MIN",
+    "summary": "Zapier permite crear automatizaciones en lenguaje natural.",
+    "coverImage": "/images/blog/zapier-ai-actions-pymes.jpeg",
+    "slug": "zapier-ai-actions-pymes",
+    "content": "## Qué es\n\nUn \"asistente\" que conecta +5000 apps\tsin código.",
+}
+
+
+def test_structured_output_round_trip():
+    """Verifica que la respuesta estructurada se parsea al modelo y se serializa como JSON válido"""
+    print("🔍 Testing BlogPost round trip...")
+
+    post = convert_to_model(json.dumps(SAMPLE_POST), BlogPost, None, None)
+    assert isinstance(post, BlogPost) and post.slug == "zapier-ai-actions-pymes"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_post(post, os.path.join(tmp, post_filename(post)))
+        assert path.endswith("zapier-ai-actions-pymes.json")
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+
+    assert json.loads(content) == SAMPLE_POST  # comillas, saltos de línea y tabuladores escapados por el código
+    validation = BlogAutomationCrew().validate_blog_post_strict(content, "APPROVED")
+    assert validation == {"valid": True, "errors": []}
+    print("✅ Round trip correcto")
+
+
+def test_writing_task_uses_structured_output():
+    """Verifica que el writer no usa herramientas y su tarea declara el modelo BlogPost"""
+    print("\n🔍 Testing writing task...")
+
+    automation = BlogAutomationCrew()
+    research_task = automation.create_research_task(automation.create_research_agent())
+    writer = automation.create_writer_agent()
+    task = automation.create_writing_task(writer, research_task)
+
+    assert task.output_pydantic is BlogPost
+    assert writer.tools == []
+    assert "file_writer" not in task.description
+    assert post_filename(BlogPost(**{**SAMPLE_POST, "slug": "Mal/Slug "})) == "mal-slug.json"
+    print("✅ Tarea de escritura correcta")
+
+
+def test_post_parsed_once_through_deploy():
+    """Verifica que el Post (con __slots__) se valida y despliega sin archivo individual en disco"""
+    print("\n🔍 Testing parse-once post...")
+
+    post = Post.from_model(BlogPost(**SAMPLE_POST))
+    assert not hasattr(post, "__dict__")
+    assert post.to_dict() == SAMPLE_POST
+    assert BlogAutomationCrew().validate_blog_post_strict(post, "APPROVED")["valid"] is True
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # el deploy escribe blog_posts.json en el directorio actual
+        try:
+            stage_post("zapier-ai-actions-pymes.json", post)
+            message = BlogDeploymentTool()._run("zapier-ai-actions-pymes.json")
+            assert message.startswith("✅")
+            with open("blog_posts.json", encoding="utf-8") as f:
+                assert json.load(f) == [{**SAMPLE_POST, "relatedPosts": []}]  # primer post: sin relacionados
+            assert not os.path.exists("zapier-ai-actions-pymes.json")
+            
+            # El agente técnico puede pasar la ruta con otro formato: el post en memoria se encuentra igual
+            for name in ("./otro-post.json", os.path.join(tmp, "otro-post.json"), "sitios/pymes/otro-post.json"):
+                stage_post("otro-post.json", Post.from_model(BlogPost(**{**SAMPLE_POST, "slug": "otro-post"})))
+                assert take_staged_post(name) is not None and take_staged_post(name) is None
+            stage_post("otro-post.json", Post.from_model(BlogPost(**{**SAMPLE_POST, "slug": "otro-post"})))
+            assert BlogDeploymentTool()._run("./otro-post.json").startswith("✅")
+        finally:
+            os.chdir(cwd)
+    print("✅ Post parseado una sola vez")
+
+
+def test_deploy_timeout_does_not_deploy_late():
+    """Verifica que tras un timeout del deploy el post queda en disco y el hilo que sigue vivo no lo despliega"""
+    print("\n🔍 Testing deploy timeout...")
+
+    automation = BlogAutomationCrew()
+    late = {}
+
+    class SlowDeployCrew:
+        def __init__(self, **kwargs):
+            pass
+
+        def kickoff(self):
+            time.sleep(0.8)  # el agente técnico tarda más que el deadline del deploy
+            late["message"] = automation.blog_deployment_tool._run("zapier-ai-actions-pymes.json")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, mock.patch("blog_automation.Crew", SlowDeployCrew), \
+            mock.patch.object(automation, "create_technical_task", return_value=mock.Mock()), \
+            mock.patch.object(automation, "send_slack_error"):
+        os.chdir(tmp)
+        try:
+            deadlines = RunDeadlines(stage_limits={"deploy": 0.3})
+            deadlines.start_stage("deploy")
+            result = automation._publish_post(Post.from_model(BlogPost(**SAMPLE_POST)), "zapier-ai-actions-pymes.json",
+                                              None, "APPROVED", deadlines, RunCheckpoint(directory=tmp))
+            assert result["status"] == "timeout"
+            deadlines.worker.join(5)
+            assert late["message"].startswith("Error deploying blog post: run cancelled")
+            assert os.path.exists("zapier-ai-actions-pymes.json") and not os.path.exists("blog_posts.json")
+        finally:
+            os.chdir(cwd)
+    print("✅ El post expirado se conserva para el redeploy a mano")
+
+
+if __name__ == "__main__":
+    print("🤖 Test blog post model")
+    print("=" * 50)
+
+    test_structured_output_round_trip()
+    test_writing_task_uses_structured_output()
+    test_post_parsed_once_through_deploy()
+    test_deploy_timeout_does_not_deploy_late()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Salida estructurada funcionando correctamente!")
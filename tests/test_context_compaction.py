@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test de la compactación de contexto entre research y escritura
+"""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.tasks.task_output import TaskOutput
+
+from blog_automation import BlogAutomationCrew
+from context_compaction import compact_context, compaction_report, count_tokens, extract_sources
+
+RESEARCH_OUTPUT = """Zapier lanzó en enero 2025 su función AI Actions para crear automatizaciones en lenguaje natural.
+Cuesta $20/mes adicionales y se integra con más de 5000 apps.
+Source: https://www.zapier.com/blog/ai-actions?utm=x
+Zapier lanzó en enero 2025 su función AI Actions para crear automatizaciones en lenguaje natural.
+La inteligencia artificial está cambiando muchas cosas en general.
+Source: https://zapier.com/blog/ai-actions/
+""" * 10
+
+
+def test_sources_deduplicated():
+    """Verifica que las fuentes repetidas con distinta forma se deduplican"""
+    print("🔍 Testing source deduplication...")
+
+    assert extract_sources(RESEARCH_OUTPUT) == ["https://www.zapier.com/blog/ai-actions?utm=x"]
+    print("✅ Fuentes deduplicadas")
+
+
+def test_budget_respected():
+    """Verifica que la salida cabe en el presupuesto y conserva los hechos concretos"""
+    print("\n🔍 Testing token budget...")
+
+    result = compact_context(RESEARCH_OUTPUT, token_budget=80)
+    assert result["tokens_after"] <= 80 < result["tokens_before"]
+    assert result["tokens_after"] == count_tokens(result["text"])
+    assert "$20/mes" in result["text"]
+    assert result["duplicates_removed"] > 0
+    print(f"✅ {result['tokens_before']} -> {result['tokens_after']} tokens")
+
+
+def test_short_context_untouched():
+    """Verifica que un contexto corto y sin duplicados se pasa tal cual"""
+    print("\n🔍 Testing short context...")
+
+    text = "Make lanzó agentes IA en 2025. Cuestan 9 euros al mes."
+    assert compact_context(text, token_budget=800)["text"] == text
+    print("✅ Contexto corto intacto")
+
+
+def test_report_per_research_task():
+    """Verifica que cada tarea de research tiene su informe aunque compartan crew (workers, research en paralelo)"""
+    print("\n🔍 Testing report per task...")
+
+    automation = BlogAutomationCrew(context_token_budget=120)
+    agent = automation.create_research_agent()
+    long_task, short_task, resumed_task = (automation.create_research_task(agent, angle) for angle in "abc")
+    long_task.guardrail(TaskOutput(description="a", raw=RESEARCH_OUTPUT, agent=agent.role))
+    short_task.guardrail(TaskOutput(description="b", raw="Make lanzó agentes IA en 2025.", agent=agent.role))
+
+    assert compaction_report(long_task)["duplicates_removed"] > 0
+    assert compaction_report(short_task)["duplicates_removed"] == 0
+    assert compaction_report(resumed_task) == {}  # research reanudado: no se compactó nada
+    print("✅ Informe por tarea")
+
+
+if __name__ == "__main__":
+    print("🤖 Test compactación de contexto")
+    print("=" * 50)
+
+    for test in [test_sources_deduplicated, test_budget_respected, test_short_context_untouched,
+                 test_report_per_research_task]:
+        test()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Compactación de contexto funcionando correctamente!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test de las portadas: plantilla, tamaños y formatos, sin metadatos, caché por hash y pool de procesos
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from PIL import Image
+
+from blog_automation import BlogAutomationCrew
+from blog_post import BlogPost, Post, stage_post
+from cover_images import COVER_SIZE, cover_formats, generate_covers, publish_cover
+from site_config import SiteConfig
+
+POST = {"label": "IA para tu PyME", "title": "RAG para pymes: conecta tus documentos con un modelo de lenguaje",
+        "date": "03/02/2025", "author": "Jon Ortega", "readTime": "5 MIN", "summary": "Resumen.",
+        "coverImage": "/images/blog/rag-pymes.jpeg", "slug": "rag-pymes", "content": "## RAG\n\nContenido."}
+
+
+def test_cover_variants_and_cache():
+    """Verifica tamaños, formatos y metadatos, y que un redeploy con el mismo título sale de la caché"""
+    print("🔍 Testing cover rendering...")
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"COVER_WIDTHS": "480,800"}):
+        cover_dir, cache_dir = os.path.join(tmp, "images", "blog"), os.path.join(tmp, "cache")
+        report = publish_cover(POST, "wrappers.es", cover_dir, cache_dir)
+        assert report["rendered"] and report["written"] == len(report["files"]) == 3 * (1 + len(cover_formats()))
+
+        for name in report["files"]:
+            with Image.open(os.path.join(cover_dir, name)) as image:
+                width = int(name.rsplit("-", 1)[1].split("w.")[0]) if "w." in name else COVER_SIZE[0]
+                assert image.width == width and image.format.lower() == name.rsplit(".", 1)[1]
+                assert not image.getexif() and not {"icc_profile", "xmp", "exif"} & set(image.info)
+        assert os.path.exists(os.path.join(cover_dir, "rag-pymes.jpeg"))
+
+        again = publish_cover(POST, "wrappers.es", cover_dir, cache_dir)
+        assert again["hash"] == report["hash"] and not again["rendered"] and again["written"] == 0
+        renamed = publish_cover({**POST, "title": "RAG para pymes, segunda parte"}, "wrappers.es", cover_dir, cache_dir)
+        assert renamed["rendered"] and renamed["hash"] != report["hash"]
+    print("✅ Variantes sin metadatos y caché por contenido")
+
+
+def test_batch_uses_process_pool():
+    """Verifica que en lote se renderiza en procesos y que los títulos repetidos se renderizan una vez"""
+    print("\n🔍 Testing batch generation...")
+
+    posts = [{**POST, "slug": "rag-pymes", "title": "RAG para pymes"},
+             {**POST, "slug": "rag-pymes-2", "title": "RAG para pymes"},
+             {**POST, "slug": "agentes", "title": "Agentes de IA para ventas"}]
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"COVER_FORMATS": "webp"}):
+        cover_dir, cache_dir = os.path.join(tmp, "covers"), os.path.join(tmp, "cache")
+        reports = generate_covers(posts, "wrappers.es", cover_dir, cache_dir, workers=2)
+        assert [report["slug"] for report in reports] == ["rag-pymes", "rag-pymes-2", "agentes"]
+        assert all(report["rendered"] for report in reports) and len(os.listdir(cache_dir)) == 2
+        assert os.path.exists(os.path.join(cover_dir, "rag-pymes-2-480w.webp"))
+
+        reports = generate_covers(posts, "wrappers.es", cover_dir, cache_dir, workers=2)
+        assert not any(report["rendered"] or report["written"] for report in reports)
+    print("✅ Portadas en lote con pool de procesos")
+
+
+def test_deploy_generates_site_cover():
+    """Verifica que el deploy deja la portada en el directorio del sitio y git la incluye"""
+    print("\n🔍 Testing cover on deploy...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        site = SiteConfig("agencias", directory=os.path.join(tmp, "agencias"), brand="agencias.ai")
+        os.makedirs(site.directory)
+        crew = BlogAutomationCrew(site=site)
+        stage_post("rag-pymes.json", Post.from_model(BlogPost(**POST)), site.collection)
+        assert crew.blog_deployment_tool._run("rag-pymes.json").startswith("✅")
+
+        assert os.path.exists(os.path.join(site.directory, "images", "blog", "rag-pymes.jpeg"))
+        assert os.path.isdir(site.cover_cache)
+        assert crew.git_commit_tool.include_paths == ["images/blog"]
+    print("✅ Portada generada en el deploy")
+
+
+if __name__ == "__main__":
+    print("🤖 Test cover images")
+    print("=" * 50)
+
+    test_cover_variants_and_cache()
+    test_batch_uses_process_pool()
+    test_deploy_generates_site_cover()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Portadas funcionando correctamente!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test de deadlines por etapa, cancelación y checkpoint de salidas parciales
+"""
+
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.hooks import HookAborted
+from crewai.hooks.llm_hooks import get_before_llm_call_hooks
+
+from blog_automation import BlogAutomationCrew
+from deadlines import RunCheckpoint, RunDeadlines, find_run_for_task, run_with_deadline
+
+
+class FakeOutput:
+    raw = "Zapier AI Actions: automatizaciones en lenguaje natural por 20$/mes"
+
+
+class FakeTask:
+    callback = None
+
+
+def test_stage_deadline_cancels():
+    """Verifica que una etapa colgada devuelve el control al expirar su deadline"""
+    print("🔍 Testing stage deadline...")
+
+    deadlines = RunDeadlines(stage_limits={"research": 0.3})
+    deadlines.start_stage("research")
+    started = time.monotonic()
+    finished, result = run_with_deadline(lambda: time.sleep(5), deadlines)
+
+    assert finished is False and result is None
+    assert time.monotonic() - started < 2
+    assert deadlines.cancelled.is_set() and deadlines.exceeded.stage == "research"
+    print("✅ Deadline de etapa correcto")
+
+
+def before_llm_call(task):
+    """Ejecuta el hook de deadlines como lo haría CrewAI antes de una llamada LLM de la tarea"""
+    BlogAutomationCrew()  # instala los hooks
+    hook = next(hook for hook in get_before_llm_call_hooks() if hook.__name__ == "enforce_deadline")
+    hook(SimpleNamespace(task=task))
+
+
+def test_abandoned_worker_is_aborted():
+    """Verifica que el hilo abandonado tras el timeout ve la cancelación en su siguiente llamada LLM"""
+    print("\n🔍 Testing abandoned worker...")
+
+    deadlines = RunDeadlines(stage_limits={"research": 0.3})
+    task = FakeTask()
+    deadlines.register_task(task, "research")
+    calls, outcome = [], {}
+
+    def agent_loop():
+        try:
+            before_llm_call(task)
+            time.sleep(1)  # una herramienta lenta: el watchdog detecta el deadline y devuelve el control
+            while len(calls) < 100:  # un agente que no para de llamar al LLM
+                before_llm_call(task)
+                calls.append(time.monotonic())
+                time.sleep(0.05)
+        except HookAborted as e:
+            outcome["aborted"] = e
+
+    finished, _ = run_with_deadline(agent_loop, deadlines)
+    assert not finished
+    deadlines.worker.join(2)
+    assert not deadlines.worker.is_alive() and outcome["aborted"].source == "deadline"
+    assert len(calls) < 20 and find_run_for_task(task) == (None, None)  # se desregistra al terminar el hilo
+    print("✅ Hilo abandonado abortado")
+
+
+def test_completed_run_returns_result():
+    """Verifica que una ejecución dentro de plazo devuelve su resultado"""
+    print("\n🔍 Testing completed run...")
+
+    finished, result = run_with_deadline(lambda: "ok", RunDeadlines(total_limit=5))
+    assert finished is True and result == "ok"
+    print("✅ Ejecución a tiempo correcta")
+
+
+def test_partial_outputs_resumable():
+    """Verifica que la salida de una etapa terminada se guarda y se reutiliza tras un timeout"""
+    print("\n🔍 Testing checkpoint...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = RunCheckpoint(directory=tmp)
+        deadlines = RunDeadlines(checkpoint=checkpoint)
+        task = FakeTask()
+        deadlines.register_task(task, "research")
+        task.callback(FakeOutput())
+
+        assert RunCheckpoint(directory=tmp).resumable_output("research") is None  # aún no expiró
+        checkpoint.mark("timeout", stage="writing")
+        assert RunCheckpoint(directory=tmp).resumable_output("research") == FakeOutput.raw
+
+        # Una salida que no se puede serializar no deja temporales ni estropea el checkpoint
+        try:
+            checkpoint.save_stage("writing", object())
+            assert False, "la salida no es serializable"
+        except TypeError:
+            pass
+        assert os.listdir(tmp) == [os.path.basename(checkpoint.path)]
+        assert RunCheckpoint(directory=tmp).resumable_output("research") == FakeOutput.raw
+    print("✅ Checkpoint correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test deadlines")
+    print("=" * 50)
+
+    test_stage_deadline_cancels()
+    test_abandoned_worker_is_aborted()
+    test_completed_run_returns_result()
+    test_partial_outputs_resumable()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Deadlines funcionando correctamente!")
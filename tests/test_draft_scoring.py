@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test del modo best-of-N: puntuación determinista de borradores y parecido con posts publicados
+"""
+
+import inspect
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew
+from blog_post import Post
+from draft_scoring import heading_score, length_score, parse_word_range, rank_drafts, score_draft
+from search_index import PostSearchIndex
+
+PUBLISHED = [
+    {
+        "title": "Agentes verticales y RAG para atención al cliente",
+        "slug": "agentes-verticales-rag",
+        "summary": "Chatbots con memoria y ventana de contexto amplia.",
+        "content": "Un agente con RAG responde usando los documentos de la empresa.",
+    },
+    {
+        "title": "La automatización de precios impulsada por IA",
+        "slug": "automatizacion-precios-ia",
+        "summary": "Cómo ajustar precios automáticamente con inteligencia artificial.",
+        "content": "Los algoritmos de precios dinámicos permiten a las PyMEs competir.",
+    },
+]
+
+
+def make_post(content, slug="zapier-ai-actions", title="Zapier AI Actions para tu PyME"):
+    return Post(label="IA para tu PyME", title=title, date="21/07/2025", author="Jon Ortega", readTime="5 MIN",
+                summary="Automatiza hablando.", coverImage=f"/images/blog/{slug}.jpeg", slug=slug, content=content)
+
+
+def test_metrics():
+    """Verifica rango de palabras, longitud y estructura de encabezados"""
+    print("🔍 Testing draft metrics...")
+
+    assert parse_word_range("800-1200") == (800, 1200)
+    assert parse_word_range("500") == (500, 500)
+    assert length_score(1000, 800, 1200) == 1.0
+    assert length_score(400, 800, 1200) == 0.5
+    assert heading_score("## A\n\n## B\n\n### C\n") == 1.0
+    assert heading_score("## A\n") < 0.5
+    assert heading_score("# Título\n\n## A\n\n## B\n\n## C\n") == 0.5
+    print("✅ Métricas correctas")
+
+
+def test_similarity_against_archive():
+    """Verifica que un borrador casi duplicado se parece más a su original que a otro post"""
+    print("\n🔍 Testing archive similarity...")
+
+    index = PostSearchIndex.build(PUBLISHED)
+    draft = dict(PUBLISHED[0], slug="agentes-rag-clientes")
+    similar = index.similar(draft, limit=2)
+    assert similar[0]["slug"] == "agentes-verticales-rag" and similar[0]["similarity"] > 0.9
+    assert all(hit["similarity"] < 0.3 for hit in similar[1:])
+    assert index.similar({"title": "de la para"}) == []
+    print("✅ Similitud correcta")
+
+
+def test_best_draft_is_selected():
+    """Verifica que gana el borrador válido, original y con estructura; los inválidos van al final"""
+    print("\n🔍 Testing draft ranking...")
+
+    automation = BlogAutomationCrew()
+    index = PostSearchIndex.build(PUBLISHED)
+    body = "## Qué es\n\n## Cómo aplicarlo\n\n## Wrappers.es\n\n" + "palabra " * 900
+    drafts = [
+        make_post(body.replace("Wrappers.es", "Precios")),  # sin mención
+        make_post(body, slug="Zapier AI"),  # slug inválido
+        make_post(body),
+        make_post(body + " ".join(p["content"] for p in PUBLISHED) * 40, title=PUBLISHED[0]["title"]),
+    ]
+    scores = [
+        score_draft(post, automation.validate_blog_post_strict(post, ""), "800-1200", index.similar(post.to_dict(), 1))
+        for post in drafts
+    ]
+
+    assert scores[1]["valid"] is False
+    assert scores[2]["metrics"]["length"] == scores[2]["metrics"]["headings"] == scores[2]["metrics"]["wrappers"] == 1.0
+    assert scores[2]["metrics"]["originality"] > 0.95
+    assert scores[3]["closest_post"] == "agentes-verticales-rag" and scores[3]["metrics"]["originality"] < 1.0
+    ranking = rank_drafts(scores)
+    assert ranking[0] == 2 and ranking[-1] == 1
+    print("✅ Ranking correcto")
+
+
+def test_research_guardrail_is_inspectable():
+    """CrewAI lee el código fuente del guardrail al emitir sus eventos: debe ser una función o método"""
+    print("\n🔍 Testing research guardrail...")
+
+    automation = BlogAutomationCrew()
+    task = automation.create_research_task(automation.create_research_agent())
+    assert "compact_context" in inspect.getsource(task.guardrail)
+    print("✅ Guardrail inspeccionable")
+
+
+if __name__ == "__main__":
+    print("🤖 Test best-of-N drafts")
+    print("=" * 50)
+
+    test_metrics()
+    test_similarity_against_archive()
+    test_best_draft_is_selected()
+    test_research_guardrail_is_inspectable()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Best-of-N funcionando correctamente!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test del modo fan-out: un research alimenta varias tareas de escritura en paralelo
+"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai import Crew
+
+from blog_automation import BlogAutomationCrew, normalize_variants
+
+
+def test_normalize_variants():
+    """Verifica nombres, archivos de salida y rechazo de nombres repetidos"""
+    print("🔍 Testing variant normalization...")
+
+    variants = normalize_variants([{"name": "pymes"}, {"label": "IA para agencias"}])
+    assert [v["name"] for v in variants] == ["pymes", "v2"]
+    assert [v["file"] for v in variants] == ["variant-pymes.json", "variant-v2.json"]
+
+    with pytest.raises(ValueError):
+        normalize_variants([{"name": "pymes"}, {"name": "pymes"}])
+    with pytest.raises(ValueError):
+        normalize_variants([{"name": "Con espacios"}])
+    print("✅ Variantes correctas")
+
+
+def test_writing_tasks_share_research():
+    """Verifica que cada variante lleva sus parámetros y todas dependen del mismo research"""
+    print("\n🔍 Testing fan-out tasks...")
+
+    automation = BlogAutomationCrew()
+    research_task = automation.create_research_task(automation.create_research_agent())
+    variants = normalize_variants([
+        {"name": "pymes", "author": "Jon Ortega", "read_time": "5 MIN"},
+        {"name": "agencias", "label": "IA para agencias", "word_range": "500-700"},
+    ])
+    writing_tasks = [
+        automation.create_writing_task(automation.create_writer_agent(), research_task,
+                                       label=v.get("label", "IA para tu PyME"), author=v.get("author"),
+                                       read_time=v.get("read_time"), word_range=v.get("word_range", "800-1200"),
+                                       async_execution=True)
+        for v in variants
+    ]
+
+    assert all(task.context == [research_task] and task.async_execution for task in writing_tasks)
+    assert '"author": "Jon Ortega"' in writing_tasks[0].description
+    assert '"label": "IA para agencias"' in writing_tasks[1].description
+    assert "500-700 words" in writing_tasks[1].description
+
+    # CrewAI acepta escrituras asíncronas seguidas de sus QA síncronos
+    qa_agent = automation.create_qa_agent()
+    qa_tasks = [automation.create_qa_task(qa_agent, task) for task in writing_tasks]
+    Crew(agents=[research_task.agent, qa_agent], tasks=[research_task] + writing_tasks + qa_tasks)
+    print("✅ Tareas de fan-out correctas")
+
+
+if __name__ == "__main__":
+    print("🤖 Test fan-out")
+    print("=" * 50)
+
+    test_normalize_variants()
+    test_writing_tasks_share_research()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Fan-out funcionando correctamente!")
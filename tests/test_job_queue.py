@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test de la cola de trabajos en SQLite: claim/ack, visibility timeout y pool de workers
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, WorkerPool
+
+
+def test_claim_ack_and_visibility_timeout():
+    """Verifica que un job expirado se puede reclamar de nuevo y que el worker antiguo ya no puede hacer ack"""
+    print("🔍 Testing claim/ack...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        job_id = queue.enqueue({"angle": "Zapier AI Actions para PyMEs", "author": "Jon Ortega"}, max_attempts=2)
+
+        job = queue.claim("worker-a", visibility_timeout=0.2)
+        assert job["id"] == job_id and job["attempts"] == 1 and job["params"]["author"] == "Jon Ortega"
+        assert queue.claim("worker-b", visibility_timeout=0.2) is None  # aún invisible
+
+        time.sleep(0.3)
+        job = queue.claim("worker-b", visibility_timeout=60)
+        assert job["claimed_by"] == "worker-b" and job["attempts"] == 2
+
+        assert queue.ack(job_id, "worker-a", {"status": "success"}) is False
+        timings = {"total_elapsed_s": 12.5, "total_deadline_s": 1800, "stages": {"research": {"elapsed_s": 4.0, "deadline_s": 300}}}
+        assert queue.ack(job_id, "worker-b", {"status": "success"}, timings) is True
+
+        stored = queue.get(job_id)
+        assert stored["status"] == "done"
+        assert stored["stage_timings"]["stages"]["research"]["elapsed_s"] == 4.0
+        assert [j["id"] for j in queue.list("done")] == [job_id]
+
+        with pytest.raises(ValueError):
+            queue.enqueue({"date": "2025-07-21"})
+    print("✅ Claim/ack correcto")
+
+
+def test_fail_requeues_until_attempts_exhausted():
+    """Verifica reintentos y paso a 'failed'"""
+    print("\n🔍 Testing retries...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        job_id = queue.enqueue({}, max_attempts=2)
+
+        queue.claim("w")
+        queue.fail(job_id, "w", "timeout")
+        assert queue.get(job_id)["status"] == "queued"
+        queue.claim("w")
+        queue.fail(job_id, "w", "timeout")
+        assert queue.get(job_id)["status"] == "failed"
+    print("✅ Reintentos correctos")
+
+
+def test_worker_pool_processes_each_job_once():
+    """Verifica que varios workers reparten los jobs sin duplicarlos"""
+    print("\n🔍 Testing worker pool...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        ids = [queue.enqueue({"angle": f"tema {i}"}) for i in range(6)]
+        seen, lock = [], threading.Lock()
+
+        def runner(job):
+            with lock:
+                seen.append(job["id"])
+            time.sleep(0.05)
+            if job["params"]["angle"] == "tema 5":
+                return {"status": "error", "message": "validación fallida"}
+            return {"status": "success", "message": "ok", "stage_timings": {"total_elapsed_s": 0.05}}
+
+        pool = WorkerPool(queue, workers=3, runner=runner, poll_interval=0.05)
+        pool.start(exit_when_empty=True)
+        pool.join(10)
+
+        assert sorted(seen) == ids
+        statuses = {job["id"]: job["status"] for job in queue.list()}
+        assert list(statuses.values()).count("done") == 5
+        assert statuses[ids[5]] == "failed"  # los errores de validación no se reintentan
+    print("✅ Pool de workers correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test job queue")
+    print("=" * 50)
+
+    test_claim_ack_and_visibility_timeout()
+    test_fail_requeues_until_attempts_exhausted()
+    test_worker_pool_processes_each_job_once()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Cola de trabajos funcionando correctamente!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test del logging estructurado: JSON lines con run_id, formateo perezoso y modo producción
+"""
+
+import io
+import json
+import logging
+import os
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew
+from structured_logging import configure_logging, crew_verbose, get_logger, logged_run, run_context
+
+
+class _Expensive:
+    """Cuenta cuántas veces se formatea"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "volcado enorme"
+
+
+def _capture(level="INFO", fmt="json"):
+    stream = io.StringIO()
+    configure_logging(level=level, fmt=fmt, stream=stream, force=True)
+    return stream
+
+
+def test_json_lines_carry_run_id_and_fields():
+    """Verifica una línea JSON por evento con nivel, logger, run_id y campos extra"""
+    print("🔍 Testing JSON lines...")
+
+    stream = _capture()
+    try:
+        log = get_logger("test")
+        with run_context("run-1"):
+            log.info("Post desplegado: %s posts", 3, extra={"fields": {"slug": "zapier"}})
+            with run_context():  # anidado sin id: conserva el del run exterior
+                log.warning("reintento")
+        log.info("fuera de un run")
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [line["msg"] for line in lines] == ["Post desplegado: 3 posts", "reintento", "fuera de un run"]
+        assert lines[0]["level"] == "info" and lines[0]["logger"] == "blog.test" and lines[0]["slug"] == "zapier"
+        assert [line["run_id"] for line in lines] == ["run-1", "run-1", None]
+    finally:
+        configure_logging(force=True)
+    print("✅ JSON lines correctas")
+
+
+def test_disabled_levels_are_never_formatted():
+    """Verifica que un debug con el nivel INFO no formatea sus argumentos ni escribe nada"""
+    print("\n🔍 Testing lazy formatting...")
+
+    stream = _capture(level="INFO")
+    try:
+        dump = _Expensive()
+        get_logger("test").debug("contenido: %s", dump)
+        assert dump.formatted == 0 and stream.getvalue() == ""
+
+        configure_logging(level="DEBUG", fmt="json", stream=stream, force=True)
+        get_logger("test").debug("contenido: %s", dump)
+        assert dump.formatted == 1 and "volcado enorme" in stream.getvalue()
+    finally:
+        configure_logging(force=True)
+    print("✅ Formateo perezoso")
+
+
+def test_production_mode_silences_crews_and_tags_results():
+    """Verifica que en producción agentes y crews no son verbose y que cada run devuelve su run_id"""
+    print("\n🔍 Testing production mode...")
+
+    with mock.patch.dict(os.environ, {"LOG_MODE": "production"}):
+        assert crew_verbose() is False
+        assert BlogAutomationCrew().create_writer_agent().verbose is False
+    assert crew_verbose() is (logging.getLogger("blog").getEffectiveLevel() <= logging.INFO)
+
+    @logged_run
+    def run(run_id=None):
+        return {"status": "success"}
+
+    assert run(run_id="job-7")["run_id"] == "job-7"
+    assert len(run()["run_id"]) == 12
+    print("✅ Modo producción correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test logging")
+    print("=" * 50)
+
+    test_json_lines_carry_run_id_and_fields()
+    test_disabled_levels_are_never_formatted()
+    test_production_mode_silences_crews_and_tags_results()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Logging estructurado funcionando correctamente!")
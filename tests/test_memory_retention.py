@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test de la retención acotada de la memoria del Crew
+"""
+
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Memory lo exige al construirse; no se llama a la API
+
+from crewai.events import crewai_event_bus
+from crewai.events.types.memory_events import MemoryRetrievalCompletedEvent
+from crewai.memory.types import MemoryRecord
+
+import blog_automation
+from structured_logging import run_context
+
+from memory_retention import (
+    CREW_MEMORY_SCOPE, MemoryLatencyTracker, MemoryRetentionPolicy, create_bounded_memory, enforce_memory_retention
+)
+
+
+def make_record(content, days_old=0, importance=0.5):
+    created = datetime.utcnow() - timedelta(days=days_old)
+    return MemoryRecord(content=content, scope=CREW_MEMORY_SCOPE, importance=importance,
+                        created_at=created, last_accessed=created, embedding=[0.1, 0.2, 0.3, 0.4])
+
+
+def test_retention_expires_and_evicts():
+    """Verifica que se borran las entradas caducadas y, después, las menos importantes"""
+    print("🔍 Testing memory retention...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory"
+        storage = create_bounded_memory(path=path)._storage
+        storage.save([
+            make_record("Tendencia antigua de chatbots", days_old=200),
+            make_record("Zapier lanza AI Actions", importance=0.9),
+            make_record("Precio de Make para PyMEs", importance=0.2),
+            make_record("HubSpot añade agentes de ventas", importance=0.6),
+        ])
+
+        policy = MemoryRetentionPolicy(max_entries=2, max_age_days=90, compact_every_runs=10)
+        report = enforce_memory_retention(storage, policy, path)
+
+        assert report["entries_before"] == 4
+        assert report["expired"] == 1
+        assert report["evicted_entries"] == 1
+        assert report["entries_after"] == 2
+        assert report["compacted"] is True  # se borró algo: toca compactar
+        remaining = {record.content for record in storage.list_records(limit=10)}
+        assert remaining == {"Zapier lanza AI Actions", "HubSpot añade agentes de ventas"}
+    print("✅ Retención correcta")
+
+
+def test_periodic_compaction():
+    """Verifica que sin borrados se compacta solo cada N ejecuciones"""
+    print("\n🔍 Testing periodic compaction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory"
+        storage = create_bounded_memory(path=path)._storage
+        storage.save([make_record("Zapier lanza AI Actions")])
+        policy = MemoryRetentionPolicy(max_entries=10, compact_every_runs=2)
+
+        assert enforce_memory_retention(storage, policy, path)["compacted"] is False
+        assert enforce_memory_retention(storage, policy, path)["compacted"] is True
+        assert enforce_memory_retention(storage, policy, path)["compacted"] is False
+    print("✅ Compactación periódica correcta")
+
+
+def test_latency_tracker():
+    """Verifica la agregación del tiempo de recuperación por tarea"""
+    print("\n🔍 Testing retrieval latency tracker...")
+
+    tracker = MemoryLatencyTracker()
+    tracker.record("Research the latest AI trends\nmore detail", 12.5)
+    tracker.record("Research the latest AI trends\nmore detail", 7.5)
+    tracker.record(None, 3)
+
+    snapshot = tracker.snapshot()
+    assert snapshot["Research the latest AI trends"] == {"retrievals": 2, "total_ms": 20.0}
+    assert snapshot["unknown"]["retrievals"] == 1
+    assert tracker.snapshot() == {}
+    print("✅ Latencia de recuperación correcta")
+
+
+def test_latency_per_concurrent_run():
+    """Verifica que dos ejecuciones simultáneas reciben solo su latencia de memoria, sin borrarse entre ellas"""
+    print("\n🔍 Testing retrieval latency per run...")
+
+    blog_automation.BlogAutomationCrew()  # instala el listener
+    emitted = threading.Barrier(2)
+
+    def run(run_id, task_name, milliseconds):
+        with run_context(run_id):
+            crewai_event_bus.emit(None, MemoryRetrievalCompletedEvent(task_name=task_name, memory_content="",
+                                                                      retrieval_time_ms=milliseconds))
+            emitted.wait()  # las dos ejecuciones registran antes de que ninguna lea su informe
+
+    threads = [threading.Thread(target=run, args=("run-a", "Research", 10)),
+               threading.Thread(target=run, args=("run-b", "Write", 30))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    crewai_event_bus.flush()
+
+    assert blog_automation.memory_latency.snapshot("run-a") == {"Research": {"retrievals": 1, "total_ms": 10.0}}
+    assert blog_automation.memory_latency.snapshot("run-b") == {"Write": {"retrievals": 1, "total_ms": 30.0}}
+    print("✅ Latencia de memoria por ejecución")
+
+
+if __name__ == "__main__":
+    print("🤖 Test memory retention")
+    print("=" * 50)
+
+    test_retention_expires_and_evicts()
+    test_periodic_compaction()
+    test_latency_tracker()
+    test_latency_per_concurrent_run()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Retención de memoria funcionando correctamente!")
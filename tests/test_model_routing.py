@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test del modelo por agente, el enrutado por latencia/errores y la latencia LLM por agente
+"""
+
+import os
+import threading
+from datetime import timedelta
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.events import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallStartedEvent, LLMCallType
+
+import blog_automation
+from blog_automation import BlogAutomationCrew, agent_latency_report
+from model_routing import AgentModelConfig, ModelRouter
+from structured_logging import run_context
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_agent_model_config():
+    """Verifica modelo, temperatura y max_tokens por agente desde el entorno"""
+    print("🔍 Testing per-agent config...")
+
+    env = {"QA_MODEL": "gpt-4.1-nano", "QA_MAX_TOKENS": "600", "WRITER_TEMPERATURE": "0.5"}
+    with mock.patch.dict(os.environ, env):
+        automation = BlogAutomationCrew()
+        qa = automation.create_qa_agent().llm
+        writer = automation.create_writer_agent().llm
+        assert (qa.model, qa.temperature, qa.max_tokens) == ("gpt-4.1-nano", 0.2, 600)
+        assert writer.temperature == 0.5
+    assert AgentModelConfig("technical").temperature == 0.1
+    print("✅ Configuración por agente correcta")
+
+
+def test_router_falls_back_while_primary_is_slow_or_failing():
+    """Verifica el desvío al modelo de respaldo y la vuelta al principal cuando caducan las muestras"""
+    print("\n🔍 Testing routing...")
+
+    clock = FakeClock()
+    router = ModelRouter(max_latency_ms=5000, max_error_rate=0.5, window_s=60, min_calls=3, clock=clock)
+    config = AgentModelConfig("research", model="gpt-4.1", fallback_model="gpt-4.1-mini")
+    with mock.patch.dict(os.environ, {"MODEL_ROUTING": "true"}):
+        router.record("gpt-4.1", 9000)
+        router.record("gpt-4.1", 8000)
+        assert router.choose(config) == ("gpt-4.1", None)  # pocas muestras todavía
+
+        router.record("gpt-4.1", 7000)
+        model, reason = router.choose(config)
+        assert model == "gpt-4.1-mini" and "latencia" in reason
+
+        clock.now += 61
+        assert router.choose(config) == ("gpt-4.1", None)
+
+        for ok in (False, False, True):
+            router.record("gpt-4.1", 100, ok)
+        assert "errores" in router.choose(config)[1]
+    assert router.choose(config)[0] == "gpt-4.1"  # sin MODEL_ROUTING no se desvía nunca
+    print("✅ Enrutado correcto")
+
+
+def test_router_matches_provider_prefixed_models():
+    """Verifica que MODEL=openai/... se desvía con las muestras que CrewAI registra sin el prefijo"""
+    print("\n🔍 Testing provider prefix...")
+
+    router = ModelRouter(max_latency_ms=5000, min_calls=3, clock=FakeClock())
+    config = AgentModelConfig("writer", model="openai/gpt-4o-mini", fallback_model="openai/gpt-4.1-nano")
+    with mock.patch.dict(os.environ, {"MODEL_ROUTING": "true"}):
+        for _ in range(3):
+            router.record("gpt-4o-mini", 9000)  # event.model de LLM(model="openai/gpt-4o-mini")
+        assert router.health("openai/gpt-4o-mini")["calls"] == 3
+        model, reason = router.choose(config)
+        assert model == "openai/gpt-4.1-nano" and "latencia" in reason
+    print("✅ Prefijo de proveedor normalizado")
+
+
+def test_llm_events_feed_agent_latency():
+    """Verifica que los eventos de CrewAI acumulan la latencia por agente para el resultado"""
+    print("\n🔍 Testing agent latency...")
+
+    BlogAutomationCrew()  # instala los listeners
+    agent_latency_report()
+    started = LLMCallStartedEvent(call_id="lat-1", model="gpt-4.1-mini", agent_role="AI Content Researcher")
+    completed = LLMCallCompletedEvent(call_id="lat-1", model="gpt-4.1-mini", agent_role="AI Content Researcher",
+                                      response="ok", call_type=LLMCallType.LLM_CALL,
+                                      timestamp=started.timestamp + timedelta(milliseconds=250))
+    crewai_event_bus.emit(None, started)
+    crewai_event_bus.flush()
+    crewai_event_bus.emit(None, completed)
+
+    report = agent_latency_report()["AI Content Researcher"]
+    assert report["calls"] == 1 and report["models"] == {"gpt-4.1-mini": 1}
+    assert abs(report["mean_ms"] - 250) < 1
+    assert blog_automation.model_router.health("gpt-4.1-mini")["calls"] >= 1
+    print("✅ Latencia por agente registrada")
+
+
+def test_agent_latency_per_concurrent_run():
+    """Verifica que el informe de una ejecución no incluye ni borra las llamadas de otra simultánea"""
+    print("\n🔍 Testing agent latency per run...")
+
+    BlogAutomationCrew()  # instala los listeners
+    reports, emitted = {}, threading.Barrier(2)
+
+    def run(run_id, role, latency_ms):
+        with run_context(run_id):
+            started = LLMCallStartedEvent(call_id=f"{run_id}-1", model="gpt-4.1-mini", agent_role=role)
+            crewai_event_bus.emit(None, started)
+            crewai_event_bus.flush()
+            crewai_event_bus.emit(None, LLMCallCompletedEvent(
+                call_id=f"{run_id}-1", model="gpt-4.1-mini", agent_role=role, response="ok",
+                call_type=LLMCallType.LLM_CALL, timestamp=started.timestamp + timedelta(milliseconds=latency_ms)))
+            emitted.wait()
+            reports[run_id] = agent_latency_report()
+
+    threads = [threading.Thread(target=run, args=("run-a", "AI Content Researcher", 100)),
+               threading.Thread(target=run, args=("run-b", "Technical Blog Writer for SMBs", 300))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert list(reports["run-a"]) == ["AI Content Researcher"]
+    assert abs(reports["run-a"]["AI Content Researcher"]["mean_ms"] - 100) < 1
+    assert list(reports["run-b"]) == ["Technical Blog Writer for SMBs"]
+    print("✅ Latencia por agente de cada ejecución")
+
+
+if __name__ == "__main__":
+    print("🤖 Test model routing")
+    print("=" * 50)
+
+    test_per_agent_model_config()
+    test_router_falls_back_while_primary_is_slow_or_failing()
+    test_router_matches_provider_prefixed_models()
+    test_llm_events_feed_agent_latency()
+    test_agent_latency_per_concurrent_run()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Modelos por agente funcionando correctamente!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test de descarga y extracción de páginas con un servidor HTTP local
+"""
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_fetcher import PageCache, PageFetcher, extract_main_text
+
+ARTICLE_HTML = """<html><head><title>Zapier AI Actions</title></head><body>
+<nav>Inicio | Blog | Contacto</nav>
+<article><h1>Zapier lanza AI Actions</h1>
+<p>Zapier lanzó en enero de 2025 su función AI Actions para PyMEs.</p>
+<p>Cuesta 20 dólares al mes y se integra con más de 5000 aplicaciones.</p></article>
+<footer>Copyright 2025 - aviso legal y cookies</footer>
+<script>var tracking = "no debería aparecer";</script>
+</body></html>""".encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Servidor de prueba: /article (con ETag), /big (demasiado grande), /pdf (tipo no HTML)"""
+    requests_seen = []
+
+    def do_GET(self):
+        StandInHandler.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/article":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(ARTICLE_HTML)))
+            self.end_headers()
+            self.wfile.write(ARTICLE_HTML)
+        elif self.path == "/big":
+            body = b"<p>" + b"x" * 5000 + b"</p>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.end_headers()
+            self.wfile.write(b"%PDF")
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_extract_main_text():
+    """Verifica que se extrae el artículo sin navegación, footer ni scripts"""
+    print("🔍 Testing extract_main_text...")
+
+    extracted = extract_main_text(ARTICLE_HTML, "utf-8")
+    assert extracted["title"] == "Zapier AI Actions"
+    assert "20 dólares al mes" in extracted["text"]
+    assert "Contacto" not in extracted["text"] and "tracking" not in extracted["text"]
+    print("✅ Extracción correcta")
+
+
+def test_fetch_many_with_cache():
+    """Verifica descarga concurrente, límites y revalidación por ETag"""
+    print("\n🔍 Testing PageFetcher contra servidor local...")
+
+    server, base = _start_server()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = PageFetcher(cache_dir=cache_dir, max_bytes=1024, cache_ttl=0)
+            article, big, pdf = fetcher.fetch_many([f"{base}/article", f"{base}/big", f"{base}/pdf"])
+            assert article["from_cache"] is False and "AI Actions" in article["text"]
+            assert "error" in big and "error" in pdf
+
+            # Caché caducada (ttl=0): se revalida con If-None-Match y el servidor responde 304
+            again = fetcher.fetch(f"{base}/article")
+            assert again["from_cache"] is True and again["text"] == article["text"]
+            assert (("/article", '"v1"') in StandInHandler.requests_seen)
+    finally:
+        server.shutdown()
+    print("✅ Descarga concurrente y caché por ETag correctas")
+
+
+def test_cache_write_failure_leaves_no_tmp():
+    """Verifica que una escritura fallida en la caché no deja archivos temporales"""
+    print("\n🔍 Testing failed cache write...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            PageCache(cache_dir).put({"url": "https://wrappers.es", "text": object()})
+            assert False, "la entrada no es serializable"
+        except TypeError:
+            pass
+        assert os.listdir(cache_dir) == []
+    print("✅ Sin temporales huérfanos")
+
+
+if __name__ == "__main__":
+    print("🤖 Test PageFetcher")
+    print("=" * 50)
+
+    test_extract_main_text()
+    test_fetch_many_with_cache()
+    test_cache_write_failure_leaves_no_tmp()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡PageFetcher funcionando correctamente!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test de las escrituras en blog_posts.json: lock entre hilos y procesos, atomicidad y group commit
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from unittest import mock
+
+import pytest
+
+from post_collection import CollectionCorruptedError, GroupCommitter, append_posts, load_collection, write_collection
+
+
+def _append_from_process(path, worker):
+    for i in range(5):
+        append_posts([{"slug": f"p{worker}-{i}"}], path)
+
+
+def test_concurrent_appends_lose_nothing():
+    """Verifica que hilos y procesos que despliegan a la vez no pierden posts"""
+    print("🔍 Testing concurrent appends...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blog_posts.json")
+        threads = [threading.Thread(target=_append_from_process, args=(path, f"t{n}")) for n in range(4)]
+        spawn = multiprocessing.get_context("spawn")  # procesos independientes, como varios workers de la cola
+        processes = [spawn.Process(target=_append_from_process, args=(path, f"p{n}")) for n in range(3)]
+        for worker in threads + processes:
+            worker.start()
+        for worker in threads + processes:
+            worker.join(30)
+
+        slugs = [post["slug"] for post in load_collection(path)]
+        assert len(slugs) == len(set(slugs)) == 35
+        assert not [name for name in os.listdir(tmp) if name.endswith(".tmp")]
+    print("✅ Ningún post perdido")
+
+
+def test_failed_write_keeps_previous_collection():
+    """Verifica que un fallo a mitad de escritura no trunca el archivo y que un JSON corrupto no se vacía"""
+    print("\n🔍 Testing atomic write...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blog_posts.json")
+        write_collection([{"slug": "original"}], path)
+
+        with mock.patch("post_collection.os.fsync", side_effect=KeyboardInterrupt):  # tmp escrito, sin renombrar
+            with pytest.raises(KeyboardInterrupt):
+                append_posts([{"slug": "nuevo"}], path)
+        assert load_collection(path) == [{"slug": "original"}]
+        assert sorted(os.listdir(tmp)) == ["blog_posts.json", "blog_posts.json.lock"]  # sin temporales
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('[{"slug": "original"}, {"slug": "trunc')
+        with pytest.raises(CollectionCorruptedError):
+            append_posts([{"slug": "nuevo"}], path)
+        with open(path, encoding="utf-8") as f:
+            assert f.read().endswith("trunc")  # intacto para repararlo a mano
+    print("✅ Escritura atómica")
+
+
+def test_group_commit_merges_concurrent_posts():
+    """Verifica que los deploys simultáneos se escriben en menos commits que posts"""
+    print("\n🔍 Testing group commit...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blog_posts.json")
+        committer = GroupCommitter(path, window_ms=100)
+        totals = []
+        threads = [threading.Thread(target=lambda n=n: totals.append(committer.submit({"slug": f"g{n}"})))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert len(load_collection(path)) == 8
+        assert committer.stats["posts"] == 8 and committer.stats["commits"] < 8
+        assert max(totals) == 8
+    print(f"✅ Group commit: 8 posts en {committer.stats['commits']} escrituras")
+
+
+if __name__ == "__main__":
+    print("🤖 Test post collection")
+    print("=" * 50)
+
+    test_concurrent_appends_lose_nothing()
+    test_failed_write_keeps_previous_collection()
+    test_group_commit_merges_concurrent_posts()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Colección de posts segura!")
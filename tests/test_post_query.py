@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test de la API de consulta indexada sobre blog_posts.json
+"""
+
+import json
+import os
+import tempfile
+from functools import partial
+from unittest import mock
+
+from post_collection import append_posts, write_collection
+from post_query import (
+    PostQueryIndex, get_post, load_query_index, query_posts, scan_collection, update_query_index_safely
+)
+
+POSTS = [
+    {"label": "IA para tu PyME", "title": "Zapier AI Actions", "date": "21/07/2025", "author": "Jon Ortega",
+     "slug": "zapier-ai-actions", "content": "Llaves {dentro} del \"contenido\" y una barra \\ al final \\"},
+    {"label": "IA para agencias", "title": "RAG para agencias", "date": "03/02/2024", "author": "Leire Legarreta",
+     "slug": "rag-agencias", "content": "## RAG\n\n}]"},
+    {"label": "IA para tu PyME", "title": "Agentes verticales", "date": "15/09/2025", "author": "Leire Legarreta",
+     "slug": "agentes-verticales", "content": "Texto"},
+]
+
+
+def test_scan_finds_each_post_offset():
+    """Verifica que las posiciones en bytes delimitan cada post aunque el contenido tenga llaves y comillas"""
+    print("🔍 Testing collection scan...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blog_posts.json")
+        write_collection(POSTS, path)
+        with open(path, "rb") as f:
+            data = f.read()
+        spans = list(scan_collection(path))
+        assert [json.loads(data[start:start + length]) for start, length in spans] == POSTS
+    print("✅ Posiciones correctas")
+
+
+def test_queries_by_author_label_and_date():
+    """Verifica filtros combinados, orden del más reciente y paginación"""
+    print("\n🔍 Testing queries...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = os.path.join(tmp, "blog_posts.json")
+        index_path = os.path.join(tmp, "blog_posts.idx.json")
+        write_collection(POSTS, collection)
+
+        def query(**filters):
+            return [hit["slug"] for hit in query_posts(index_path=index_path, collection_path=collection, **filters)]
+
+        assert query() == ["agentes-verticales", "zapier-ai-actions", "rag-agencias"]
+        assert query(author="leire legarreta", date_from="01/01/2025", date_to="31/12/2025") == ["agentes-verticales"]
+        assert query(label="IA para tu PyME", limit=1) == ["agentes-verticales"]
+        assert query(limit=1, offset=1) == ["zapier-ai-actions"]
+        assert query(author="Nadie") == []
+
+        hit = query_posts(limit=1, index_path=index_path, collection_path=collection)[0]
+        assert hit == {"slug": "agentes-verticales", "date": "15/09/2025", "author": "Leire Legarreta",
+                       "label": "IA para tu PyME", "title": "Agentes verticales"}
+        assert "content" not in hit
+    print("✅ Consultas correctas")
+
+
+def test_random_access_and_refresh_after_deploy():
+    """Verifica get() por slug y que el índice se rehace cuando la colección cambia"""
+    print("\n🔍 Testing random access...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = os.path.join(tmp, "blog_posts.json")
+        index_path = os.path.join(tmp, "blog_posts.idx.json")
+        write_collection(POSTS, collection)
+
+        assert get_post("zapier-ai-actions", index_path, collection) == POSTS[0]
+        assert get_post("no-existe", index_path, collection) is None
+
+        new_post = {"label": "IA para tu PyME", "title": "Nuevo", "date": "01/10/2025", "author": "Elbio Nielsen",
+                    "slug": "nuevo", "content": "..."}
+        append_posts([new_post], collection)
+        assert get_post("nuevo", index_path, collection) == new_post
+        assert len(load_query_index(index_path, collection)) == 4
+
+        with open(index_path, encoding="utf-8") as f:
+            assert len(PostQueryIndex.from_dict(json.load(f))) == 4  # persistido en disco
+    print("✅ Acceso aleatorio correcto")
+
+
+def test_deploy_updates_index_without_rescanning():
+    """Verifica que el deploy rehace el índice con los tramos de la escritura, sin recorrer ni parsear el archivo"""
+    print("\n🔍 Testing index update on deploy...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = os.path.join(tmp, "blog_posts.json")
+        index_path = os.path.join(tmp, "blog_posts.idx.json")
+        write_collection(POSTS, collection)
+        load_query_index(index_path, collection)
+
+        new_post = {"label": "IA para tu PyME", "title": "Nuevo", "date": "01/10/2025", "author": "Elbio Nielsen",
+                    "slug": "nuevo", "content": "Tildes: acción, €"}
+        with mock.patch("post_query.PostQueryIndex.build", side_effect=AssertionError("reconstrucción completa")):
+            append_posts([new_post], collection,
+                         after_write=partial(update_query_index_safely, index_path=index_path, collection_path=collection))
+            assert get_post("nuevo", index_path, collection) == new_post
+            assert get_post("zapier-ai-actions", index_path, collection) == POSTS[0]
+        assert PostQueryIndex.build(collection).rows == load_query_index(index_path, collection).rows
+    print("✅ Índice actualizado sin releer la colección")
+
+
+if __name__ == "__main__":
+    print("🤖 Test post query")
+    print("=" * 50)
+
+    test_scan_finds_each_post_offset()
+    test_queries_by_author_label_and_date()
+    test_random_access_and_refresh_after_deploy()
+    test_deploy_updates_index_without_rescanning()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Consultas indexadas funcionando correctamente!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test del prompt caching: prefijo estable en las tareas y medición de tokens cacheados frente a no cacheados
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew
+from token_budget import RunUsage, UsageLedger, estimate_cost, normalize_usage
+
+
+def common_prefix(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+def test_task_prompts_share_prefix():
+    """Verifica que lo variable (ángulo, fecha, autor, label, longitud) va al final de las instrucciones"""
+    print("🔍 Testing stable prompt prefix...")
+
+    automation = BlogAutomationCrew()
+    research_agent, writer_agent = automation.create_research_agent(), automation.create_writer_agent()
+    research_a = automation.create_research_task(research_agent, angle="Agentes IA para ventas")
+    research_b = automation.create_research_task(research_agent, angle="Facturación automática")
+    prefix = common_prefix(research_a.description, research_b.description)
+    assert research_a.description[prefix:] == "Agentes IA para ventas"
+
+    writing_a = automation.create_writing_task(writer_agent, research_a, label="IA para agencias",
+                                               date="01/02/2025", author="Jon Ortega", read_time="4 MIN",
+                                               word_range="500-700")
+    writing_b = automation.create_writing_task(writer_agent, research_b, date="15/03/2025",
+                                               author="Leire Legarreta", read_time="6 MIN")
+    prefix = common_prefix(writing_a.description, writing_b.description)
+    assert writing_a.description.index("POST FIELDS:") < prefix  # instrucciones y pitch, idénticos
+    assert prefix > 0.8 * len(writing_a.description)
+    assert writing_a.description.rstrip().endswith("WORD RANGE: 500-700 words")
+
+    technical_agent = automation.create_technical_agent()
+    technical_a = automation.create_technical_task(technical_agent, writing_a, "post_a.json")
+    technical_b = automation.create_technical_task(technical_agent, writing_b, "post_b.json")
+    assert "post_a.json" not in technical_a.description[:common_prefix(technical_a.description,
+                                                                       technical_b.description)]
+    print("✅ Las partes variables van al final")
+
+
+def test_cached_tokens_are_measured():
+    """Verifica la normalización de usage y el informe de aciertos de caché por llamada y por agente"""
+    print("\n🔍 Testing cached token accounting...")
+
+    openai_usage = {"prompt_tokens": 2000, "completion_tokens": 300, "prompt_tokens_details": {"cached_tokens": 1536}}
+    assert normalize_usage(openai_usage)["cached_prompt_tokens"] == 1536
+    assert normalize_usage({"prompt_tokens": 100, "cache_read_input_tokens": 500})["cached_prompt_tokens"] == 100
+    assert normalize_usage(None) == {"prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
+    assert estimate_cost("gpt-4.1-mini", openai_usage) == estimate_cost(
+        "gpt-4.1-mini", {"prompt_tokens": 2000, "cached_prompt_tokens": 1536, "completion_tokens": 300})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usage = RunUsage(UsageLedger(os.path.join(tmp, "ledger.jsonl")))
+        usage.record(None, "Research", "AI Content Researcher", "gpt-4.1-mini", {"prompt_tokens": 2000})
+        usage.record(None, "Research", "AI Content Researcher", "gpt-4.1-mini", openai_usage)
+        usage.record(None, "Write", "Technical Blog Writer for SMBs", "gpt-4.1-mini",
+                     {"prompt_tokens": 1000, "cached_prompt_tokens": 1000})
+
+        cache = usage.report()["prompt_cache"]
+        assert cache["calls"] == 3 and cache["calls_with_hits"] == 2
+        assert cache["cached_prompt_tokens"] == 2536 and cache["uncached_prompt_tokens"] == 2464
+        assert cache["hit_rate"] == round(2536 / 5000, 3)
+        assert cache["hit_rate_by_agent"] == {"AI Content Researcher": 0.384, "Technical Blog Writer for SMBs": 1.0}
+        assert [call["cached_prompt_tokens"] for call in cache["per_call"]] == [0, 1536, 1000]
+        assert cache["per_call"][1]["uncached_prompt_tokens"] == 464
+    print("✅ Tokens cacheados medidos")
+
+
+if __name__ == "__main__":
+    print("🤖 Test prompt caching")
+    print("=" * 50)
+
+    test_task_prompts_share_prefix()
+    test_cached_tokens_are_measured()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Prompt caching funcionando correctamente!")
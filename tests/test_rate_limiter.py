@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test del rate limiter adaptativo compartido
+"""
+
+import threading
+import time
+
+from rate_limiter import AdaptiveTokenBucket, get_rate_limiter, parse_retry_after, rate_limiter_metrics
+
+
+def test_bucket_throttles_after_burst():
+    """Verifica que tras agotar el burst las llamadas esperan en cola"""
+    print("🔍 Testing token bucket...")
+
+    bucket = AdaptiveTokenBucket("test", rate_per_minute=600, burst=2)  # 10 req/s
+    started = time.monotonic()
+    waits = [bucket.acquire() for _ in range(4)]
+    elapsed = time.monotonic() - started
+
+    assert waits[0] == 0 and waits[1] == 0
+    assert waits[3] > 0 and elapsed >= 0.15
+    stats = bucket.stats()
+    assert stats["calls"] == 4 and stats["throttled_calls"] == 2
+    assert stats["queue_delay_total_s"] > 0
+    print(f"✅ Espera total en cola: {stats['queue_delay_total_s']}s")
+
+
+def test_retry_after_and_recovery():
+    """Verifica que un 429 reduce la tasa, respeta Retry-After y se recupera con éxitos"""
+    print("\n🔍 Testing 429 adaptation...")
+
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("not a date") is None
+
+    bucket = AdaptiveTokenBucket("test", rate_per_minute=600, burst=5)
+    bucket.on_response(429, {"Retry-After": "0.2"})
+    assert bucket.stats()["current_rpm"] == 300
+    assert bucket.acquire() >= 0.15
+
+    for _ in range(20):
+        bucket.on_response(200)
+    assert bucket.stats()["current_rpm"] == 600
+    print("✅ Adaptación a 429 correcta")
+
+
+def test_shared_across_threads():
+    """Verifica que el limiter es único por proveedor y seguro entre hilos"""
+    print("\n🔍 Testing shared limiter...")
+
+    limiter = get_rate_limiter("test-shared")
+    assert get_rate_limiter("test-shared") is limiter
+
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert rate_limiter_metrics()["test-shared"]["calls"] == 5
+    print("✅ Limiter compartido correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test rate limiter")
+    print("=" * 50)
+
+    test_bucket_throttles_after_burst()
+    test_retry_after_and_recovery()
+    test_shared_across_threads()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Rate limiter funcionando correctamente!")
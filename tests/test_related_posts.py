@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test de los posts relacionados (TF-IDF vectorizado) calculados en el deploy
+"""
+
+import math
+import os
+import random
+import tempfile
+import tracemalloc
+from collections import Counter
+from unittest import mock
+
+import numpy as np
+
+from post_collection import append_posts, load_collection, write_collection
+from related_posts import RELATED_FIELD, RelatedPostsMatrix, backfill_related_posts, link_related_posts
+from search_index import term_frequencies
+
+POSTS = [
+    {"slug": "rag-pymes", "title": "RAG para pymes", "summary": "Recuperación aumentada para pymes",
+     "content": "Un sistema RAG conecta documentos de la empresa con un modelo de lenguaje."},
+    {"slug": "agentes-ventas", "title": "Agentes de IA para ventas", "summary": "Automatizar ventas con agentes",
+     "content": "Los agentes automatizan el seguimiento de clientes y las ventas."},
+    {"slug": "rag-documentos", "title": "RAG sobre documentos internos", "summary": "Buscar en documentos",
+     "content": "Indexar documentos internos para un sistema RAG con modelo de lenguaje."},
+    {"slug": "facturas", "title": "Facturas automáticas", "summary": "Contabilidad sin papel",
+     "content": "Digitalizar facturas y contabilidad."},
+]
+
+NEW_POST = {"slug": "agentes-clientes", "title": "Agentes para atención al cliente",
+            "summary": "Agentes que atienden clientes", "content": "Agentes de IA para clientes y ventas."}
+
+
+def cosine_reference(posts, a, b):
+    """Referencia sin vectorizar: coseno TF-IDF (tf sublineal) entre dos posts"""
+    vectors = [{term: 1 + math.log(freq) for term, freq in term_frequencies(post).items()} for post in posts]
+    df = Counter(term for vector in vectors for term in vector)
+    idf = {term: math.log((1 + len(posts)) / (1 + count)) + 1 for term, count in df.items()}
+    weighted = [{term: tf * idf[term] for term, tf in vector.items()} for vector in vectors]
+    dot = sum(weight * weighted[b].get(term, 0) for term, weight in weighted[a].items())
+    norm = lambda vector: math.sqrt(sum(weight * weight for weight in vector.values()))
+    return dot / (norm(weighted[a]) * norm(weighted[b]))
+
+
+def test_incremental_matches_full_rebuild():
+    """Verifica que añadir posts de uno en uno da los mismos relacionados que recalcular todo"""
+    print("🔍 Testing incremental update...")
+
+    posts = POSTS + [NEW_POST]
+    incremental = RelatedPostsMatrix(k=2)
+    incremental.add_posts(posts[:2])
+    for post in posts[2:]:
+        incremental.add_posts([post])
+    full = RelatedPostsMatrix.build(posts, k=2)
+
+    assert [incremental.related(i) for i in range(len(posts))] == [full.related(i) for i in range(len(posts))]
+    # El post recién añadido se puntúa con el IDF actual; los anteriores conservan el de su momento
+    assert np.allclose(incremental.related_score[-1], full.related_score[-1], atol=1e-5)
+    assert abs(full.related_score[4][0] - cosine_reference(posts, 4, 1)) < 1e-5
+    assert full.related(0) == ["rag-documentos"]  # sin términos en común no hay relación
+    assert full.related(4)[0] == "agentes-ventas"
+    print("✅ Actualización incremental igual que la reconstrucción")
+
+
+def test_rebuild_block_memory_is_bounded():
+    """Verifica que un bloque de la reconstrucción no materializa una matriz densa (no-ceros x filas del bloque)"""
+    print("\n🔍 Testing rebuild memory...")
+
+    words = [f"termino{i}" for i in range(3000)]
+    rng = random.Random(7)
+    posts = [{"slug": f"post-{i}", "title": " ".join(rng.sample(words, 5)), "content": " ".join(rng.sample(words, 150))}
+             for i in range(400)]
+    matrix = RelatedPostsMatrix.build(posts, k=3)
+    rows = np.arange(64)
+    tracemalloc.start()
+    scores = matrix._similarities(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert peak < len(matrix.data) * len(rows)  # el producto expandido ocuparía nnz * 64 * 4 bytes
+    assert abs(scores[100, 3] - cosine_reference(posts, 100, 3)) < 1e-5
+    print("✅ Memoria acotada en la reconstrucción")
+
+
+def test_deploy_updates_new_post_and_neighbours():
+    """Verifica que el deploy rellena relatedPosts del post nuevo y de los vecinos en los que entra"""
+    print("\n🔍 Testing deploy hook...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection_path = os.path.join(tmp, "blog_posts.json")
+        matrix_path = os.path.join(tmp, "blog_related.npz")
+        write_collection(POSTS, collection_path)
+        with mock.patch.dict(os.environ, {"RELATED_POSTS_K": "2"}):
+            assert backfill_related_posts(collection_path, matrix_path) == len(POSTS)
+            assert load_collection(collection_path)[1][RELATED_FIELD] == []
+
+            append_posts([dict(NEW_POST)], collection_path,
+                         before_write=lambda collection, count: link_related_posts(collection, count, matrix_path))
+
+        collection = load_collection(collection_path)
+        assert collection[-1][RELATED_FIELD][0] == "agentes-ventas"
+        assert collection[1][RELATED_FIELD] == ["agentes-clientes"]
+        assert RelatedPostsMatrix.load(matrix_path).slugs == [post["slug"] for post in collection]
+    print("✅ Relacionados del post nuevo y de sus vecinos actualizados")
+
+
+def test_out_of_sync_matrix_is_rebuilt():
+    """Verifica que una matriz que no coincide con la colección (edición a mano) se reconstruye"""
+    print("\n🔍 Testing out-of-sync matrix...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "blog_related.npz")
+        RelatedPostsMatrix.build(POSTS[:2], k=2).save(matrix_path)
+
+        collection = [dict(post) for post in POSTS] + [dict(NEW_POST)]
+        changed = link_related_posts(collection, 1, matrix_path, k=2)
+        assert changed == len(collection)
+        assert all(RELATED_FIELD in post for post in collection)
+        assert collection[2][RELATED_FIELD] == ["rag-pymes"]
+    print("✅ Matriz desincronizada reconstruida")
+
+
+if __name__ == "__main__":
+    print("🤖 Test related posts")
+    print("=" * 50)
+
+    test_incremental_matches_full_rebuild()
+    test_rebuild_block_memory_is_bounded()
+    test_deploy_updates_new_post_and_neighbours()
+    test_out_of_sync_matrix_is_rebuilt()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Posts relacionados funcionando correctamente!")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test de reintentos, circuit breaker y hedging con un servidor HTTP local
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rate_limiter import AdaptiveTokenBucket
+from resilient_http import CircuitBreaker, CircuitOpenError, ResilientClient, RetryableError, backoff_delay
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """/flaky falla con 503 las dos primeras veces; /slow-once tarda 1s solo en la primera petición; /slow siempre tarda 0.5s"""
+    counters = {}
+
+    def do_POST(self):
+        count = FlakyHandler.counters.get(self.path, 0) + 1
+        FlakyHandler.counters[self.path] = count
+        if self.path == "/flaky" and count <= 2:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow-once" and count == 1:
+            time.sleep(1)
+        if self.path == "/slow":
+            time.sleep(0.5)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+def _client(**kwargs):
+    limiter = AdaptiveTokenBucket("test", rate_per_minute=60000, burst=100)
+    return ResilientClient("test", limiter=limiter, timeout=(1, 2), **kwargs)
+
+
+def test_retries_transient_errors():
+    """Verifica que los 503 transitorios se reintentan hasta obtener respuesta"""
+    print("🔍 Testing retries...")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = _client(max_retries=3)
+        response = client.request("POST", f"http://127.0.0.1:{server.server_address[1]}/flaky", json={})
+        assert response.status_code == 200
+        assert client.stats()["retries"] == 2
+    finally:
+        server.shutdown()
+    assert 0 <= backoff_delay(3) <= 4
+    print("✅ Reintentos correctos")
+
+
+def test_circuit_breaker_opens():
+    """Verifica que el circuito se abre tras fallos consecutivos y rechaza llamadas"""
+    print("\n🔍 Testing circuit breaker...")
+
+    client = _client(max_retries=0, breaker=CircuitBreaker("test", failure_threshold=2, reset_timeout=60))
+
+    def failing():
+        raise ConnectionError("down")
+
+    for _ in range(2):
+        try:
+            client.call(failing)
+        except ConnectionError:
+            pass
+    try:
+        client.call(failing)
+        assert False, "El circuito debería estar abierto"
+    except CircuitOpenError:
+        pass
+    assert client.stats()["circuit_state"] == "open"
+    print("✅ Circuit breaker correcto")
+
+
+def test_half_open_probe_with_unexpected_error():
+    """Verifica que una prueba half-open que falla con un error no transitorio no deja el circuito bloqueado"""
+    print("\n🔍 Testing half-open probe...")
+
+    client = _client(max_retries=0, breaker=CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05))
+
+    def down():
+        raise ConnectionError("down")
+
+    def bad_request():
+        raise ValueError("channel_not_found")
+
+    try:
+        client.call(down)
+    except ConnectionError:
+        pass
+    time.sleep(0.06)
+    try:
+        client.call(bad_request)  # la prueba half-open
+        assert False, "El ValueError debería propagarse"
+    except ValueError:
+        pass
+    assert client.stats()["circuit_state"] == "open"
+    time.sleep(0.06)
+    assert client.call(lambda: "ok") == "ok"
+    assert client.stats()["circuit_state"] == "closed"
+
+    # Con el circuito cerrado, los errores no transitorios (del llamador) no lo abren
+    for _ in range(3):
+        try:
+            client.call(bad_request)
+        except ValueError:
+            pass
+    assert client.stats()["circuit_state"] == "closed"
+
+    # Una prueba que nunca informa (p. ej. hilo cancelado) caduca tras reset_timeout
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    print("✅ El circuito sale de half-open")
+
+
+def test_non_idempotent_not_retried_after_send():
+    """Verifica que una llamada no idempotente solo se reintenta si el proveedor no la recibió"""
+    print("\n🔍 Testing non-idempotent retries...")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # Timeout de lectura: el servidor ya recibió el POST, reintentarlo lo duplicaría
+        client = _client(max_retries=3)
+        try:
+            client.request("POST", f"http://127.0.0.1:{server.server_address[1]}/slow", json={}, timeout=(1, 0.2))
+            assert False, "El timeout de lectura debería propagarse"
+        except Exception as e:
+            assert "timed out" in str(e).lower()
+        time.sleep(0.6)
+        assert FlakyHandler.counters["/slow"] == 1 and client.stats()["retries"] == 0
+    finally:
+        server.shutdown()
+
+    attempts = []
+
+    def fail_with(*errors):
+        def call():
+            attempts.append(1)
+            if len(attempts) <= len(errors):
+                raise errors[len(attempts) - 1]
+            return "sent"
+        return call
+
+    for error, retried in ((TimeoutError("read timed out"), False), (RetryableError("HTTP 503"), False),
+                           (ConnectionRefusedError("refused"), True),
+                           (RetryableError("HTTP 429", retry_after=0, processed=False), True)):
+        attempts.clear()
+        client = _client(max_retries=2)
+        try:
+            assert client.call(fail_with(error), idempotent=False) == "sent" and retried
+        except (TimeoutError, RetryableError):
+            assert not retried
+        assert len(attempts) == (2 if retried else 1)
+    print("✅ Sin reintentos tras enviar una llamada no idempotente")
+
+
+def test_hedged_request_wins():
+    """Verifica que una petición lenta se duplica tras el p95 y gana la copia"""
+    print("\n🔍 Testing hedging...")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = _client(hedge=True, hedge_min_samples=5)
+        for _ in range(5):
+            client.latency.record(0.05)
+        started = time.monotonic()
+        response = client.request("POST", f"http://127.0.0.1:{server.server_address[1]}/slow-once",
+                                  json={}, idempotent=True)
+        assert response.status_code == 200
+        assert time.monotonic() - started < 0.9
+        assert client.stats()["hedge_wins"] == 1
+    finally:
+        server.shutdown()
+    print("✅ Hedging correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test resilient HTTP")
+    print("=" * 50)
+
+    test_retries_transient_errors()
+    test_circuit_breaker_opens()
+    test_half_open_probe_with_unexpected_error()
+    test_non_idempotent_not_retried_after_send()
+    test_hedged_request_wins()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Cliente resiliente funcionando correctamente!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test del daemon programado: expresiones cron, estado y endpoint de salud
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from scheduler import BlogDaemon, CronSchedule, DaemonStatus, start_status_server
+
+
+def test_cron_next_run():
+    """Verifica el cálculo de la próxima ejecución"""
+    print("🔍 Testing cron schedule...")
+
+    weekly = CronSchedule("0 9 * * 1")
+    assert weekly.next_run(datetime(2025, 7, 20, 12, 0)) == datetime(2025, 7, 21, 9, 0)  # domingo -> lunes
+    assert weekly.next_run(datetime(2025, 7, 21, 9, 0)) == datetime(2025, 7, 28, 9, 0)   # estrictamente posterior
+
+    every_quarter = CronSchedule("*/15 8-10 * * *")
+    assert every_quarter.next_run(datetime(2025, 7, 21, 10, 50)) == datetime(2025, 7, 22, 8, 0)
+    assert every_quarter.next_run(datetime(2025, 7, 21, 8, 14, 59)) == datetime(2025, 7, 21, 8, 15)
+
+    # Día del mes y día de la semana restringidos: basta con uno (semántica cron)
+    either = CronSchedule("30 7 1 * 0")
+    assert either.next_run(datetime(2025, 7, 2)) == datetime(2025, 7, 6, 7, 30)
+
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+    with pytest.raises(ValueError):
+        CronSchedule("0 9 * *")
+    print("✅ Cron correcto")
+
+
+def test_daemon_runs_job_and_reports_status():
+    """Verifica que el daemon ejecuta el job, guarda el resultado y expone /health y /status"""
+    print("\n🔍 Testing daemon status...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schedule = CronSchedule("0 9 * * 1")
+        status = DaemonStatus(schedule, os.path.join(tmp, "status.json"))
+        calls = []
+
+        def job():
+            calls.append(time.monotonic())
+            return {"status": "success", "message": "ok", "content_result": object()}
+
+        daemon = BlogDaemon(schedule, job, status)
+        daemon.run_now_event.set()
+        worker = threading.Thread(target=daemon.serve, daemon=True)
+        worker.start()
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)
+
+        server = start_status_server(status, 0)
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health") as response:
+            health = json.load(response)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/status") as response:
+            remote = json.load(response)
+        server.shutdown()
+        daemon.stop()
+        worker.join(5)
+
+        assert len(calls) == 1
+        assert health["ok"] is True and health["next_run"]
+        assert remote["runs"] == 1
+        assert remote["last_results"][0]["status"] == "success"
+        assert "content_result" not in remote["last_results"][0]
+        with open(os.path.join(tmp, "status.json"), encoding="utf-8") as f:
+            assert json.load(f)["state"] == "stopped"
+    print("✅ Estado del daemon correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test scheduler")
+    print("=" * 50)
+
+    test_cron_next_run()
+    test_daemon_runs_job_and_reports_status()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Daemon funcionando correctamente!")
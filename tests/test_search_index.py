@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test del índice de búsqueda full-text sobre los posts publicados
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+
+from search_index import PostSearchIndex, tokenize, update_index_with_post, search_posts
+
+POSTS = [
+    {
+        "title": "La automatización de precios impulsada por IA para tu PyME",
+        "date": "20/07/2025",
+        "author": "Jon Ortega",
+        "summary": "Cómo ajustar precios automáticamente con inteligencia artificial.",
+        "slug": "automatizacion-precios-ia",
+        "content": "Los algoritmos de precios dinámicos permiten a las PyMEs competir.",
+    },
+    {
+        "title": "Agentes verticales y RAG para atención al cliente",
+        "date": "27/07/2025",
+        "author": "Leire Legarreta",
+        "summary": "Chatbots con memoria y ventana de contexto amplia.",
+        "slug": "agentes-verticales-rag",
+        "content": "Un agente con RAG responde usando los documentos de la empresa.",
+    },
+]
+
+
+def test_tokenize():
+    """Verifica plegado de acentos, stopwords y stemming"""
+    print("🔍 Testing tokenize...")
+
+    assert tokenize("Automatización") == tokenize("automatizacion")
+    assert tokenize("empresas") == tokenize("empresa")
+    assert tokenize("de la para") == []
+    print("✅ Tokenización correcta")
+
+
+def test_search_and_roundtrip():
+    """Verifica búsqueda, eliminación y persistencia comprimida"""
+    print("\n🔍 Testing search index...")
+
+    index = PostSearchIndex.build(POSTS)
+    hits = index.search("automatizar precios")
+    assert hits and hits[0]["slug"] == "automatizacion-precios-ia"
+    assert index.search("agente rag")[0]["slug"] == "agentes-verticales-rag"
+    assert index.search("blockchain") == []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json.gz")
+        index.save(path)
+        loaded = PostSearchIndex.load(path)
+        assert loaded.search("automatizar precios") == hits
+
+    index.remove_post("automatizacion-precios-ia")
+    assert index.search("precios") == []
+    assert len(index) == 1
+    print("✅ Búsqueda y persistencia correctas")
+
+
+def test_incremental_update():
+    """Verifica que el índice se crea desde la colección y se actualiza por post"""
+    print("\n🔍 Testing incremental update...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = os.path.join(tmp, "blog_posts.json")
+        index_path = os.path.join(tmp, "index.json.gz")
+        with open(collection, "w", encoding="utf-8") as f:
+            json.dump(POSTS[:1], f)
+
+        update_index_with_post(POSTS[1], index_path, collection)
+        assert {hit["slug"] for hit in search_posts("precios agentes", 5, index_path, collection)} == {
+            "automatizacion-precios-ia", "agentes-verticales-rag"
+        }
+    print("✅ Actualización incremental correcta")
+
+
+def _index_from_process(index_path, collection, worker):
+    for i in range(5):
+        update_index_with_post({**POSTS[0], "slug": f"{worker}-{i}", "title": f"Post {worker} {i}"},
+                               index_path, collection)
+
+
+def test_concurrent_processes_keep_every_entry():
+    """Verifica que procesos que despliegan a la vez no pierden entradas del índice"""
+    print("\n🔍 Testing concurrent index updates...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = os.path.join(tmp, "blog_posts.json")
+        index_path = os.path.join(tmp, "index.json.gz")
+        spawn = multiprocessing.get_context("spawn")  # procesos independientes, como varios workers de la cola
+        processes = [spawn.Process(target=_index_from_process, args=(index_path, collection, f"p{n}"))
+                     for n in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+        assert len(PostSearchIndex.load(index_path)) == 15
+    print("✅ Ninguna entrada perdida")
+
+
+def main():
+    """Ejecuta los tests del índice de búsqueda"""
+    print("🤖 Test PostSearchIndex")
+    print("=" * 50)
+
+    tests = [test_tokenize, test_search_and_roundtrip, test_incremental_update,
+             test_concurrent_processes_keep_every_entry]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ Test falló: {test.__name__} {e}")
+
+    print("\n" + "=" * 50)
+    print(f"{'🎉' if passed == len(tests) else '❌'} {passed}/{len(tests)} tests pasaron")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test de la configuración multi-sitio: plantilla, colección, remoto y canal por sitio con recursos compartidos
+"""
+
+import json
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew, get_site_crew
+from blog_post import BlogPost, Post, stage_post, take_staged_post
+from post_collection import load_collection
+from rate_limiter import get_rate_limiter
+from resilient_http import get_resilient_client
+from site_config import COLLECTION_FILE, DEFAULT_SITE, SiteConfig, load_sites
+
+SAMPLE_POST = {
+    "label": "IA para agencias", "title": "RAG para agencias", "date": "03/02/2025", "author": "Ane Agirre",
+    "readTime": "5 MIN", "summary": "Resumen.", "coverImage": "/images/blog/rag-agencias.jpeg",
+    "slug": "rag-agencias", "content": "## RAG\n\nContenido sobre RAG para agencias."
+}
+
+
+def test_load_sites_and_defaults():
+    """Verifica la lectura de sites.json, los valores por defecto y los errores de configuración"""
+    print("🔍 Testing site loading...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assert list(load_sites(os.path.join(tmp, "missing.json"))) == [DEFAULT_SITE]
+        default = SiteConfig()
+        assert default.collection == COLLECTION_FILE and default.checkpoint_dir == ".checkpoints"
+
+        path = os.path.join(tmp, "sites.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"sites": [
+                {"name": "pymes"},
+                {"name": "agencias", "directory": os.path.join(tmp, "agencias"), "label": "IA para agencias",
+                 "authors": ["Ane Agirre"], "git_remote": "agencias", "slack_channel": "C0AGENCIAS"},
+            ]}, f)
+        sites = load_sites(path)
+        assert list(sites) == ["pymes", "agencias"]
+        agencias = sites["agencias"]
+        assert agencias.collection == os.path.join(tmp, "agencias", "blog_posts.json")
+        assert agencias.search_index.startswith(os.path.join(tmp, "agencias"))
+        assert sites["pymes"].angles == default.angles  # lo no indicado hereda los valores de siempre
+
+        for bad in ([{"name": "a"}, {"name": "a", "directory": "otro"}], [{"name": "a"}, {"name": "b"}],
+                    [{"name": "a", "colour": "red"}]):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(bad, f)
+            try:
+                load_sites(path)
+                assert False, f"configuración inválida aceptada: {bad}"
+            except ValueError:
+                pass
+    print("✅ Sitios cargados correctamente")
+
+
+def test_crew_uses_its_site():
+    """Verifica que plantilla, tareas y herramientas del crew apuntan a su sitio"""
+    print("\n🔍 Testing per-site crew...")
+
+    site = SiteConfig("agencias", directory="sitios/agencias", label="IA para agencias", authors=["Ane Agirre"],
+                      pitch="Menciona Agencias.ai", brand="agencias.ai", angles=["Ángulo de agencias"],
+                      git_remote="agencias", slack_channel="C0AGENCIAS")
+    automation = BlogAutomationCrew(site=site)
+    assert automation.blog_template["label"] == "IA para agencias"
+
+    research = automation.create_research_task(automation.create_research_agent())
+    writing = automation.create_writing_task(automation.create_writer_agent(), research)
+    assert research.description.endswith("Ángulo de agencias")
+    assert '"label": "IA para agencias"' in writing.description and '"author": "Ane Agirre"' in writing.description
+    assert "Menciona Agencias.ai" in writing.description and "Wrappers" not in writing.description
+    technical = automation.create_technical_task(automation.create_technical_agent(), writing, "post.json")
+    assert "C0AGENCIAS" in technical.description and "C096JQVRXPG" not in technical.description
+
+    assert automation.git_commit_tool.repo_dir == "sitios/agencias" and automation.git_commit_tool.remote == "agencias"
+    assert automation.blog_deployment_tool.collection_file == os.path.join("sitios/agencias", "blog_posts.json")
+    assert automation.post_search_tool.index_file == site.search_index
+    print("✅ El crew usa la configuración de su sitio")
+
+
+def test_sites_deploy_apart_and_share_resources():
+    """Verifica que cada sitio despliega en su colección y que los clientes y limiters son comunes"""
+    print("\n🔍 Testing deploy per site...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crews = [BlogAutomationCrew(site=SiteConfig(name, directory=os.path.join(tmp, name))) for name in ("a", "b")]
+        for crew in crews:
+            os.makedirs(crew.site.directory)
+        # Los dos sitios publican el mismo slug a la vez: cada deploy recoge el post de su sitio
+        stage_post("rag-agencias.json", Post.from_model(BlogPost(**{**SAMPLE_POST, "title": "Otro sitio"})),
+                   crews[0].site.collection)
+        stage_post("rag-agencias.json", Post.from_model(BlogPost(**SAMPLE_POST)), crews[1].site.collection)
+        assert crews[1].blog_deployment_tool._run("rag-agencias.json").startswith("✅")
+        assert take_staged_post("rag-agencias.json", crews[0].site.collection).title == "Otro sitio"
+
+        assert load_collection(crews[0].site.collection) == []
+        assert [post["slug"] for post in load_collection(crews[1].site.collection)] == ["rag-agencias"]
+        assert os.path.exists(crews[1].site.search_index) and os.path.exists(crews[1].site.related_matrix)
+        assert "rag-agencias" in crews[1].post_search_tool._run("RAG agencias")
+        assert "No published posts" in crews[0].post_search_tool._run("RAG agencias")
+
+    # Un crew por sitio y proceso; lo caro (limiters, clientes HTTP) es del proceso, no del sitio
+    limiter, client = get_rate_limiter("llm"), get_resilient_client("serper")
+    assert get_site_crew() is get_site_crew(DEFAULT_SITE)
+    assert get_rate_limiter("llm") is limiter and get_resilient_client("serper") is client
+    print("✅ Colecciones separadas, recursos compartidos")
+
+
+if __name__ == "__main__":
+    print("🤖 Test site config")
+    print("=" * 50)
+
+    test_load_sites_and_defaults()
+    test_crew_uses_its_site()
+    test_sites_deploy_apart_and_share_resources()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Configuración multi-sitio funcionando correctamente!")
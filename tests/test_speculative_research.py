@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test del research especulativo: ranking por especificidad/novedad y caché de ángulos perdedores
+"""
+
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew
+from deadlines import RunCheckpoint
+from search_index import PostSearchIndex
+from speculative_research import ResearchCache, score_research, specificity_score
+
+SPECIFIC = ("Zapier lanzó en enero 2025 AI Actions: automatizaciones en lenguaje natural por $20/mes, "
+            "integradas con más de 5000 apps como HubSpot, Shopify y Gmail. Make y n8n ofrecen alternativas "
+            "desde 9€ al mes. Fuentes: https://zapier.com/blog https://make.com https://n8n.io ") * 2
+GENERIC = ("La inteligencia artificial está transformando las empresas y cada vez más negocios apuestan "
+           "por ella en la era digital, con un impacto sin precedentes en todos los sectores. ") * 4
+
+PUBLISHED = [{
+    "title": "Zapier AI Actions para automatizar tu PyME",
+    "slug": "zapier-ai-actions",
+    "summary": "Automatizaciones en lenguaje natural con Zapier.",
+    "content": SPECIFIC,
+}]
+
+
+def test_specific_research_beats_generic():
+    """Verifica que datos, nombres y fuentes puntúan más que frases genéricas"""
+    print("🔍 Testing specificity...")
+
+    assert specificity_score(SPECIFIC) > 0.6
+    assert specificity_score(GENERIC) == 0.0
+    assert specificity_score("") == 0.0
+    print("✅ Especificidad correcta")
+
+
+def test_novelty_against_published_posts():
+    """Verifica que un research ya publicado pierde novedad"""
+    print("\n🔍 Testing novelty...")
+
+    index = PostSearchIndex.build(PUBLISHED)
+    repeated = score_research(SPECIFIC, index.similar({"content": SPECIFIC}, limit=1))
+    assert repeated["closest_post"] == "zapier-ai-actions" and repeated["novelty"] == 0.0
+
+    fresh_text = SPECIFIC.replace("Zapier", "Notion").replace("apps", "plantillas")
+    assert score_research(fresh_text, [])["score"] > repeated["score"]
+    print("✅ Novedad correcta")
+
+
+def test_research_cache_keeps_losers_until_used_or_expired():
+    """Verifica que la caché guarda perdedores, consume el ganador y descarta lo caducado"""
+    print("\n🔍 Testing research cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.json")
+        cache = ResearchCache(path, max_age_hours=1)
+        cache.update({"angulo-a": "research A", "angulo-b": "research B"})
+        assert cache.fresh() == {"angulo-a": "research A", "angulo-b": "research B"}
+
+        cache.update({}, consume=["angulo-a"])
+        assert cache.fresh() == {"angulo-b": "research B"}
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["angulo-b"]["saved_at"] = time.time() - 7200
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert cache.fresh() == {}
+    print("✅ Caché de research correcta")
+
+
+def test_winner_research_skips_research_stage():
+    """Verifica que el research ganador se inyecta en la tarea y queda en el checkpoint"""
+    print("\n🔍 Testing injected research...")
+
+    automation = BlogAutomationCrew()
+    agent = automation.create_research_agent()
+    task = automation.create_research_task(agent, "Explora herramientas no-code")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = RunCheckpoint(directory=tmp)
+        assert automation._resume_research(checkpoint, task, agent, SPECIFIC) is True
+        assert task.output.raw == SPECIFIC
+        assert checkpoint.outputs() == {"research": SPECIFIC}
+    print("✅ Research inyectado")
+
+
+if __name__ == "__main__":
+    print("🤖 Test speculative research")
+    print("=" * 50)
+
+    test_specific_research_beats_generic()
+    test_novelty_against_published_posts()
+    test_research_cache_keeps_losers_until_used_or_expired()
+    test_winner_research_skips_research_stage()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Research especulativo funcionando correctamente!")
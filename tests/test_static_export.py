@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test de la exportación estática incremental: HTML, índices, RSS, sitemap y copias precomprimidas
+"""
+
+import gzip
+import os
+import tempfile
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from blog_automation import BlogAutomationCrew
+from blog_post import BlogPost, Post, stage_post
+from post_collection import write_collection
+from site_config import SiteConfig
+from static_export import export_site, render_markdown
+
+POST_URL = "wrappers.es/blog/{slug}"
+
+
+def make_post(i: int, **fields) -> dict:
+    return {"label": "IA para tu PyME", "title": f"Post {i}", "date": f"{i:02d}/03/2025", "author": "Jon Ortega",
+            "readTime": "5 MIN", "summary": f"Resumen {i}.", "coverImage": f"/images/blog/post-{i}.jpeg",
+            "slug": f"post-{i}", "content": f"# Post {i}\n\nContenido del post {i}.", **fields}
+
+
+def test_markdown_rendering():
+    """Verifica el markdown del writer (títulos, listas, énfasis, enlaces) y que el HTML del LLM se escapa"""
+    print("🔍 Testing markdown rendering...")
+
+    html = render_markdown("## ¿Qué es RAG?\n\nUn **sistema** con *memoria* y `código`.\n\n"
+                           "- uno\n- dos\n\n1. paso\n2. paso\n\n[web](https://wrappers.es) [mal](javascript:x)\n\n"
+                           "<script>alert(1)</script>")
+    assert '<h2 id="qué-es-rag">¿Qué es RAG?</h2>' in html
+    assert "<strong>sistema</strong>" in html and "<em>memoria</em>" in html and "<code>código</code>" in html
+    assert "<ul><li>uno</li><li>dos</li></ul>" in html and "<ol><li>paso</li><li>paso</li></ol>" in html
+    assert '<a href="https://wrappers.es">web</a>' in html and "javascript" not in html
+    assert "<script>" not in html and "&lt;script&gt;" in html
+    print("✅ Markdown renderizado y escapado")
+
+
+def test_incremental_export():
+    """Verifica que un post nuevo solo escribe su página, la última del archivo, el índice, el feed y el sitemap"""
+    print("\n🔍 Testing incremental export...")
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"STATIC_PAGE_SIZE": "2"}):
+        collection_path, export_dir = os.path.join(tmp, "blog_posts.json"), os.path.join(tmp, "public")
+        posts = [make_post(i) for i in range(1, 6)]
+        write_collection(posts, collection_path)
+        report = export_site(collection_path, export_dir, POST_URL, "wrappers.es")
+        assert len(report["posts_rendered"]) == 5
+        page = os.path.join(export_dir, "blog", "post-1", "index.html")
+        with open(page, encoding="utf-8") as f, gzip.open(page + ".gz", "rt", encoding="utf-8") as gz:
+            html = f.read()
+            assert gz.read() == html
+        assert "<p>Contenido del post 1.</p>" in html and 'href="https://wrappers.es/blog/post-1/"' in html
+
+        assert export_site(collection_path, export_dir, POST_URL, "wrappers.es") == {
+            "posts_rendered": [], "posts_skipped": 5, "files_written": [], "files_removed": []}
+
+        # Post nuevo que entra en los relacionados del post 4: se re-renderizan ese post y el nuevo
+        posts[3]["relatedPosts"] = ["post-6"]
+        write_collection(posts + [make_post(6, relatedPosts=["post-4"])], collection_path)
+        report = export_site(collection_path, export_dir, POST_URL, "wrappers.es")
+        assert sorted(report["posts_rendered"]) == ["post-4", "post-6"] and report["posts_skipped"] == 4
+        assert sorted(report["files_written"]) == [
+            "blog/index.html", "blog/page/3/index.html", "blog/post-4/index.html", "blog/post-6/index.html",
+            "blog/rss.xml", "sitemap.xml"]
+        with open(os.path.join(export_dir, "blog", "post-4", "index.html"), encoding="utf-8") as f:
+            assert "Artículos relacionados" in f.read()
+        with open(os.path.join(export_dir, "blog", "rss.xml"), encoding="utf-8") as f:
+            feed = f.read()
+            assert feed.index("post-6") < feed.index("post-5") and "Thu, 06 Mar 2025" in feed
+        with open(os.path.join(export_dir, "sitemap.xml"), encoding="utf-8") as f:
+            assert "<lastmod>2025-03-06</lastmod>" in f.read()
+
+        # Un post eliminado a mano desaparece con sus copias comprimidas
+        write_collection(posts[1:], collection_path)
+        report = export_site(collection_path, export_dir, POST_URL, "wrappers.es")
+        assert "blog/post-1/index.html" in report["files_removed"]
+        assert not os.path.exists(os.path.join(export_dir, "blog", "post-1"))
+    print("✅ Exportación incremental")
+
+
+def test_republished_slug_converges():
+    """Verifica que con un slug repetido se publica la última versión, una sola vez y de forma estable"""
+    print("\n🔍 Testing duplicated slug...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection_path, export_dir = os.path.join(tmp, "blog_posts.json"), os.path.join(tmp, "public")
+        write_collection([make_post(1), make_post(2), make_post(1, title="Post 1 NUEVO")], collection_path)
+        page = os.path.join(export_dir, "blog", "post-1", "index.html")
+        for run in range(3):
+            report = export_site(collection_path, export_dir, POST_URL, "wrappers.es")
+            assert report["posts_rendered"] == ([] if run else ["post-2", "post-1"])
+            with open(page, encoding="utf-8") as f:
+                assert "Post 1 NUEVO" in f.read()
+        with open(os.path.join(export_dir, "sitemap.xml"), encoding="utf-8") as f:
+            assert f.read().count("/blog/post-1/") == 1
+        with open(os.path.join(export_dir, "blog", "rss.xml"), encoding="utf-8") as f:
+            feed = f.read()
+            assert feed.count("<item>") == 2 and feed.index("post-1") < feed.index("post-2")
+    print("✅ Slug repetido: gana la última versión")
+
+
+def test_deploy_exports_when_enabled():
+    """Verifica que con STATIC_EXPORT el deploy exporta en el directorio del sitio y git lo incluye"""
+    print("\n🔍 Testing export on deploy...")
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"STATIC_EXPORT": "true"}):
+        site = SiteConfig("agencias", directory=os.path.join(tmp, "agencias"), post_url="agencias.ai/posts/{slug}")
+        os.makedirs(site.directory)
+        crew = BlogAutomationCrew(site=site)
+        stage_post("post-1.json", Post.from_model(BlogPost(**make_post(1))), site.collection)
+        assert crew.blog_deployment_tool._run("post-1.json").startswith("✅")
+
+        assert os.path.exists(os.path.join(site.export_dir, "posts", "post-1", "index.html.gz"))
+        assert os.path.exists(os.path.join(site.export_dir, "posts", "rss.xml"))
+        assert "public" in crew.git_commit_tool.include_paths
+    print("✅ Exportación en el deploy")
+
+
+if __name__ == "__main__":
+    print("🤖 Test static export")
+    print("=" * 50)
+
+    test_markdown_rendering()
+    test_incremental_export()
+    test_republished_slug_converges()
+    test_deploy_exports_when_enabled()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Exportación estática funcionando correctamente!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test de la validación incremental del writer: violaciones detectadas a mitad de stream y aborto
+"""
+
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.events import crewai_event_bus
+from crewai.events.types.llm_events import LLMStreamChunkEvent
+
+from blog_automation import BlogAutomationCrew
+from stream_validation import StreamAborted, StreamingPostValidator, stream_validators
+
+SAMPLE_POST = {
+    "label": "IA para tu PyME",
+    "title": "Zapier AI Actions: automatiza tu PyME hablando",
+    "date": "21/07/2025",
+    "author": "Jon Ortega",
+    "readTime": "5 MIN",
+    "summary": "Zapier permite crear automatizaciones en lenguaje natural.",
+    "coverImage": "/images/blog/zapier-ai-actions-pymes.jpeg",
+    "slug": "zapier-ai-actions-pymes",
+    "content": "## Qué es\n\nUn \"asistente\" que conecta +5000 apps\tsin código. Ver [Zapier](https://zapier.com) éxito.",
+}
+
+
+def stream(validator, text, size=7):
+    """Alimenta el validador en chunks pequeños; devuelve (violación, caracteres consumidos)"""
+    for start in range(0, len(text), size):
+        violation = validator.feed(text[start:start + size])
+        if violation:
+            return violation, validator.chars_seen
+    return None, validator.chars_seen
+
+
+def test_valid_post_streams_cleanly():
+    """Verifica que un post correcto (con escapes y enlaces markdown) no dispara violaciones"""
+    print("🔍 Testing valid stream...")
+
+    validator = StreamingPostValidator({"date": "21/07/2025", "label": "IA para tu PyME", "author": None})
+    violation, _ = stream(validator, json.dumps(SAMPLE_POST, indent=2))
+    assert violation is None and validator.complete
+    assert validator.fields == SAMPLE_POST
+    print("✅ Stream válido")
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("date", "2025-07-21", "DD/MM/YYYY"),
+    ("coverImage", "/images/blog/otro-slug.jpeg", "no coincide con el slug"),
+    ("slug", "Zapier AI", "Slug con carácter"),
+    ("readTime", "5 minutos", "MIN"),
+    ("label", "IA para agencias", "debe ser 'IA para tu PyME'"),
+])
+def test_field_violation_aborts_before_content(field, value, message):
+    """Verifica que una regla de campo rota se detecta antes de generar el contenido"""
+    print(f"\n🔍 Testing {field} violation...")
+
+    text = json.dumps({**SAMPLE_POST, field: value})
+    validator = StreamingPostValidator({"date": "21/07/2025", "label": "IA para tu PyME"})
+    violation, consumed = stream(validator, text)
+    assert violation and message in violation
+    assert consumed < text.index('"content"')
+    print(f"✅ Abortado tras {consumed} de {len(text)} caracteres")
+
+
+def test_structure_and_placeholder_violations():
+    """Verifica errores de estructura y placeholders dentro del contenido"""
+    print("\n🔍 Testing structure violations...")
+
+    assert "objeto JSON" in stream(StreamingPostValidator(), "Aquí tienes el post: {")[0]
+    assert "desconocido" in stream(StreamingPostValidator(), '{"titulo": "x"')[0]
+    assert "string" in stream(StreamingPostValidator(), '{"label": 5')[0]
+
+    content = "Imagina que " + "x" * 300 + " en [Nombre de la Empresa] ahorran horas" + "y" * 2000
+    text = json.dumps({**SAMPLE_POST, "content": content})
+    violation, consumed = stream(StreamingPostValidator(), text)
+    assert "placeholder" in violation and consumed < len(text) - 1500
+    print("✅ Violaciones de estructura detectadas")
+
+
+def test_stream_chunk_handler_aborts_watched_task():
+    """Verifica que el handler del event bus lanza StreamAborted solo para tareas vigiladas"""
+    print("\n🔍 Testing stream handler...")
+
+    automation = BlogAutomationCrew()
+    writer = automation.create_writer_agent()
+    task = automation.create_writing_task(writer, automation.create_research_task(automation.create_research_agent()))
+    assert writer.llm.stream is True
+
+    def emit(chunk):
+        event = LLMStreamChunkEvent(chunk=chunk, from_task=task, response_id="r1", call_id="c1")
+        crewai_event_bus.emit(writer.llm, event=event)
+
+    emit("sin JSON")  # tarea no vigilada: se ignora
+
+    stream_validators.watch(task, {"date": "21/07/2025"})
+    try:
+        emit('{"label": "IA para tu PyME", ')
+        with pytest.raises(StreamAborted) as aborted:
+            emit('"date": "2025-07-21"')
+        assert "DD/MM/YYYY" in aborted.value.violation
+    finally:
+        stream_validators.unwatch(task)
+    print("✅ Handler de streaming correcto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test stream validation")
+    print("=" * 50)
+
+    test_valid_post_streams_cleanly()
+    test_field_violation_aborts_before_content("coverImage", "/images/blog/otro-slug.jpeg", "no coincide con el slug")
+    test_structure_and_placeholder_violations()
+    test_stream_chunk_handler_aborts_watched_task()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Validación en streaming funcionando correctamente!")
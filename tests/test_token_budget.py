@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test de la contabilidad de tokens/coste y de los presupuestos por ejecución y por día
+"""
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # Los agentes lo exigen al construirse; no se llama a la API
+
+from crewai.hooks import HookAborted
+from crewai.hooks.llm_hooks import get_before_llm_call_hooks
+
+from blog_automation import BlogAutomationCrew
+from deadlines import RunCheckpoint, RunDeadlines, run_with_deadline
+from token_budget import (
+    BudgetExceeded, RunUsage, UsageLedger, current_usage, estimate_cost, metered_run, usage_for_task
+)
+
+
+class FakeTask:
+    def __init__(self):
+        self.id = uuid.uuid4()
+        self.callback = None
+
+
+USAGE = {"prompt_tokens": 1000, "cached_prompt_tokens": 400, "completion_tokens": 500}
+
+
+def test_cost_estimation():
+    """Verifica precios por modelo, tokens cacheados y modelos sin precio"""
+    print("🔍 Testing cost estimation...")
+
+    # 600 * 0.40 + 400 * 0.10 + 500 * 1.60 por millón
+    assert abs(estimate_cost("gpt-4.1-mini", USAGE) - 0.00108) < 1e-9
+    assert estimate_cost("openai/gpt-4.1-mini-2025-04-14", USAGE) == estimate_cost("gpt-4.1-mini", USAGE)
+    assert estimate_cost("gpt-4.1-nano", USAGE) < estimate_cost("gpt-4.1", USAGE)
+    assert estimate_cost("modelo-local", USAGE) is None
+    with mock.patch.dict(os.environ, {"MODEL_PRICES_JSON": json.dumps({"modelo-local": [1, 1, 1]})}):
+        assert abs(estimate_cost("modelo-local", USAGE) - 0.0015) < 1e-9
+    print("✅ Costes correctos")
+
+
+def test_usage_breakdown_and_run_budget():
+    """Verifica el desglose por agente, etapa, tarea y herramienta, y el presupuesto de la ejecución"""
+    print("\n🔍 Testing usage breakdown...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usage = RunUsage(UsageLedger(os.path.join(tmp, "ledger.jsonl")), run_budget_tokens=4000)
+        research, writing = FakeTask(), FakeTask()
+        usage.register_task(research, "research")
+        usage.register_task(writing, "writing")
+        assert usage_for_task(str(research.id)) is usage
+
+        usage.record(str(research.id), "Busca tendencias", "AI Content Researcher", "gpt-4.1-mini", USAGE)
+        usage.tool_used(str(research.id), "web_search")
+        usage.record(str(research.id), "Busca tendencias", "AI Content Researcher", "gpt-4.1-mini", USAGE)
+        usage.check()
+        usage.record(str(writing.id), "Escribe el post", "Technical Blog Writer for SMBs", "modelo-local", USAGE)
+
+        report = usage.report()
+        assert report["totals"]["calls"] == 3 and report["totals"]["prompt_tokens"] == 3000
+        assert report["by_stage"]["research"]["calls"] == 2 and report["by_stage"]["writing"]["calls"] == 1
+        assert list(report["by_tool"]) == ["web_search"] and report["by_tool"]["web_search"]["calls"] == 1
+        assert report["by_agent"]["Technical Blog Writer for SMBs"]["cost_usd"] == 0.0
+        assert report["unpriced_models"] == ["modelo-local"]
+        try:
+            usage.check("writing")
+            assert False, "debía superar el presupuesto de tokens"
+        except BudgetExceeded as e:
+            assert e.scope == "run" and e.unit == "tokens" and e.stage == "writing"
+
+        usage.finish("budget_exceeded")
+        assert usage_for_task(str(research.id)) is None
+    print("✅ Desglose y presupuesto por ejecución correctos")
+
+
+def test_daily_budget_reads_the_ledger():
+    """Verifica que el gasto del día en el ledger cuenta para el presupuesto diario"""
+    print("\n🔍 Testing daily budget...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = UsageLedger(os.path.join(tmp, "ledger.jsonl"))
+        today = time.strftime("%Y-%m-%d")
+        ledger.append({"date": today, "cost_usd": 0.9})
+        ledger.append({"date": "2000-01-01", "cost_usd": 50.0})
+        assert ledger.spent_on(today) == 0.9
+
+        usage = RunUsage(ledger, daily_budget_usd=1.0)
+        usage.check()
+        usage.record(None, None, None, "gpt-4.1", {"prompt_tokens": 50000, "completion_tokens": 0})
+        try:
+            usage.check("research")
+            assert False, "debía superar el presupuesto diario"
+        except BudgetExceeded as e:
+            assert e.scope == "day" and e.spent == 1.0
+    print("✅ Presupuesto diario correcto")
+
+
+def test_concurrent_runs_share_daily_spend():
+    """Verifica que las ejecuciones simultáneas del proceso ven el gasto de las demás antes del ledger"""
+    print("\n🔍 Testing shared daily spend...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = UsageLedger(os.path.join(tmp, "ledger.jsonl"))
+        ledger.append({"date": time.strftime("%Y-%m-%d"), "cost_usd": 0.5})
+        pymes, agencias = RunUsage(ledger, daily_budget_usd=1.0), RunUsage(ledger, daily_budget_usd=1.0)
+        pymes.record(None, None, None, "gpt-4.1", {"prompt_tokens": 200000})  # 0.4 USD
+        agencias.check()
+        agencias.record(None, None, None, "gpt-4.1", {"prompt_tokens": 50000})  # 0.1 USD: el día llega a 1.0
+        for usage in (pymes, agencias):
+            try:
+                usage.check("writing")
+                assert False, "debía alcanzar el presupuesto diario"
+            except BudgetExceeded as e:
+                assert e.scope == "day" and e.spent == 1.0
+        assert agencias.report()["budget"]["spent_today_usd"] == 1.0
+
+        pymes.finish("success")
+        assert abs(RunUsage(ledger).spent_today - 1.0) < 1e-9  # lo ya anotado en el ledger no cuenta dos veces
+        limit = RunUsage(ledger, run_budget_usd=0.1)
+        limit.record(None, None, None, "gpt-4.1", {"prompt_tokens": 50000})
+        try:
+            limit.check()
+            assert False, "el presupuesto de la ejecución se agota al alcanzarlo, como el diario"
+        except BudgetExceeded as e:
+            assert e.scope == "run"
+    print("✅ Gasto diario compartido entre ejecuciones")
+
+
+def test_budget_cancels_run_cleanly():
+    """Verifica que el watchdog corta la ejecución y el resultado es budget_exceeded con el ledger anotado"""
+    print("\n🔍 Testing clean abort...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger_path = os.path.join(tmp, "ledger.jsonl")
+        automation = BlogAutomationCrew()
+        automation.send_slack_error = lambda errors: None
+
+        @metered_run
+        def run():
+            usage = current_usage()
+            usage.run_budget_usd = 0.001
+            deadlines = RunDeadlines(checkpoint=RunCheckpoint(directory=tmp), usage=usage)
+            task = FakeTask()
+            deadlines.register_task(task, "research")
+            deadlines.start_stage("research")
+
+            def agent_loop():
+                for _ in range(100):  # un agente que no para de gastar
+                    usage.record(str(task.id), "Busca", "AI Content Researcher", "gpt-4.1", USAGE)
+                    time.sleep(0.05)
+
+            finished, _ = run_with_deadline(agent_loop, deadlines)
+            assert not finished
+            return automation._timeout_result(deadlines, deadlines.checkpoint)
+
+        with mock.patch.dict(os.environ, {"USAGE_LEDGER_FILE": ledger_path}):
+            result = run()
+        assert result["status"] == "budget_exceeded" and result["scope"] == "run" and result["stage"] == "research"
+        assert 0.001 < result["usage"]["totals"]["cost_usd"] < 0.1
+        with open(ledger_path, encoding="utf-8") as f:
+            entry = json.loads(f.readline())
+        assert entry["status"] == "budget_exceeded" and entry["cost_usd"] == result["usage"]["totals"]["cost_usd"]
+    print("✅ Ejecución cancelada limpiamente")
+
+
+def test_no_llm_call_after_budget_exceeded():
+    """Verifica que el hilo que sigue vivo tras budget_exceeded no hace ninguna llamada LLM más"""
+    print("\n🔍 Testing calls after budget abort...")
+
+    automation = BlogAutomationCrew()
+    automation.send_slack_error = lambda errors: None
+    enforce = next(hook for hook in get_before_llm_call_hooks() if hook.__name__ == "enforce_deadline")
+    calls, outcome = [], {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        @metered_run
+        def run():
+            usage = current_usage()
+            usage.run_budget_usd = 0.001
+            deadlines = RunDeadlines(checkpoint=RunCheckpoint(directory=tmp), usage=usage)
+            task = FakeTask()
+            deadlines.register_task(task, "research")
+            outcome["deadlines"] = deadlines
+
+            def agent_loop():
+                try:
+                    enforce(SimpleNamespace(task=task))
+                    usage.record(str(task.id), "Busca", "AI Content Researcher", "gpt-4.1", USAGE)  # ya agota
+                    time.sleep(1)  # herramienta lenta: el watchdog corta la ejecución antes de la siguiente llamada
+                    while len(calls) < 100:
+                        enforce(SimpleNamespace(task=task))
+                        calls.append(time.monotonic())
+                        time.sleep(0.05)
+                except HookAborted as e:
+                    outcome["aborted"] = e
+
+            finished, _ = run_with_deadline(agent_loop, deadlines)
+            assert not finished
+            return automation._timeout_result(deadlines, deadlines.checkpoint)
+
+        with mock.patch.dict(os.environ, {"USAGE_LEDGER_FILE": os.path.join(tmp, "ledger.jsonl")}):
+            result = run()
+        outcome["deadlines"].worker.join(2)
+    assert result["status"] == "budget_exceeded"
+    assert calls == [] and outcome["aborted"].source == "budget"
+    print("✅ Ninguna llamada tras agotar el presupuesto")
+
+
+if __name__ == "__main__":
+    print("🤖 Test token budget")
+    print("=" * 50)
+
+    test_cost_estimation()
+    test_usage_breakdown_and_run_budget()
+    test_daily_budget_reads_the_ledger()
+    test_concurrent_runs_share_daily_spend()
+    test_budget_cancels_run_cleanly()
+    test_no_llm_call_after_budget_exceeded()
+
+    print("\n" + "=" * 50)
+    print("🎉 ¡Contabilidad de tokens funcionando correctamente!")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Contabilidad de tokens y coste por ejecución, con presupuestos por ejecución y por día
+
+- Cada llamada LLM (evento de CrewAI con su usage) se suma a su ejecución por agente, etapa, tarea
+  y herramienta: la llamada que consume el resultado de una herramienta cuenta como su ida y vuelta
+- El coste se estima con MODEL_PRICES (USD por millón de tokens), ampliable con MODEL_PRICES_JSON
+- RUN_BUDGET_USD / RUN_BUDGET_TOKENS / DAILY_BUDGET_USD: al alcanzarlos la ejecución se cancela como
+  con un deadline (ver deadlines.RunDeadlines.check) y devuelve status "budget_exceeded"
+- Al terminar, cada ejecución añade una línea a un ledger JSONL (.usage_ledger.jsonl). El gasto del día
+  se lleva además en memoria para todo el proceso: las ejecuciones simultáneas (pool de workers, daemon
+  con varios sitios) ven el gasto de las demás sin esperar a que lleguen al ledger
+- Prompt caching del proveedor: tokens de prompt cacheados frente a no cacheados por llamada, por
+  agente y en total ("prompt_cache" del informe). Las tareas ponen su parte variable al final para
+  que el prefijo se repita entre llamadas y ejecuciones
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from crewai.events import crewai_event_bus
+
+from deadlines import RunCancelled
+from structured_logging import current_run_id, get_logger
+
+log = get_logger("token_budget")
+
+LEDGER_FILE = ".usage_ledger.jsonl"
+
+# USD por millón de tokens: (prompt, prompt cacheado, completion)
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "o4-mini": (1.10, 0.275, 4.40),
+}
+
+USAGE_FIELDS = ("prompt_tokens", "cached_prompt_tokens", "completion_tokens")
+
+# Llamadas individuales que se guardan en el informe de prompt caching (las más recientes)
+MAX_CALLS_REPORTED = 200
+
+
+class BudgetExceeded(RunCancelled):
+    """La ejecución (scope 'run') o el día (scope 'day') superó su presupuesto"""
+
+    def __init__(self, scope: str, stage: Optional[str], spent: float, limit: float, unit: str = "USD"):
+        super().__init__(f"{scope} budget exceeded in stage '{stage}': {spent:g} >= {limit:g} {unit}", stage)
+        self.scope = scope
+        self.spent = spent
+        self.limit = limit
+        self.unit = unit
+
+
+def _prices() -> Dict[str, Tuple[float, float, float]]:
+    prices = dict(MODEL_PRICES)
+    overrides = os.getenv("MODEL_PRICES_JSON")
+    if overrides:
+        prices.update({model: tuple(values) for model, values in json.loads(overrides).items()})
+    return prices
+
+
+def model_price(model: Optional[str]) -> Optional[Tuple[float, float, float]]:
+    """Precio del modelo; admite prefijo de proveedor ('openai/...') y versiones con fecha (prefijo más largo)"""
+    name = (model or "").split("/")[-1]
+    prices = _prices()
+    matches = [known for known in prices if name == known or name.startswith(known + "-")]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def normalize_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Usage de una llamada con los tokens cacheados en cached_prompt_tokens, vengan como vengan
+    (plano, prompt_tokens_details.cached_tokens de OpenAI o cache_read_input_tokens de Anthropic)
+    """
+    usage = usage or {}
+    details = usage.get("prompt_tokens_details") or {}
+    if not isinstance(details, dict):
+        details = {"cached_tokens": getattr(details, "cached_tokens", 0)}
+    cached = (usage.get("cached_prompt_tokens") or usage.get("cached_tokens")
+              or usage.get("cache_read_input_tokens") or details.get("cached_tokens") or 0)
+    prompt = usage.get("prompt_tokens", 0) or 0
+    return {
+        "prompt_tokens": prompt,
+        "cached_prompt_tokens": min(cached, prompt),
+        "completion_tokens": usage.get("completion_tokens", 0) or 0,
+    }
+
+
+def estimate_cost(model: Optional[str], usage: Dict[str, Any]) -> Optional[float]:
+    """Coste en USD de una llamada (None si el modelo no tiene precio conocido)"""
+    price = model_price(model)
+    if price is None:
+        return None
+    usage = normalize_usage(usage)
+    prompt, cached, completion = usage["prompt_tokens"], usage["cached_prompt_tokens"], usage["completion_tokens"]
+    return ((prompt - cached) * price[0] + cached * price[1] + completion * price[2]) / 1_000_000
+
+
+def _empty() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+def _add(bucket: Dict[str, Any], usage: Dict[str, Any], cost: float) -> None:
+    bucket["calls"] += 1
+    for field in USAGE_FIELDS:
+        bucket[field] += usage.get(field, 0) or 0
+    bucket["cost_usd"] += cost
+
+
+def _rounded(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    return {**bucket, "cost_usd": round(bucket["cost_usd"], 6)}
+
+
+def _hit_rate(bucket: Dict[str, Any]) -> float:
+    return round(bucket["cached_prompt_tokens"] / bucket["prompt_tokens"], 3) if bucket["prompt_tokens"] else 0.0
+
+
+class UsageLedger:
+    """Registro persistente (una línea JSON por ejecución) para el presupuesto diario y auditoría"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("USAGE_LEDGER_FILE", LEDGER_FILE)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:  # una escritura por línea en modo append
+            f.write(line)
+
+    def spent_on(self, date: str) -> float:
+        """USD gastados en una fecha (YYYY-MM-DD) según el ledger"""
+        if not os.path.exists(self.path):
+            return 0.0
+        total = 0.0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # línea a medio escribir
+                if entry.get("date") == date:
+                    total += entry.get("cost_usd", 0.0)
+        return total
+
+
+class DailySpend:
+    """
+    Gasto del día compartido por todas las ejecuciones del proceso: el del ledger al empezar el día
+    (o al abrir el proceso) más cada llamada registrada desde entonces, termine o no su ejecución
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spent: Dict[Tuple[str, str], float] = {}
+
+    def _key(self, ledger: UsageLedger, date: str) -> Tuple[str, str]:
+        return os.path.abspath(ledger.path), date
+
+    def load(self, ledger: UsageLedger, date: str) -> None:
+        """Lee el ledger la primera vez que una ejecución de este proceso abre la fecha"""
+        key = self._key(ledger, date)
+        with self._lock:
+            if key not in self._spent:
+                self._spent[key] = ledger.spent_on(date)
+
+    def add(self, ledger: UsageLedger, date: str, cost: float) -> None:
+        with self._lock:
+            key = self._key(ledger, date)
+            self._spent[key] = self._spent.get(key, 0.0) + cost
+
+    def spent(self, ledger: UsageLedger, date: str) -> float:
+        with self._lock:
+            return self._spent.get(self._key(ledger, date), 0.0)
+
+
+daily_spend = DailySpend()
+
+
+class RunUsage:
+    """Tokens y coste de una ejecución, desglosados, frente a sus presupuestos"""
+
+    def __init__(self, ledger: UsageLedger = None, run_budget_usd: float = None, run_budget_tokens: int = None,
+                 daily_budget_usd: float = None):
+        self.ledger = ledger or UsageLedger()
+        self.run_budget_usd = run_budget_usd if run_budget_usd is not None else _env_float("RUN_BUDGET_USD")
+        self.run_budget_tokens = (run_budget_tokens if run_budget_tokens is not None
+                                  else _env_float("RUN_BUDGET_TOKENS"))
+        self.daily_budget_usd = daily_budget_usd if daily_budget_usd is not None else _env_float("DAILY_BUDGET_USD")
+        self.date = datetime.now().strftime("%Y-%m-%d")
+        daily_spend.load(self.ledger, self.date)
+        self.started = time.time()
+        self.totals = _empty()
+        self.unpriced_models = set()
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_stage: Dict[str, Dict[str, Any]] = {}
+        self.by_task: Dict[str, Dict[str, Any]] = {}
+        self.by_tool: Dict[str, Dict[str, Any]] = {}
+        self.calls: deque = deque(maxlen=MAX_CALLS_REPORTED)
+        self.calls_with_cache_hits = 0
+        self._task_stages: Dict[str, str] = {}
+        self._pending_tool: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register_task(self, task, stage: str) -> None:
+        self._task_stages[str(task.id)] = stage
+        with _registry_lock:
+            _usage_by_task[str(task.id)] = self
+
+    def tool_used(self, task_id: str, tool_name: str) -> None:
+        """La siguiente llamada LLM de la tarea consume el resultado de esta herramienta"""
+        with self._lock:
+            self._pending_tool[task_id] = tool_name
+
+    def record(self, task_id: Optional[str], task_name: Optional[str], agent_role: Optional[str],
+               model: Optional[str], usage: Dict[str, Any]) -> None:
+        usage = normalize_usage(usage)
+        cost = estimate_cost(model, usage)
+        stage = self._task_stages.get(task_id, "other")
+        with self._lock:
+            if cost is None:
+                self.unpriced_models.add(model or "unknown")
+                cost = 0.0
+            _add(self.totals, usage, cost)
+            daily_spend.add(self.ledger, self.date, cost)
+            _add(self.by_agent.setdefault(agent_role or "unknown", _empty()), usage, cost)
+            _add(self.by_stage.setdefault(stage, _empty()), usage, cost)
+            task_key = (task_name or "unknown").strip().split("\n")[0][:60]
+            _add(self.by_task.setdefault(task_key, _empty()), usage, cost)
+            tool = self._pending_tool.pop(task_id, None)
+            if tool:
+                _add(self.by_tool.setdefault(tool, _empty()), usage, cost)
+            self.calls_with_cache_hits += 1 if usage["cached_prompt_tokens"] else 0
+            self.calls.append({
+                "agent": agent_role or "unknown",
+                "stage": stage,
+                "model": model,
+                "prompt_tokens": usage["prompt_tokens"],
+                "cached_prompt_tokens": usage["cached_prompt_tokens"],
+                "uncached_prompt_tokens": usage["prompt_tokens"] - usage["cached_prompt_tokens"],
+            })
+        log.debug("💾 Prompt cache: %s/%s prompt tokens cached (%s, %s)", usage["cached_prompt_tokens"],
+                  usage["prompt_tokens"], agent_role, stage,
+                  extra={"fields": {"cached_prompt_tokens": usage["cached_prompt_tokens"],
+                                    "prompt_tokens": usage["prompt_tokens"], "agent": agent_role}})
+
+    @property
+    def tokens(self) -> int:
+        return self.totals["prompt_tokens"] + self.totals["completion_tokens"]
+
+    @property
+    def spent_today(self) -> float:
+        """USD del día: ledger más lo que llevan todas las ejecuciones del proceso, esta incluida"""
+        return daily_spend.spent(self.ledger, self.date)
+
+    def check(self, stage: Optional[str] = None) -> None:
+        """Lanza BudgetExceeded si la ejecución o el día ya alcanzaron su presupuesto"""
+        cost = self.totals["cost_usd"]
+        if self.run_budget_usd and cost >= self.run_budget_usd:
+            raise BudgetExceeded("run", stage, round(cost, 4), self.run_budget_usd)
+        if self.run_budget_tokens and self.tokens >= self.run_budget_tokens:
+            raise BudgetExceeded("run", stage, self.tokens, self.run_budget_tokens, unit="tokens")
+        spent_today = self.spent_today
+        if self.daily_budget_usd and spent_today >= self.daily_budget_usd:
+            raise BudgetExceeded("day", stage, round(spent_today, 4), self.daily_budget_usd)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "totals": _rounded(self.totals),
+                "by_agent": {key: _rounded(value) for key, value in self.by_agent.items()},
+                "by_stage": {key: _rounded(value) for key, value in self.by_stage.items()},
+                "by_task": {key: _rounded(value) for key, value in self.by_task.items()},
+                "by_tool": {key: _rounded(value) for key, value in self.by_tool.items()},
+                "unpriced_models": sorted(self.unpriced_models),
+                "prompt_cache": self._prompt_cache_report(),
+                "budget": {
+                    "run_usd": self.run_budget_usd,
+                    "run_tokens": self.run_budget_tokens,
+                    "daily_usd": self.daily_budget_usd,
+                    "spent_today_usd": round(self.spent_today, 6),
+                },
+            }
+
+    def _prompt_cache_report(self) -> Dict[str, Any]:
+        """Tokens de prompt cacheados frente a no cacheados (llamar con el lock tomado)"""
+        return {
+            "calls": self.totals["calls"],
+            "calls_with_hits": self.calls_with_cache_hits,
+            "prompt_tokens": self.totals["prompt_tokens"],
+            "cached_prompt_tokens": self.totals["cached_prompt_tokens"],
+            "uncached_prompt_tokens": self.totals["prompt_tokens"] - self.totals["cached_prompt_tokens"],
+            "hit_rate": _hit_rate(self.totals),
+            "hit_rate_by_agent": {agent: _hit_rate(bucket) for agent, bucket in self.by_agent.items()},
+            "per_call": list(self.calls),
+        }
+
+    def finish(self, status: str = None) -> None:
+        """Cierra la ejecución: deja de recibir eventos y se anota en el ledger"""
+        with _registry_lock:
+            for task_id in self._task_stages:
+                if _usage_by_task.get(task_id) is self:
+                    del _usage_by_task[task_id]
+        report = self.report()
+        self.ledger.append({
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "date": self.date,
+            "run_id": current_run_id(),
+            "status": status,
+            "duration_s": round(time.time() - self.started, 2),
+            **{key: value for key, value in report["totals"].items()},
+            "cache_hit_rate": report["prompt_cache"]["hit_rate"],
+            "by_agent": report["by_agent"],
+        })
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# Tarea en curso (str(task.id)) -> su ejecución: los eventos LLM llegan con el id de la tarea
+_usage_by_task: Dict[str, RunUsage] = {}
+_registry_lock = threading.Lock()
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("blog_run_usage", default=None)
+
+
+def usage_for_task(task_id: Optional[str]) -> Optional[RunUsage]:
+    with _registry_lock:
+        return _usage_by_task.get(task_id) if task_id else None
+
+
+def current_usage() -> Optional[RunUsage]:
+    return _current_usage.get()
+
+
+def metered_run(method):
+    """
+    Decorador de los run_*: abre la contabilidad de la ejecución (las anidadas comparten la del run
+    exterior), la añade al resultado como "usage" y la anota en el ledger al terminar
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if current_usage() is not None:
+            return method(*args, **kwargs)
+        usage = RunUsage()
+        token = _current_usage.set(usage)
+        result = None
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            _current_usage.reset(token)
+            crewai_event_bus.flush(timeout=5)  # los eventos de usage se procesan en un pool de hilos
+            usage.finish(result.get("status") if isinstance(result, dict) else "error")
+        if isinstance(result, dict):
+            result["usage"] = usage.report()
+        return result
+    return wrapper